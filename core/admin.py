@@ -1,26 +1,33 @@
-import io
 import os
-import re
 import uuid
 from decimal import Decimal
 
+from asgiref.sync import sync_to_async
+
 from django import forms
 from django.conf import settings
-from django.contrib import admin
-from django.http import HttpResponse
-from django.shortcuts import get_object_or_404
-from django.urls import path
-from django.utils.html import format_html
-
-from reportlab.pdfgen import canvas
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.lib.colors import white, black
-from weasyprint import HTML
-from nepali_datetime import date as nepali_date
+from django.contrib import admin, messages
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import ERROR_FLAG
+from django.db.models import Sum
+from django.core.exceptions import PermissionDenied
+from django.http import FileResponse, Http404, HttpResponseRedirect
+from django.shortcuts import aget_object_or_404, get_object_or_404
+from django.urls import path, reverse
 from django.utils.html import format_html
-from django.template.loader import render_to_string
-from .models import Issue, Bank
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from . import interest
+from .bank_index import get_bank_index
+from .exports import csv_response, xlsx_response
+from .jobs import enqueue, result_path, retry
+from .models import Issue, IssueSummary, Bank, Job
+from .paginator import CachedCountPaginator
+from .pdf import acached_issue_pdf, issue_pdf_key
+from .search import search_issues
+from .summary import SUMMARY_AMOUNTS
+from .utils import bs_calendar
+from .utils.nepali_numerals import parse_decimal, to_nepali
 from .widgets import NepaliDatePickerWidget, NepaliUnicodeTextInput
 
 
@@ -29,24 +36,16 @@ admin.site.site_title = "ऋण असुली न्यायाधिकर
 admin.site.index_title = "राजस्व रकम दाखिला"
 
 
-# Register Devanagari font for PDF generation
-font_path = os.path.join(settings.BASE_DIR, "staticfiles/fonts/Kalimati.ttf")
-pdfmetrics.registerFont(TTFont("NotoDevanagari", font_path))
-
-
 # Bank Admin for searchable bank names
 @admin.register(Bank)
 class BankAdmin(admin.ModelAdmin):
     search_fields = ['name']
 
-
-# Utility: Convert English digits to Nepali digits
-def convert_to_nepali_number(num):
-    nepali_digits = "०१२३४५६७८९"
-    try:
-        return ''.join(nepali_digits[int(d)] if d.isdigit() else d for d in str(num))
-    except Exception:
-        return str(num)
+    # Matches come from the in-memory bank index rather than an icontains scan
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return queryset, False
+        return queryset.filter(pk__in=get_bank_index().search(search_term, limit=None)), False
 
 
 # Utility: Generate unique issue ID
@@ -54,24 +53,11 @@ def generate_issue_id():
     return f"MU{uuid.uuid4().hex[:6].upper()}"
 
 
-# Utility: Draw mixed Nepali and English text on PDF canvas
-def draw_mixed_text(p, x, y, text, nepali_font, english_font, font_size=12):
-    pattern = re.compile(r'([\u0900-\u097F]+|[^\u0900-\u097F]+)')
-    chunks = pattern.findall(text or '')
-    cursor_x = x
-    for chunk in chunks:
-        font = nepali_font if re.match(r'^[\u0900-\u097F]+$', chunk) else english_font
-        p.setFont(font, font_size)
-        p.drawString(cursor_x, y, chunk)
-        width = pdfmetrics.stringWidth(chunk, font, font_size)
-        cursor_x += width
-
-
 # Custom admin form for Issue model with Nepali widgets and decimal conversion
 class IssueAdminForm(forms.ModelForm):
-    TAX_CHOICES = [('0.01', '1%'), ('0.005', '0.5%')]
+    TAX_CHOICES = [(str(rate), label) for rate, label in interest.TAX_RATE_CHOICES]
 
-    tax_rate = forms.ChoiceField(choices=TAX_CHOICES, label='drt-शुल्क', initial='0.01')
+    tax_rate = forms.ChoiceField(choices=TAX_CHOICES, label='drt-शुल्क', initial=str(interest.DEFAULT_TAX_RATE))
     id = forms.CharField(label='मुद्दा नम्बर', required=False)
     title = forms.CharField(label='शीर्षक', required=False, widget=NepaliUnicodeTextInput())
     defendant = forms.CharField(label='प्रतिवादी', required=False, widget=NepaliUnicodeTextInput())
@@ -98,7 +84,7 @@ class IssueAdminForm(forms.ModelForm):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        today = nepali_date.today().strftime('%Y-%m-%d')
+        today = bs_calendar.today_bs()
 
         # Set default values on date fields to today if not already set
         for field in ['issue_date_bs', 'final_date_bs']: 
@@ -108,19 +94,10 @@ class IssueAdminForm(forms.ModelForm):
             })
 
     def _convert_nepali_to_decimal(self, field):
-        val = self.cleaned_data.get(field, "")
-        nepali_digits = "०१२३४५६७८९"
-        english_digits = "0123456789"
-        converted = []
-
-        for ch in val:
-            if ch in nepali_digits:
-                converted.append(str(nepali_digits.index(ch)))
-            elif ch in english_digits or ch == '.':
-                converted.append(ch)
-
-        cleaned_val = ''.join(converted)
-        return Decimal(cleaned_val) if cleaned_val else Decimal('0.00')
+        try:
+            return parse_decimal(self.cleaned_data.get(field, ""), default=Decimal('0.00'))
+        except ValueError:
+            raise forms.ValidationError("कृपया मान्य संख्या लेख्नुहोस्।")
 
     # Clean methods to convert Nepali digits to Decimal
     def clean_principal_amount(self):
@@ -167,29 +144,39 @@ class IssueAdmin(admin.ModelAdmin):
         'id_nepali', 'title', 'petitioner', 'defendant',
         'total_days', 'interest_amount', 'print_pdf_button'
     )
-    def id_nepali(self, obj):
-        id_str = str(obj.id)
-
-        # Check if the ID is purely numeric (English digits)
-        if id_str.isdigit():
-            return convert_to_nepali_number(id_str)
+    list_filter = ['status']
+    list_select_related = ['petitioner']
+    # Shows the search box; the lookup itself goes through the FTS index
+    search_fields = ['id']
+    paginator = CachedCountPaginator
+    show_full_result_count = False
+    change_list_template = 'admin/core/issue/change_list.html'
+    actions = [
+        'print_selected_pdf', 'print_selected_zip', 'recalculate_selected',
+        'export_selected_csv', 'export_selected_xlsx',
+    ]
 
-        # If it's mixed (like MU1234 or मुद्दा567), convert only the digits
-        nepali_digits = "०१२३४५६७८९"
-        return ''.join(
-            nepali_digits[int(ch)] if ch.isdigit() else ch
-            for ch in id_str
-        )
+    def id_nepali(self, obj):
+        # Convert only the digits, so mixed ids like MU1234 keep their letters
+        return to_nepali(obj.id)
     id_nepali.short_description = 'मुद्दा नम्बर'
 
+    def get_search_results(self, request, queryset, search_term):
+        return search_issues(queryset, search_term), False
+
     def get_urls(self):
         urls = super().get_urls()
         custom_urls = [
             path(
                 '<path:issue_id>/print_pdf/',
-                self.admin_site.admin_view(self.print_template_pdf),
+                self.admin_site.admin_view(self.print_template_pdf, cacheable=True),
                 name='issue_print_pdf'
             ),
+            path(
+                'export/<str:fmt>/',
+                self.admin_site.admin_view(self.export_view),
+                name='issue_export'
+            ),
         ]
         return custom_urls + urls
 
@@ -201,21 +188,179 @@ class IssueAdmin(admin.ModelAdmin):
         )
     print_pdf_button.short_description = 'Print PDF'
 
-    def print_template_pdf(self, request, issue_id):
-        issue = get_object_or_404(Issue, pk=issue_id)
+    # Async so that under ASGI a slow render waits in the PDF render pool
+    # instead of blocking the thread every sync view shares
+    async def print_template_pdf(self, request, issue_id):
+        if not await sync_to_async(self.has_view_permission)(request):
+            raise PermissionDenied
+        issue = await aget_object_or_404(Issue.objects.select_related('petitioner'), pk=issue_id)
+
+        # Browsers revalidate on every click and get a 304 while the issue is unchanged
+        etag = f'"{issue_pdf_key(issue)}"'
+        last_modified = int(issue.updated_at.timestamp())
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+        if response is None:
+            path = await acached_issue_pdf(issue, base_url=request.build_absolute_uri())
+            response = FileResponse(
+                open(path, 'rb'),
+                content_type='application/pdf',
+                headers={'Content-Disposition': f'inline; filename="mudda_{issue.id}.pdf"'}
+            )
+
+        response.headers['ETag'] = etag
+        response.headers['Last-Modified'] = http_date(last_modified)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+
+    @admin.action(description='छानिएका मुद्दाहरु एउटै PDF मा प्रिन्ट गर्नुहोस्')
+    def print_selected_pdf(self, request, queryset):
+        return self._print_batch(request, queryset, 'pdf')
+
+    @admin.action(description='छानिएका मुद्दाहरु ZIP मा प्रिन्ट गर्नुहोस्')
+    def print_selected_zip(self, request, queryset):
+        return self._print_batch(request, queryset, 'zip')
+
+    def _print_batch(self, request, queryset, fmt):
+        count = queryset.count()
+        if count > settings.ISSUE_BATCH_PRINT_MAX:
+            self.message_user(
+                request,
+                f"एक पटकमा बढीमा {settings.ISSUE_BATCH_PRINT_MAX} मुद्दा मात्र प्रिन्ट गर्न सकिन्छ ({count} छानिएको)।",
+                messages.ERROR,
+            )
+            return None
+
+        ids = list(queryset.values_list('pk', flat=True))
+        job = enqueue('print', {'ids': ids, 'fmt': fmt, 'base_url': request.build_absolute_uri()}, request.user)
+        return self._job_queued(request, job)
+
+    @admin.action(description='छानिएका मुद्दाहरुको ब्याज र शुल्क पुनः गणना गर्नुहोस्')
+    def recalculate_selected(self, request, queryset):
+        job = enqueue('recalculate', {'ids': list(queryset.values_list('pk', flat=True))}, request.user)
+        return self._job_queued(request, job)
+
+    # Slow work runs in run_worker; the user follows it in the job list
+    def _job_queued(self, request, job):
+        url = reverse(f'{self.admin_site.name}:core_job_changelist')
+        self.message_user(
+            request,
+            format_html('{} लाममा राखियो। प्रगति र नतिजा <a href="{}">कामहरु</a> मा हेर्नुहोस्।', job, url),
+            messages.INFO,
+        )
+        return HttpResponseRedirect(url)
+
+    EXPORTERS = {'csv': csv_response, 'xlsx': xlsx_response}
+
+    # Export whatever the changelist currently shows (filters, search, ordering)
+    def export_view(self, request, fmt):
+        if fmt not in self.EXPORTERS or not self.has_view_permission(request):
+            raise PermissionDenied
+        request.GET = request.GET.copy()
+        nepali_digits = request.GET.pop('nepali', None) is not None
+        try:
+            changelist = self.get_changelist_instance(request)
+        except IncorrectLookupParameters:
+            # Same as changelist_view: back to the list, which shows the error
+            url = reverse(f'{self.admin_site.name}:core_issue_changelist')
+            return HttpResponseRedirect(f'{url}?{ERROR_FLAG}=1')
+        queryset = changelist.get_queryset(request)
+        return self.EXPORTERS[fmt](queryset, 'mudda', nepali_digits=nepali_digits)
+
+    @admin.action(description='छानिएका मुद्दाहरु CSV मा निर्यात गर्नुहोस्')
+    def export_selected_csv(self, request, queryset):
+        return csv_response(queryset, 'mudda')
+
+    @admin.action(description='छानिएका मुद्दाहरु XLSX मा निर्यात गर्नुहोस्')
+    def export_selected_xlsx(self, request, queryset):
+        return xlsx_response(queryset, 'mudda')
+
+
+# Dashboard over the incrementally maintained summary table; it never
+# aggregates Issue, so it stays cheap however many cases there are
+@admin.register(IssueSummary)
+class IssueSummaryAdmin(admin.ModelAdmin):
+    list_display = (
+        'petitioner', 'status', 'issue_count',
+        'principal_amount', 'interest_amount', 'tax_revenue_amount', 'payable_amount',
+    )
+    list_filter = ['status']
+    list_select_related = ['petitioner']
+    ordering = ['petitioner__name', 'status']
+    change_list_template = 'admin/core/issuesummary/change_list.html'
 
-        html_string = render_to_string("issue_pdf.html", {
-            "issue": issue,
-            "font_url": request.build_absolute_uri("/staticfiles/fonts/NotoSansDevanagari-Regular.ttf")
-        })
+    def has_add_permission(self, request):
+        return False
 
-        pdf_file = HTML(string=html_string, base_url=request.build_absolute_uri()).write_pdf()
+    def has_change_permission(self, request, obj=None):
+        return False
 
-        return HttpResponse(
-            pdf_file,
-            content_type='application/pdf',
-            headers={'Content-Disposition': f'inline; filename="mudda_{issue.id}.pdf"'}
-        )
+    def has_delete_permission(self, request, obj=None):
+        return False
 
+    def changelist_view(self, request, extra_context=None):
+        response = super().changelist_view(request, extra_context)
+        if hasattr(response, 'context_data') and 'cl' in response.context_data:
+            queryset = response.context_data['cl'].queryset
+            response.context_data['totals'] = queryset.aggregate(
+                issue_count=Sum('issue_count'), **{field: Sum(field) for field in SUMMARY_AMOUNTS}
+            )
+        return response
 
-    
\ No newline at end of file
+
+# Background jobs: progress while they run, the result file once they are done
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = (
+        '__str__', 'status', 'progress', 'attempts', 'created_by', 'created_at', 'finished_at', 'download_link',
+    )
+    list_filter = ['status', 'kind']
+    list_select_related = ['created_by']
+    ordering = ['-created_at']
+    readonly_fields = [
+        'kind', 'status', 'progress', 'attempts', 'max_attempts', 'run_after', 'worker', 'heartbeat_at',
+        'message', 'download_link', 'created_by', 'created_at', 'started_at', 'finished_at',
+    ]
+    exclude = ['params', 'progress_done', 'progress_total', 'result_name']
+    actions = ['retry_selected']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        return [
+            path(
+                '<int:job_id>/download/',
+                self.admin_site.admin_view(self.download_view),
+                name='core_job_download',
+            ),
+        ] + super().get_urls()
+
+    @admin.display(description='प्रगति')
+    def progress(self, obj):
+        if not obj.progress_total:
+            return '-'
+        return f"{to_nepali(obj.progress_done)}/{to_nepali(obj.progress_total)}"
+
+    @admin.display(description='नतिजा')
+    def download_link(self, obj):
+        if obj.status != 'done' or not obj.result_name:
+            return '-'
+        url = reverse(f'{self.admin_site.name}:core_job_download', args=[obj.pk])
+        return format_html('<a class="button" href="{}">{}</a>', url, obj.result_name)
+
+    def download_view(self, request, job_id):
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        job = get_object_or_404(Job, pk=job_id, status='done')
+        path = result_path(job)
+        if not path or not os.path.exists(path):
+            raise Http404
+        return FileResponse(open(path, 'rb'), as_attachment=True, filename=job.result_name)
+
+    @admin.action(description='असफल कामहरु फेरि चलाउनुहोस्')
+    def retry_selected(self, request, queryset):
+        self.message_user(request, f"{retry(queryset)} काम फेरि लाममा राखियो।", messages.SUCCESS)
@@ -0,0 +1,111 @@
+# In-memory search index over bank names for autocomplete.
+#
+# Names are normalized like the issue search (core.search.normalize) and
+# kept in sorted lists, one over whole names and one over every later word
+# start, so a prefix lookup is a bisect plus a walk over at most limit
+# entries. Terms of three or more characters also match anywhere in a name
+# through trigram posting lists.
+# The index is rebuilt per process when its version key moves (bank saved or
+# deleted). The key lives in the shared page cache, so every worker process
+# sees the bump; INDEX_MAX_AGE bounds staleness after bulk changes that
+# bypass signals.
+
+import hashlib
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+from .page_cache import bump_shared_version, shared_version
+from .search import normalize
+
+
+BANK_INDEX_VERSION_KEY = 'bank-index-version'
+INDEX_MAX_AGE = 60
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class BankIndex:
+    def __init__(self, banks):
+        self.names = {}
+        self.keys = {}
+        self.by_key = {}
+        for pk, name in banks:
+            key = ' '.join(normalize(name).split())
+            self.names[pk] = name
+            self.keys[pk] = key
+            self.by_key.setdefault(key, pk)
+
+        # Everything below is in key order, so the first matches found are
+        # the best ones and a lookup can stop after limit hits
+        self.ordered = sorted(self.keys, key=lambda pk: (self.keys[pk], pk))
+        self.starts = [(self.keys[pk], pk) for pk in self.ordered]
+        words = []
+        postings = defaultdict(list)
+        digest = hashlib.sha1()
+        for pk in self.ordered:
+            key = self.keys[pk]
+            parts = key.split(' ')
+            for position in range(1, len(parts)):
+                words.append((' '.join(parts[position:]), pk))
+            for gram in _trigrams(key):
+                postings[gram].append(pk)
+            digest.update(f"{pk}\0{self.names[pk]}\0".encode())
+        self.words = sorted(words)
+        self.postings = dict(postings)
+        self.posting_sets = {gram: set(pks) for gram, pks in postings.items()}
+        self.digest = digest.hexdigest()[:16]
+
+    # Bank ids matching text, best first: names starting with it, then names
+    # with a later word starting with it, then names containing it anywhere.
+    # limit=None returns every match.
+    def search(self, text, limit=20):
+        term = ' '.join(normalize(text).split())
+        if not term:
+            return self.ordered[:limit]
+
+        found = {}
+        for entries in (self.starts, self.words):
+            index = bisect_left(entries, (term,))
+            while index < len(entries) and len(found) != limit:
+                key, pk = entries[index]
+                if not key.startswith(term):
+                    break
+                found.setdefault(pk, None)
+                index += 1
+
+        if len(term) >= 3 and len(found) != limit:
+            grams = sorted(_trigrams(term), key=lambda gram: len(self.postings.get(gram, ())))
+            others = [self.posting_sets.get(gram, set()) for gram in grams[1:]]
+            for pk in self.postings.get(grams[0], ()):
+                if len(found) == limit:
+                    break
+                if pk not in found and all(pk in other for other in others) and term in self.keys[pk]:
+                    found[pk] = None
+        return list(found)
+
+    # Bank id whose name equals text after normalization, or None
+    def lookup(self, text):
+        return self.by_key.get(' '.join(normalize(text).split()))
+
+
+_index = None
+_built = (None, 0.0)
+
+
+def get_bank_index():
+    global _index, _built
+    version = shared_version(BANK_INDEX_VERSION_KEY)
+    built_version, built_at = _built
+    if _index is None or version != built_version or time.monotonic() - built_at > INDEX_MAX_AGE:
+        from .models import Bank
+
+        _index = BankIndex(Bank.objects.values_list('pk', 'name'))
+        _built = (version, time.monotonic())
+    return _index
+
+
+def bump_bank_index_version():
+    bump_shared_version(BANK_INDEX_VERSION_KEY)
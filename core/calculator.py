@@ -0,0 +1,155 @@
+# Stateless bulk calculation: rows of loan terms in (CSV or NDJSON), the
+# amounts Issue.save() would store out, streamed row by row. Nothing is
+# read from or written to the database, and input is consumed lazily, so
+# memory stays flat however large the upload.
+
+import csv
+import json
+
+from . import interest
+from .exports import Echo
+from .utils.nepali_numerals import parse_decimal, to_ascii
+
+
+# Accepted input names for each term, model field names first
+INPUT_ALIASES = {
+    'principal_amount': ['principal_amount', 'principal'],
+    'interest_rate': ['interest_rate', 'rate'],
+    'issue_date_bs': ['issue_date_bs', 'start', 'start_date'],
+    'final_date_bs': ['final_date_bs', 'end', 'end_date'],
+    'prepaid_amount': ['prepaid_amount', 'prepaid'],
+    'claimed_amount': ['claimed_amount', 'claimed'],
+    'tax_rate': ['tax_rate'],
+    'id': ['id', 'ref'],
+}
+OUTPUT_FIELDS = ['line', 'id'] + list(interest.Amounts._fields) + ['error']
+
+
+class RowError(Exception):
+    pass
+
+
+# Text lines from an upload. A line that is not valid UTF-8 is decoded with
+# replacement characters and its number added to bad_lines, so the readers
+# can report it as that row's error instead of failing the whole stream.
+def _decoded(lines, bad_lines):
+    for number, line in enumerate(lines, start=1):
+        if isinstance(line, bytes):
+            try:
+                text = line.decode('utf-8')
+            except UnicodeDecodeError:
+                text = line.decode('utf-8', errors='replace')
+                bad_lines.add(number)
+        else:
+            text = line
+        if number == 1:
+            text = text.lstrip('\ufeff')
+        yield text
+
+
+NOT_UTF8 = "not valid UTF-8"
+
+
+def _canonical(record):
+    values = {}
+    for field, aliases in INPUT_ALIASES.items():
+        for alias in aliases:
+            if record.get(alias) not in (None, ''):
+                values[field] = record[alias]
+                break
+    return values
+
+
+def read_csv(lines):
+    bad_lines = set()
+    reader = csv.DictReader(_decoded(lines, bad_lines))
+    reader.fieldnames  # reads the header
+    first_line = reader.line_num + 1
+    for record in reader:
+        # A quoted record can span several lines
+        if bad_lines and any(n in bad_lines for n in range(first_line, reader.line_num + 1)):
+            yield reader.line_num, RowError(NOT_UTF8)
+        else:
+            yield reader.line_num, _canonical({(key or '').strip(): value for key, value in record.items()})
+        first_line = reader.line_num + 1
+
+
+def read_ndjson(lines):
+    bad_lines = set()
+    for number, text in enumerate(_decoded(lines, bad_lines), start=1):
+        if not text.strip():
+            continue
+        if number in bad_lines:
+            yield number, RowError(NOT_UTF8)
+            continue
+        try:
+            record = json.loads(text)
+        except ValueError:
+            yield number, RowError("invalid JSON")
+            continue
+        if not isinstance(record, dict):
+            yield number, RowError("each line must be a JSON object")
+            continue
+        yield number, _canonical(record)
+
+
+def _amount(values, field, default=None):
+    try:
+        value = parse_decimal(values.get(field, ''), default=default)
+    except ValueError:
+        raise RowError(f"{field}: not a number")
+    if value is None:
+        raise RowError(f"{field}: missing")
+    return value
+
+
+def _tax_rate(values):
+    rate = _amount(values, 'tax_rate', interest.DEFAULT_TAX_RATE)
+    for choice, _ in interest.TAX_RATE_CHOICES:
+        if rate == choice:
+            return choice
+    raise RowError(f"tax_rate: must be one of {', '.join(str(c) for c, _ in interest.TAX_RATE_CHOICES)}")
+
+
+# One result dict per input row; final_date_bs, when given, replaces every
+# row's end date ("as of" that day)
+def calculate_rows(records, final_date_bs=None):
+    for line, values in records:
+        result = {'line': line, 'id': None}
+        try:
+            if isinstance(values, RowError):
+                raise values
+            result['id'] = values.get('id')
+            principal = _amount(values, 'principal_amount')
+            amounts = interest.calculate(
+                principal,
+                _amount(values, 'interest_rate'),
+                _amount(values, 'claimed_amount', principal),
+                _amount(values, 'prepaid_amount', 0),
+                _tax_rate(values),
+                to_ascii(values.get('issue_date_bs', '')).strip(),
+                final_date_bs or to_ascii(values.get('final_date_bs', '')).strip(),
+            )
+        except RowError as e:
+            result['error'] = str(e)
+        except (ValueError, OverflowError, TypeError) as e:
+            result['error'] = f"date: {e.args[0] if e.args else e}"
+        except ArithmeticError:
+            # decimal.InvalidOperation: an amount too large to quantize
+            result['error'] = "amount out of range"
+        else:
+            result.update(amounts._asdict())
+        yield result
+
+
+def ndjson_lines(results):
+    for result in results:
+        yield json.dumps({key: str(value) if key.endswith('_amount') else value
+                          for key, value in result.items()}, ensure_ascii=False) + '\n'
+
+
+def csv_lines(results):
+    writer = csv.DictWriter(Echo(), fieldnames=OUTPUT_FIELDS)
+    yield writer.writeheader()
+    for result in results:
+        yield writer.writerow(result)
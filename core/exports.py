@@ -0,0 +1,170 @@
+import csv
+import io
+import re
+import zipfile
+from xml.sax.saxutils import escape
+
+from django.http import StreamingHttpResponse
+
+from .models import Issue
+from .utils.nepali_numerals import to_nepali
+
+
+EXPORT_FIELDS = [
+    'id', 'title', 'petitioner', 'defendant',
+    'principal_amount', 'claimed_amount', 'interest_rate', 'prepaid_amount',
+    'issue_date_bs', 'final_date_bs', 'total_days', 'interest_amount',
+    'total_amount', 'tax_rate', 'tax_revenue_amount', 'payable_amount', 'status',
+]
+NUMERIC_FIELDS = {
+    'principal_amount', 'claimed_amount', 'interest_rate', 'prepaid_amount', 'total_days',
+    'interest_amount', 'total_amount', 'tax_rate', 'tax_revenue_amount', 'payable_amount',
+}
+EXPORT_CHUNK_SIZE = 2000
+
+
+def export_header():
+    return [str(Issue._meta.get_field(name).verbose_name) for name in EXPORT_FIELDS]
+
+
+# Rows are read with a server-side iterator in fixed chunks, so memory stays
+# flat regardless of how many issues match.
+def export_rows(queryset, nepali_digits=False):
+    issues = queryset.select_related('petitioner').iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    for issue in issues:
+        row = []
+        for name in EXPORT_FIELDS:
+            value = getattr(issue, name)
+            if value is None:
+                value = ''
+            elif nepali_digits:
+                value = to_nepali(value)
+            elif name not in NUMERIC_FIELDS:
+                value = str(value)
+            row.append(value)
+        yield row
+
+
+# Pseudo-buffer for csv.writer: hands each written line straight back, so
+# rows can be yielded to a StreamingHttpResponse (also used by core.calculator)
+class Echo:
+    def write(self, value):
+        return value
+
+
+def csv_response(queryset, filename, nepali_digits=False):
+    writer = csv.writer(Echo())
+
+    def lines():
+        yield '\ufeff'  # BOM, so Excel opens Devanagari text as UTF-8
+        yield writer.writerow(export_header())
+        for row in export_rows(queryset, nepali_digits):
+            yield writer.writerow(row)
+
+    return StreamingHttpResponse(
+        lines(),
+        content_type='text/csv; charset=utf-8',
+        headers={'Content-Disposition': f'attachment; filename="{filename}.csv"'},
+    )
+
+
+# Write-only sink that zipfile cannot seek in, so it streams entries with
+# data descriptors; drain() hands over whatever has been written so far.
+class _ZipSink(io.RawIOBase):
+    def __init__(self):
+        self.chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+XLSX_PARTS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/workbook.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Issues" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+
+# Characters XML 1.0 does not allow at all, even escaped; a pasted control
+# character in a title would otherwise make Excel reject the whole file
+_XML_ILLEGAL = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ud800-\udfff\ufffe\uffff]')
+
+
+def _xlsx_row(values):
+    cells = []
+    for value in values:
+        if isinstance(value, str):
+            cells.append(f'<c t="inlineStr"><is><t>{escape(_XML_ILLEGAL.sub("", value))}</t></is></c>')
+        else:
+            cells.append(f'<c><v>{value}</v></c>')
+    return '<row>' + ''.join(cells) + '</row>'
+
+
+# A minimal SpreadsheetML package written on the fly: the sheet uses inline
+# strings, so it can be produced row by row without a shared string table.
+def xlsx_response(queryset, filename, nepali_digits=False):
+    def chunks():
+        sink = _ZipSink()
+        with zipfile.ZipFile(sink, 'w', zipfile.ZIP_DEFLATED) as archive:
+            for name, xml in XLSX_PARTS.items():
+                archive.writestr(name, xml)
+            yield sink.drain()
+
+            with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+                sheet.write(
+                    b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                    b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+                )
+                sheet.write(_xlsx_row(export_header()).encode())
+                for count, row in enumerate(export_rows(queryset, nepali_digits), start=1):
+                    sheet.write(_xlsx_row(row).encode())
+                    if count % 500 == 0:
+                        yield sink.drain()
+                sheet.write(b'</sheetData></worksheet>')
+        yield sink.drain()
+
+    return StreamingHttpResponse(
+        chunks(),
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        headers={'Content-Disposition': f'attachment; filename="{filename}.xlsx"'},
+    )
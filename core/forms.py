@@ -1,23 +1,47 @@
-import nepali_datetime
 from django import forms
 from decimal import Decimal
-from .models import Issue
-from .utils.nepali_numerals import eng_to_nep, nep_to_eng
-from .widgets import NepaliUnicodeTextInput
+from . import interest
+from .bank_index import get_bank_index
+from .models import Bank, Issue
+from .search import search_issues
+from .utils import bs_calendar
+from .utils.nepali_numerals import parse_decimal, to_ascii
+from .widgets import BankSuggestInput, NepaliUnicodeTextInput
 
 
 class NepaliUnicodeDecimalField(forms.CharField):
     def to_python(self, value):
-        if value:
-            try:
-                english = nep_to_eng(value.strip())
-                return Decimal(english)
-            except Exception:
-                raise forms.ValidationError("कृपया नेपाली अंकमा मात्र संख्या लेख्नुहोस्।")
-        return Decimal('0')
+        try:
+            return parse_decimal(value, default=Decimal('0'))
+        except ValueError:
+            raise forms.ValidationError("कृपया नेपाली अंकमा मात्र संख्या लेख्नुहोस्।")
+
+
+# Petitioner typed by name and resolved through the bank index, so neither
+# rendering nor validation loads the whole bank table
+class BankNameField(forms.CharField):
+    widget = BankSuggestInput
+
+    def prepare_value(self, value):
+        if isinstance(value, Bank):
+            return value.name
+        if isinstance(value, int) or (isinstance(value, str) and value.isdigit()):
+            return get_bank_index().names.get(int(value), value)
+        return value
+
+    def to_python(self, value):
+        value = super().to_python(value)
+        if not value:
+            return None
+        pk = get_bank_index().lookup(value)
+        bank = Bank.objects.filter(pk=pk).first() if pk is not None else None
+        if bank is None:
+            raise forms.ValidationError("यो नामको बैंक भेटिएन।")
+        return bank
 
 
 class IssueForm(forms.ModelForm):
+    petitioner = BankNameField(required=False, label='वादी')
     issue_date_bs = forms.CharField(
         required=True, label='मुद्दा दर्ता मिति (वि.सं)',
         widget=NepaliUnicodeTextInput()
@@ -33,6 +57,9 @@ class IssueForm(forms.ModelForm):
     interest_rate = NepaliUnicodeDecimalField(
         required=True, label='ब्याज दर (%)', widget=NepaliUnicodeTextInput()
     )
+    claimed_amount = NepaliUnicodeDecimalField(
+        required=True, label='दाबी गरिएको रकम', widget=NepaliUnicodeTextInput()
+    )
     prepaid_amount = NepaliUnicodeDecimalField(
         required=False, label='अगावै तिरेको रकम', widget=NepaliUnicodeTextInput()
     )
@@ -41,46 +68,80 @@ class IssueForm(forms.ModelForm):
         model = Issue
         exclude = [
             'issue_date', 'final_date', 'total_days', 'interest_amount',
-            'claimed_amount', 'total_amount', 'payable_amount',
-            'tax_revenue_amount', 'id'
+            'total_amount', 'payable_amount', 'tax_revenue_amount', 'id'
         ]
 
     def clean(self):
         cleaned_data = super().clean()
 
-        issue_date_bs = cleaned_data.get('issue_date_bs')
-        final_date_bs = cleaned_data.get('final_date_bs')
+        issue_date_bs = to_ascii(cleaned_data.get('issue_date_bs') or '').strip()
+        final_date_bs = to_ascii(cleaned_data.get('final_date_bs') or '').strip()
 
         try:
-            issue_date = nepali_datetime.date.from_string(issue_date_bs).to_datetime_date()
-            final_date = nepali_datetime.date.from_string(final_date_bs).to_datetime_date()
+            issue_date = bs_calendar.bs_to_ad(issue_date_bs)
+            final_date = bs_calendar.bs_to_ad(final_date_bs)
         except Exception as e:
             raise forms.ValidationError(f"मिति त्रुटि : {e}")
 
         if issue_date > final_date:
             raise forms.ValidationError("मुद्दा दर्ता मिति अन्तिम मितिभन्दा अघि हुनुपर्छ।")
 
+        cleaned_data['issue_date_bs'] = issue_date_bs
+        cleaned_data['final_date_bs'] = final_date_bs
         cleaned_data['issue_date'] = issue_date
         cleaned_data['final_date'] = final_date
 
-        # Calculations
-        principal = cleaned_data.get('principal_amount', Decimal('0'))
-        interest_rate = cleaned_data.get('interest_rate', Decimal('0'))
-        prepaid = cleaned_data.get('prepaid_amount', Decimal('0'))
-
-        total_days = (final_date - issue_date).days
-        interest_amount = (principal * interest_rate * total_days) / Decimal('36500')
-        claimed_amount = principal + interest_amount
-        tax_revenue = claimed_amount * Decimal('0.015')
-        total_amount = claimed_amount
-        payable_amount = total_amount - prepaid
-
-        # Assign calculated fields
-        cleaned_data['total_days'] = total_days
-        cleaned_data['interest_amount'] = interest_amount.quantize(Decimal('0.01'))
-        cleaned_data['claimed_amount'] = claimed_amount.quantize(Decimal('0.01'))
-        cleaned_data['tax_revenue_amount'] = tax_revenue.quantize(Decimal('0.01'))
-        cleaned_data['total_amount'] = total_amount.quantize(Decimal('0.01'))
-        cleaned_data['payable_amount'] = payable_amount.quantize(Decimal('0.01'))
+        # Same calculation Issue.save() runs, for validation and display
+        amounts = interest.calculate(
+            cleaned_data.get('principal_amount') or Decimal('0'),
+            cleaned_data.get('interest_rate') or Decimal('0'),
+            cleaned_data.get('claimed_amount') or Decimal('0'),
+            cleaned_data.get('prepaid_amount') or Decimal('0'),
+            cleaned_data.get('tax_rate') or interest.DEFAULT_TAX_RATE,
+            issue_date_bs, final_date_bs,
+        )
+        cleaned_data.update(amounts._asdict())
 
         return cleaned_data
+
+
+# Filters for the public issue list; q is a full-text search, dates are BS
+# and bound issue_date
+class IssueFilterForm(forms.Form):
+    q = forms.CharField(required=False, label='खोज', widget=NepaliUnicodeTextInput())
+    status = forms.ChoiceField(
+        required=False, label='स्थिति',
+        choices=[('', '---------')] + Issue.STATUS_CHOICES,
+    )
+    petitioner = BankNameField(required=False, label='वादी')
+    date_from = forms.CharField(required=False, label='देखि (वि.सं)', widget=NepaliUnicodeTextInput())
+    date_to = forms.CharField(required=False, label='सम्म (वि.सं)', widget=NepaliUnicodeTextInput())
+
+    def _clean_bs_date(self, field):
+        value = self.cleaned_data.get(field, '').strip()
+        if not value:
+            return None
+        try:
+            return bs_calendar.bs_to_ad(to_ascii(value))
+        except (ValueError, TypeError, OverflowError):
+            raise forms.ValidationError("मिति YYYY-MM-DD (वि.सं) ढाँचामा लेख्नुहोस्।")
+
+    def clean_date_from(self):
+        return self._clean_bs_date('date_from')
+
+    def clean_date_to(self):
+        return self._clean_bs_date('date_to')
+
+    def filter(self, queryset):
+        data = self.cleaned_data
+        if data.get('q'):
+            queryset = search_issues(queryset, data['q'])
+        if data.get('status'):
+            queryset = queryset.filter(status=data['status'])
+        if data.get('petitioner'):
+            queryset = queryset.filter(petitioner=data['petitioner'])
+        if data.get('date_from'):
+            queryset = queryset.filter(issue_date__gte=data['date_from'])
+        if data.get('date_to'):
+            queryset = queryset.filter(issue_date__lte=data['date_to'])
+        return queryset
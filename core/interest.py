@@ -0,0 +1,213 @@
+# Interest, DRT fee and payable calculation for issues.
+#
+# This is the one place the amounts are defined; Issue.calculate(), the
+# forms and the admin all go through it.
+#
+#   interest = principal * sum(rate_i * days_i) / 36500
+#   total    = claimed + interest
+#   fee      = total * tax_rate             (the DRT fee, tax_revenue_amount)
+#   payable  = fee - prepaid
+#
+# Rates are annual percentages. A RateSchedule splits the days between the
+# issue and final dates into partial periods at each rate change; interest is
+# summed exactly over the periods and rounded once. Every amount is rounded
+# to the paisa, half to even. The rate changes in force come from the
+# INTEREST_RATE_CHANGES setting.
+#
+# calculate() works on Decimals. calculate_batch() evaluates many issues at
+# once on integer paisa, with NumPy arrays when NumPy is installed and plain
+# lists otherwise, and gives bit-identical results: both are exact up to the
+# final rounding.
+
+from bisect import bisect_right
+from collections import namedtuple
+from decimal import Decimal, ROUND_HALF_EVEN, localcontext
+from functools import lru_cache
+
+from django.conf import settings
+
+from .utils import bs_calendar
+
+# NumPy is optional and imported by the first batch evaluation, so loading
+# the models does not pay for it
+_UNLOADED = object()
+np = _UNLOADED
+
+
+def _numpy():
+    global np
+    if np is _UNLOADED:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        np = numpy
+    return np
+
+
+DAYS_BASIS = 36500
+CENT = Decimal('0.01')
+
+TAX_RATE_CHOICES = [(Decimal('0.010'), '1%'), (Decimal('0.005'), '0.5%')]
+DEFAULT_TAX_RATE = Decimal('0.010')
+
+# Integer units for the batch path: amounts in paisa, rates in hundredths of
+# a percent, tax rates in thousandths
+RATE_SCALE = 100
+TAX_SCALE = 1000
+
+Amounts = namedtuple('Amounts', 'total_days interest_amount total_amount tax_revenue_amount payable_amount')
+
+
+# Annual rate changes, as (BS date, rate) pairs; each rate applies from its
+# date (inclusive) until the next change. Days before the first change use
+# the issue's own rate.
+class RateSchedule:
+    def __init__(self, changes=()):
+        changes = sorted((bs_calendar.bs_to_ordinal(date), Decimal(rate)) for date, rate in changes)
+        self.starts = [start for start, _ in changes]
+        self.rates = [rate for _, rate in changes]
+
+    # [(days, rate)] covering start..end (ordinals, end exclusive)
+    def periods(self, start, end, base_rate):
+        periods = []
+        index = bisect_right(self.starts, start)
+        rate = self.rates[index - 1] if index else base_rate
+        cursor = start
+        while index < len(self.starts) and self.starts[index] < end:
+            periods.append((self.starts[index] - cursor, rate))
+            cursor, rate = self.starts[index], self.rates[index]
+            index += 1
+        periods.append((end - cursor, rate))
+        return periods
+
+
+@lru_cache(maxsize=4)
+def _schedule(changes):
+    return RateSchedule(changes)
+
+
+# The schedule for settings.INTEREST_RATE_CHANGES, built once per value
+def current_schedule():
+    return _schedule(tuple(map(tuple, settings.INTEREST_RATE_CHANGES)))
+
+
+def _round(value):
+    return value.quantize(CENT, rounding=ROUND_HALF_EVEN)
+
+
+def calculate(principal, rate, claimed, prepaid, tax_rate, issue_date_bs, final_date_bs, schedule=None):
+    schedule = schedule or current_schedule()
+    start = bs_calendar.bs_to_ordinal(issue_date_bs)
+    end = bs_calendar.bs_to_ordinal(final_date_bs)
+    periods = schedule.periods(start, end, rate) if end > start else [(end - start, rate)]
+
+    # Enough precision that only the final quantize rounds
+    with localcontext(prec=60):
+        rate_days = sum((rate * days for days, rate in periods), Decimal(0))
+        interest = _round(principal * rate_days / DAYS_BASIS)
+        total = _round(claimed + interest)
+        fee = _round(total * tax_rate)
+        payable = _round(fee - (prepaid or 0))
+    return Amounts(end - start, interest, total, fee, payable)
+
+
+# Batch path ---------------------------------------------------------------
+
+def to_paisa(amount):
+    paisa = Decimal(amount or 0).scaleb(2)
+    whole = int(paisa)
+    if whole != paisa:
+        raise ValueError('amount has fractional paisa', amount)
+    return whole
+
+
+def from_paisa(paisa):
+    return Decimal(int(paisa)).scaleb(-2)
+
+
+def to_units(rate, scale):
+    units = Decimal(rate) * scale
+    whole = int(units)
+    if whole != units:
+        raise ValueError('rate is finer than 1/%d' % scale, rate)
+    return whole
+
+
+# Sum of rate * days over an issue's periods, in batch rate units
+def rate_days(issue_date_bs, final_date_bs, rate, schedule=None):
+    start = bs_calendar.bs_to_ordinal(issue_date_bs)
+    end = bs_calendar.bs_to_ordinal(final_date_bs)
+    return _rate_days(start, end, rate, schedule or current_schedule())
+
+
+def _rate_days(start, end, rate, schedule):
+    if end <= start or not schedule.starts:
+        return to_units(rate, RATE_SCALE) * (end - start)
+    return sum(to_units(rate, RATE_SCALE) * days for days, rate in schedule.periods(start, end, rate))
+
+
+# round_half_even(x * k / d) for integers or integer arrays, without forming
+# x * k, so int64 arrays only overflow once the result itself would
+def _mul_div(x, k, d):
+    negative = (x < 0) ^ (k < 0)
+    x, k = abs(x), abs(k)
+    high, low = divmod(x, d)
+    carry, remainder = divmod(low * k, d)
+    q = high * k + carry
+    q = q + ((2 * remainder > d) | ((2 * remainder == d) & (q % 2 == 1)))
+    return q * (1 - 2 * negative)
+
+
+# Evaluate many issues at once. Arguments are equal-length sequences:
+# principal, claimed and prepaid in paisa, rate_days from rate_days(), tax
+# rates in thousandths. Returns Amounts of arrays (lists without NumPy) in
+# paisa, with total_days left as None.
+def calculate_batch(principal, rate_days, claimed, prepaid, tax_rate):
+    np = _numpy()
+    if np is not None:
+        principal, rate_days, claimed, prepaid, tax_rate = (
+            np.asarray(column, dtype=np.int64) for column in (principal, rate_days, claimed, prepaid, tax_rate)
+        )
+        return Amounts(None, *_evaluate(principal, rate_days, claimed, prepaid, tax_rate))
+
+    rows = [_evaluate(*row) for row in zip(principal, rate_days, claimed, prepaid, tax_rate)]
+    columns = [list(column) for column in zip(*rows)] if rows else [[], [], [], []]
+    return Amounts(None, *columns)
+
+
+def _evaluate(principal, rate_days, claimed, prepaid, tax_rate):
+    interest = _mul_div(principal, rate_days, DAYS_BASIS * RATE_SCALE)
+    total = claimed + interest
+    fee = _mul_div(total, tax_rate, TAX_SCALE)
+    return interest, total, fee, fee - prepaid
+
+
+# calculate() for many issues through the batch path. rows are tuples of
+# calculate()'s arguments; each result is an Amounts of Decimals, or the
+# exception that row raised.
+def calculate_many(rows, schedule=None):
+    schedule = schedule or current_schedule()
+    results = []
+    columns = ([], [], [], [], [])
+    for principal, rate, claimed, prepaid, tax_rate, issue_date_bs, final_date_bs in rows:
+        try:
+            start = bs_calendar.bs_to_ordinal(issue_date_bs)
+            end = bs_calendar.bs_to_ordinal(final_date_bs)
+            packed = (
+                to_paisa(principal), _rate_days(start, end, rate, schedule),
+                to_paisa(claimed), to_paisa(prepaid), to_units(tax_rate, TAX_SCALE),
+            )
+        except (ValueError, OverflowError, TypeError, ArithmeticError) as e:
+            results.append(e)
+            continue
+        for column, value in zip(columns, packed):
+            column.append(value)
+        results.append(end - start)
+
+    batch = calculate_batch(*columns)
+    amounts = zip(*(batch[1:]))
+    for index, result in enumerate(results):
+        if not isinstance(result, Exception):
+            results[index] = Amounts(result, *(from_paisa(value) for value in next(amounts)))
+    return results
@@ -0,0 +1,254 @@
+import csv
+import io
+import logging
+import os
+import shutil
+import socket
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import OperationalError, close_old_connections, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Issue, Job
+from .pdf import render_issues_batch
+from .recalculate import recalculate_issues
+
+
+logger = logging.getLogger(__name__)
+
+# Progress rows are written at most this often, so a fast loop does not
+# turn into a stream of UPDATEs on SQLite
+PROGRESS_INTERVAL = 1.0
+
+
+# Queue a job; run_worker picks it up once the surrounding transaction commits
+def enqueue(kind, params, user=None):
+    return Job.objects.create(
+        kind=kind,
+        params=params,
+        created_by=user if user is not None and user.is_authenticated else None,
+        max_attempts=settings.JOB_MAX_ATTEMPTS,
+        run_after=timezone.now(),
+    )
+
+
+def job_dir(job_pk):
+    return os.path.join(settings.JOB_RESULT_DIR, str(job_pk))
+
+
+def result_path(job):
+    return os.path.join(job_dir(job.pk), job.result_name) if job.result_name else None
+
+
+def remove_job_files(job_pk):
+    shutil.rmtree(job_dir(job_pk), ignore_errors=True)
+
+
+# Put a failed job back on the queue with a fresh set of attempts
+def retry(queryset):
+    return queryset.filter(status='failed').update(
+        status='queued', attempts=0, run_after=timezone.now(), worker='', message='',
+        progress_done=0, finished_at=None,
+    )
+
+
+# Take the oldest due job. The conditional UPDATE is the lock: of several
+# workers racing for the same row exactly one sees a row count of 1, which
+# works the same on SQLite (no SELECT ... FOR UPDATE) and PostgreSQL.
+def claim_job(worker):
+    now = timezone.now()
+    requeue_stale(now)
+    due = Job.objects.filter(status='queued', run_after__lte=now).order_by('run_after', 'pk')
+    for pk in due.values_list('pk', flat=True)[:10]:
+        claimed = Job.objects.filter(pk=pk, status='queued').update(
+            status='running', worker=worker, attempts=F('attempts') + 1,
+            started_at=now, heartbeat_at=now, progress_done=0,
+        )
+        if claimed:
+            return Job.objects.get(pk=pk)
+    return None
+
+
+# A running job whose worker stopped sending heartbeats (killed, machine
+# rebooted) counts as a failed attempt
+def requeue_stale(now):
+    stale = Job.objects.filter(status='running', heartbeat_at__lt=now - timedelta(seconds=settings.JOB_LEASE_SECONDS))
+    stale.filter(attempts__lt=F('max_attempts')).update(
+        status='queued', worker='', run_after=now, message="worker stopped responding",
+    )
+    stale.update(status='failed', finished_at=now, message="worker stopped responding")
+
+
+# The job's row while this worker still holds its lease. A worker that lost
+# it (requeued as stale, then claimed elsewhere) must not write over the new
+# run, so every update after the claim goes through here.
+def _leased(job):
+    return Job.objects.filter(pk=job.pk, worker=job.worker, status='running')
+
+
+# Run one claimed job and record the outcome. Failures are retried with
+# exponential backoff (JOB_RETRY_BACKOFF, doubled per attempt) until
+# max_attempts is used up.
+def run_job(job):
+    os.makedirs(job_dir(job.pk), exist_ok=True)
+    heartbeat = _Heartbeat(job)
+    heartbeat.start()
+    try:
+        message, result_name = HANDLERS[job.kind](job, _Progress(job))
+    except Exception as e:
+        logger.exception("Job %s failed (attempt %d/%d)", job.pk, job.attempts, job.max_attempts)
+        _fail(job, f"{type(e).__name__}: {e}")
+    else:
+        now = timezone.now()
+        _leased(job).update(
+            status='done', message=message, result_name=result_name or '',
+            finished_at=now, heartbeat_at=now,
+        )
+    finally:
+        heartbeat.stop()
+
+
+def _fail(job, message):
+    now = timezone.now()
+    if job.attempts < job.max_attempts:
+        delay = settings.JOB_RETRY_BACKOFF * 2 ** (job.attempts - 1)
+        _leased(job).update(
+            status='queued', worker='', message=message, run_after=now + timedelta(seconds=delay),
+        )
+    else:
+        _leased(job).update(status='failed', message=message, finished_at=now)
+
+
+# Poll for jobs until stop is set; with once, return as soon as the queue is empty
+def work(worker, stop, poll=1.0, once=False):
+    while not stop.is_set():
+        close_old_connections()
+        try:
+            job = claim_job(worker)
+        except OperationalError as e:
+            # SQLite answers "database is locked" while another worker writes
+            logger.warning("Could not claim a job: %s", e)
+            job = None
+        if job is not None:
+            run_job(job)
+        elif once:
+            return
+        else:
+            stop.wait(poll)
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+# progress(done, total=None) for the handlers, throttled to PROGRESS_INTERVAL
+class _Progress:
+    def __init__(self, job):
+        self.job = job
+        self.total = None
+        self.last = 0.0
+
+    def __call__(self, done, total=None):
+        if total is not None and total != self.total:
+            self.total = total
+        elif time.monotonic() - self.last < PROGRESS_INTERVAL and done != self.total:
+            return
+        self.last = time.monotonic()
+        fields = {'progress_done': done, 'heartbeat_at': timezone.now()}
+        if self.total is not None:
+            fields['progress_total'] = self.total
+        _leased(self.job).update(**fields)
+
+
+# Keeps the lease alive while a handler is busy in a step that reports no progress
+class _Heartbeat(threading.Thread):
+    def __init__(self, job):
+        super().__init__(daemon=True)
+        self.job = job
+        self.stopped = threading.Event()
+
+    def run(self):
+        try:
+            while not self.stopped.wait(settings.JOB_LEASE_SECONDS / 3):
+                try:
+                    _leased(self.job).update(heartbeat_at=timezone.now())
+                except OperationalError:
+                    pass
+        finally:
+            connection.close()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+# Handlers take (job, progress) and return (message, result file name or None);
+# result files are written to job_dir(job.pk).
+def print_issues(job, progress):
+    fmt = job.params['fmt']
+    issues = list(
+        Issue.objects.filter(pk__in=job.params['ids']).select_related('petitioner').order_by('-created_at')
+    )
+    progress(0, len(issues))
+    output = render_issues_batch(issues, fmt, base_url=job.params['base_url'], progress=progress)
+    name = f"mudda_batch.{fmt}"
+    with output, open(os.path.join(job_dir(job.pk), name), 'wb') as fh:
+        shutil.copyfileobj(output, fh)
+    return f"{len(issues)} मुद्दा प्रिन्ट भयो", name
+
+
+def recalculate(job, progress):
+    ids = job.params['ids']
+    payable_delta = []
+    errors = []
+    progress(0, len(ids))
+    totals = recalculate_issues(
+        Issue.objects.filter(pk__in=ids),
+        final_date_bs=job.params.get('final_date_bs'),
+        on_change=lambda pk, diff: payable_delta.append(diff['payable_amount'][1] - (diff['payable_amount'][0] or 0)),
+        on_error=lambda pk, message: errors.append(f"{pk}: {message}"),
+        progress=progress,
+    )
+    message = (
+        f"{totals['checked']} मुद्दा जाँचियो, {totals['changed']} परिवर्तन भयो "
+        f"(भुक्तानी रकम {sum(payable_delta, Decimal('0.00')):+})।"
+    )
+    return '\n'.join([message] + errors), None
+
+
+# The source file was copied into the job directory when it was queued
+def import_issues(job, progress):
+    rejects = os.path.join(job_dir(job.pk), 'rejects.csv')
+    out = io.StringIO()
+    call_command(
+        'import_issues', job.params['path'],
+        format=job.params.get('format'), encoding=job.params.get('encoding', 'utf-8-sig'),
+        rejects=rejects, stdout=out, stderr=out,
+    )
+    with open(rejects, newline='', encoding='utf-8-sig') as fh:
+        rejected = sum(1 for _ in csv.reader(fh)) - 1
+    return out.getvalue().strip(), 'rejects.csv' if rejected > 0 else None
+
+
+def enqueue_import(path, fmt=None, encoding='utf-8-sig', user=None):
+    with transaction.atomic():
+        job = enqueue('import', {}, user)
+        os.makedirs(job_dir(job.pk), exist_ok=True)
+        target = os.path.join(job_dir(job.pk), 'source' + os.path.splitext(path)[1].lower())
+        shutil.copyfile(path, target)
+        job.params = {'path': target, 'format': fmt, 'encoding': encoding}
+        job.save(update_fields=['params'])
+    return job
+
+
+HANDLERS = {
+    'print': print_issues,
+    'recalculate': recalculate,
+    'import': import_issues,
+}
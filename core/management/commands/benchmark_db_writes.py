@@ -0,0 +1,131 @@
+import os
+import statistics
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections, transaction
+
+from firm import db_profiles
+
+
+BENCH_TABLE = 'core_bench_write'
+COUNTER_TABLE = 'core_bench_counter'
+
+
+def _connection(alias, config):
+    if alias not in connections.settings:
+        configured = connections.configure_settings({'default': settings.DATABASES['default'], alias: config})
+        connections.settings[alias] = configured[alias]
+    return connections[alias]
+
+
+# One clerk: short write transactions shaped like an issue save (insert a row,
+# bump a shared counter the way the summary buckets are bumped, read it back).
+# Runs in a worker process; returns (latencies, lock errors).
+def _write_worker(alias, config, transactions, start_at):
+    connection = _connection(alias, config)
+    connection.ensure_connection()
+    time.sleep(max(0, start_at - time.time()))
+
+    latencies = []
+    errors = 0
+    pid = os.getpid()
+    for n in range(transactions):
+        started = time.perf_counter()
+        try:
+            with transaction.atomic(using=alias), connection.cursor() as cursor:
+                cursor.execute(f"INSERT INTO {BENCH_TABLE} (worker, n, payload) VALUES (%s, %s, %s)", [pid, n, 'x' * 200])
+                cursor.execute(f"UPDATE {COUNTER_TABLE} SET total = total + 1 WHERE id = 1")
+                cursor.execute(f"SELECT total FROM {COUNTER_TABLE} WHERE id = 1")
+                cursor.fetchone()
+        except OperationalError:
+            errors += 1
+            continue
+        latencies.append(time.perf_counter() - started)
+    connection.close()
+    return latencies, errors
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare write throughput of the database profiles in firm/db_profiles.py under "
+        "concurrent writers. SQLite profiles run on fresh temporary files; postgres uses "
+        "the FIRM_DB_* settings and only touches its own scratch tables."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'profiles', nargs='*', default=['sqlite-stock', 'sqlite'],
+            help=f"Profiles to compare, of {', '.join(db_profiles.PROFILES)} (default: sqlite-stock sqlite).",
+        )
+        parser.add_argument('--workers', type=int, default=8, help="Concurrent writer processes.")
+        parser.add_argument('--transactions', type=int, default=200, help="Transactions per writer.")
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory(prefix='db-bench-') as workdir:
+            for profile in options['profiles']:
+                try:
+                    config = db_profiles.database(profile, os.path.join(workdir, f"{profile}.sqlite3"))
+                except ValueError as e:
+                    raise CommandError(e)
+                self.report(profile, *self.run(f"bench_{profile}", config, options))
+
+    def run(self, alias, config, options):
+        try:
+            connection = _connection(alias, config)
+            self.create_tables(connection)
+        except Exception as e:
+            raise CommandError(f"Cannot use {alias}: {e}")
+        connection.close()
+
+        workers = options['workers']
+        start_at = time.time() + 1
+        try:
+            with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as pool:
+                futures = [
+                    pool.submit(_write_worker, alias, config, options['transactions'], start_at)
+                    for _ in range(workers)
+                ]
+                results = [future.result() for future in futures]
+            elapsed = time.time() - start_at
+        finally:
+            self.drop_tables(connection)
+            connection.close()
+
+        latencies = sorted(latency for worker_latencies, _ in results for latency in worker_latencies)
+        errors = sum(worker_errors for _, worker_errors in results)
+        return latencies, errors, elapsed
+
+    def create_tables(self, connection):
+        serial = 'SERIAL' if connection.vendor == 'postgresql' else 'INTEGER'
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {BENCH_TABLE}")
+            cursor.execute(f"DROP TABLE IF EXISTS {COUNTER_TABLE}")
+            cursor.execute(
+                f"CREATE TABLE {BENCH_TABLE} (id {serial} PRIMARY KEY, worker INTEGER, n INTEGER, payload TEXT)"
+            )
+            cursor.execute(f"CREATE TABLE {COUNTER_TABLE} (id INTEGER PRIMARY KEY, total INTEGER)")
+            cursor.execute(f"INSERT INTO {COUNTER_TABLE} (id, total) VALUES (1, 0)")
+
+    def drop_tables(self, connection):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {BENCH_TABLE}")
+            cursor.execute(f"DROP TABLE IF EXISTS {COUNTER_TABLE}")
+
+    def report(self, profile, latencies, errors, elapsed):
+        self.stdout.write(self.style.MIGRATE_HEADING(profile))
+        if len(latencies) < 2:
+            self.stdout.write(f"  {len(latencies)} committed, {errors} failed with 'database is locked'")
+            return
+        cuts = statistics.quantiles(latencies, n=100)
+        self.stdout.write(
+            f"  {len(latencies)} committed in {elapsed:.2f} s = {len(latencies) / elapsed:8.1f} tx/s, "
+            f"{errors} failed with 'database is locked'"
+        )
+        self.stdout.write(
+            f"  latency p50 {cuts[49] * 1000:7.2f} ms   p95 {cuts[94] * 1000:7.2f} ms   p99 {cuts[98] * 1000:7.2f} ms"
+        )
@@ -0,0 +1,254 @@
+import itertools
+import json
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+from decimal import Decimal
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import RequestFactory, override_settings
+
+from core import interest
+from core.admin import IssueAdminForm
+from core.forms import IssueForm
+from core.models import Bank, Issue
+from core.pdf import invalidate_issue_pdfs
+from core.utils.nepali_numerals import to_nepali
+
+
+DEFAULT_BASELINE = os.path.join(settings.BASE_DIR, 'benchmark_baseline.json')
+
+ISSUE_FIELDS = {
+    'title': 'ऋण असुली मुद्दा',
+    'defendant': 'राम बहादुर थापा',
+    'principal_amount': Decimal('1234567.89'),
+    'claimed_amount': Decimal('1300000.00'),
+    'interest_rate': Decimal('12.50'),
+    'prepaid_amount': Decimal('5000.00'),
+    'issue_date_bs': '2075-04-12',
+    'final_date_bs': '2081-09-28',
+}
+FORM_DATA = {
+    'title': 'ऋण असुली मुद्दा',
+    'defendant': 'राम बहादुर थापा',
+    'principal_amount': '१२,३४,५६७.८९',
+    'claimed_amount': '१३,००,०००',
+    'interest_rate': '१२.५',
+    'prepaid_amount': '५,०००',
+    'issue_date_bs': '२०७५-०४-१२',
+    'final_date_bs': '2081-09-28',
+    'tax_rate': '0.010',
+    'status': 'open',
+}
+
+
+class Rollback(Exception):
+    pass
+
+
+# Each case takes the fixtures and returns the operation to time; fixtures
+# live in a transaction that is rolled back at the end
+def issue_calculate(fixtures):
+    issue = Issue(**ISSUE_FIELDS)
+    return issue.calculate
+
+
+def issue_save(fixtures):
+    ids = itertools.count()
+    return lambda: Issue(id=f"BENCH{next(ids):09d}", petitioner=fixtures['bank'], **ISSUE_FIELDS).save()
+
+
+def issue_form_clean(fixtures):
+    data = {**FORM_DATA, 'petitioner': fixtures['bank'].name}
+
+    def clean():
+        form = IssueForm(data=data)
+        if not form.is_valid():
+            raise ValueError(form.errors)
+    return clean
+
+
+def admin_convert_decimal(fixtures):
+    form = IssueAdminForm()
+    form.cleaned_data = {'principal_amount': FORM_DATA['principal_amount']}
+    return lambda: form._convert_nepali_to_decimal('principal_amount')
+
+
+# to_nepali replaced convert_to_nepali_number
+def to_nepali_number(fixtures):
+    values = [f"MU{n:06d}" for n in range(100)] + [Decimal(n * 7919) / 100 for n in range(100)]
+    return lambda: [to_nepali(value) for value in values]
+
+
+def calculate_many(fixtures):
+    rows = [
+        (ISSUE_FIELDS['principal_amount'] + n, ISSUE_FIELDS['interest_rate'], ISSUE_FIELDS['claimed_amount'],
+         ISSUE_FIELDS['prepaid_amount'], interest.DEFAULT_TAX_RATE, ISSUE_FIELDS['issue_date_bs'],
+         ISSUE_FIELDS['final_date_bs'])
+        for n in range(1000)
+    ]
+    return lambda: interest.calculate_many(rows)
+
+
+# Cold render through the admin view: the cached PDF is dropped before each call
+def print_template_pdf(fixtures):
+    issue = fixtures['issue']
+    # RequestFactory's default host, testserver, is not in ALLOWED_HOSTS
+    request = RequestFactory().get(f'/core/issue/{issue.pk}/print_pdf/', SERVER_NAME='localhost')
+    request.user = fixtures['user']
+    view = async_to_sync(admin.site._registry[Issue].print_template_pdf)
+
+    def render():
+        invalidate_issue_pdfs(issue.pk)
+        response = view(request, issue.pk)
+        if response.status_code != 200:
+            raise ValueError(f"status {response.status_code}")
+        # Not response.close(): its request_finished signal would close the
+        # connection holding the fixture transaction
+        response.file_to_stream.close()
+    return render
+
+
+CASES = {
+    'issue_calculate': issue_calculate,
+    'issue_save': issue_save,
+    'issue_form_clean': issue_form_clean,
+    'admin_convert_decimal': admin_convert_decimal,
+    'to_nepali': to_nepali_number,
+    'calculate_many_1000': calculate_many,
+    'print_template_pdf': print_template_pdf,
+}
+
+
+# Best of repeat runs, each at least min_time long; returns ops/sec
+def time_op(op, min_time, repeat):
+    started = time.perf_counter()
+    op()
+    single = time.perf_counter() - started
+    number = max(1, int(min_time / max(single, 1e-7)))
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            op()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return number / best
+
+
+# Peak memory one call allocates on top of what is already live
+def peak_kib(op):
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        op()
+        return (tracemalloc.get_traced_memory()[1] - before) / 1024
+    finally:
+        tracemalloc.stop()
+
+
+# Cases that got slower or hungrier than baseline by more than threshold (a
+# fraction); small absolute memory changes are ignored as noise
+def regressions(baseline, results, threshold):
+    found = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        if result['ops_per_sec'] < base['ops_per_sec'] * (1 - threshold):
+            found.append(f"{name}: {result['ops_per_sec']:.1f} ops/s, baseline {base['ops_per_sec']:.1f}")
+        if result['peak_kib'] > base['peak_kib'] * (1 + threshold) + 1:
+            found.append(f"{name}: {result['peak_kib']:.1f} KiB peak, baseline {base['peak_kib']:.1f}")
+    return found
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the calculation, numeral conversion, form and PDF hot paths on fixed inputs, "
+        "report ops/sec and peak memory per call, and compare with a JSON baseline. "
+        "Exits with an error when a case regresses by more than --threshold."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('cases', nargs='*', help=f"Cases to run (default: all of {', '.join(CASES)}).")
+        parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="Baseline JSON file.")
+        parser.add_argument('--save', action='store_true', help="Write the results as the new baseline.")
+        parser.add_argument('--threshold', type=float, default=0.25, help="Allowed regression (default 0.25 = 25%%).")
+        parser.add_argument('--min-time', type=float, default=0.2, help="Seconds per timing run.")
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        names = options['cases'] or list(CASES)
+        unknown = set(names) - set(CASES)
+        if unknown:
+            raise CommandError(f"Unknown cases: {', '.join(sorted(unknown))}")
+
+        baseline = {}
+        if os.path.exists(options['baseline']):
+            with open(options['baseline']) as fh:
+                baseline = json.load(fh)['results']
+
+        results = {}
+        with tempfile.TemporaryDirectory(prefix='bench-pdf-') as pdf_dir, override_settings(PDF_CACHE_DIR=pdf_dir):
+            try:
+                with transaction.atomic():
+                    fixtures = self.fixtures()
+                    for name in names:
+                        result = self.run_case(name, fixtures, options)
+                        if result:
+                            results[name] = result
+                            self.report(name, result, baseline.get(name))
+                    raise Rollback
+            except Rollback:
+                pass
+
+        if options['save']:
+            with open(options['baseline'], 'w') as fh:
+                json.dump({
+                    'python': platform.python_version(),
+                    'machine': platform.platform(),
+                    'results': {**baseline, **results},
+                }, fh, indent=2, sort_keys=True)
+            self.stdout.write(f"Saved baseline to {options['baseline']}")
+            return
+
+        found = regressions(baseline, results, options['threshold'])
+        if found:
+            raise CommandError("Regressions beyond {:.0%}:\n  {}".format(options['threshold'], '\n  '.join(found)))
+
+    def fixtures(self):
+        bank = Bank.objects.create(name='बेन्चमार्क बैंक')
+        issue = Issue(id='BENCHPDF', petitioner=bank, **ISSUE_FIELDS)
+        issue.save()
+        user = get_user_model().objects.create_superuser('bench-admin', 'bench@example.com', None)
+        return {'bank': bank, 'issue': issue, 'user': user}
+
+    def run_case(self, name, fixtures, options):
+        try:
+            op = CASES[name](fixtures)
+            op()
+        except (ImportError, OSError) as e:
+            # e.g. WeasyPrint without its system libraries
+            self.stdout.write(f"{name:24} skipped: {e}")
+            return None
+        return {
+            'ops_per_sec': time_op(op, options['min_time'], options['repeat']),
+            'peak_kib': peak_kib(op),
+        }
+
+    def report(self, name, result, base):
+        line = (
+            f"{name:24} {result['ops_per_sec']:12.1f} ops/s {1e6 / result['ops_per_sec']:12.1f} us/op "
+            f"{result['peak_kib']:10.1f} KiB peak"
+        )
+        if base:
+            line += f"   {result['ops_per_sec'] / base['ops_per_sec'] - 1:+7.1%} vs baseline"
+        self.stdout.write(line)
@@ -0,0 +1,97 @@
+import datetime
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from core.models import Bank, Issue
+
+
+class Rollback(Exception):
+    pass
+
+
+# The queries the changelist, the public list and reporting actually run
+def access_patterns():
+    newest = Issue.objects.order_by('-created_at').values_list('created_at', flat=True).first()
+    middle = newest - datetime.timedelta(days=180) if newest else timezone.now()
+    bank = Bank.objects.order_by('pk').first()
+    return [
+        ("changelist page", Issue.objects.select_related('petitioner').order_by('-created_at', '-pk')[:100]),
+        ("changelist, status filter", Issue.objects.filter(status='closed').order_by('-created_at', '-pk')[:100]),
+        ("list keyset page", Issue.objects.only('id', 'title', 'created_at')
+            .filter(created_at__lte=middle).order_by('-created_at', '-id')[:51]),
+        ("bank + status totals", Issue.objects.filter(petitioner=bank, status='open')
+            .values('petitioner').annotate(total=Sum('payable_amount'))),
+        ("final date range", Issue.objects.filter(
+            final_date__range=(datetime.date(2024, 1, 1), datetime.date(2024, 3, 31))).values('pk')),
+        ("issue date range", Issue.objects.filter(
+            issue_date__gte=datetime.date(2023, 7, 1)).order_by('-created_at', '-id')[:51]),
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        "Show query plans and timings for the Issue access patterns with and without "
+        "the indexes from migration 0014. Everything runs in one transaction that is "
+        "rolled back, including optional seed rows from seed_issues."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0, help="Insert this many synthetic issues first.")
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                if options['seed']:
+                    call_command(
+                        'seed_issues', count=options['seed'], prefix='BENCH', banks=200, seed=0,
+                        stdout=self.stdout,
+                    )
+                with connection.cursor() as cursor:
+                    if connection.vendor == 'sqlite':
+                        cursor.execute('ANALYZE')
+
+                after = self.measure(options['repeat'])
+                self.drop_indexes()
+                before = self.measure(options['repeat'])
+                self.report(before, after)
+                raise Rollback
+        except Rollback:
+            pass
+
+    # Back to the 0013 schema: no composite indexes, a plain FK index on
+    # petitioner. Plain SQL, since SQLite refuses a schema editor inside atomic().
+    def drop_indexes(self):
+        qn = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            for index in Issue._meta.indexes:
+                cursor.execute(f"DROP INDEX {qn(index.name)}")
+            cursor.execute(
+                f"CREATE INDEX {qn('issue_bench_petitioner_idx')} "
+                f"ON {qn(Issue._meta.db_table)} ({qn('petitioner_id')})"
+            )
+
+    def measure(self, repeat):
+        results = {}
+        for label, queryset in access_patterns():
+            plan = queryset.explain()
+            start = time.perf_counter()
+            for _ in range(repeat):
+                list(queryset._chain())
+            results[label] = (plan, (time.perf_counter() - start) / repeat * 1000)
+        return results
+
+    def report(self, before, after):
+        for label in after:
+            plan_before, ms_before = before[label]
+            plan_after, ms_after = after[label]
+            self.stdout.write(self.style.MIGRATE_HEADING(label))
+            self.stdout.write(f"  without indexes: {ms_before:9.2f} ms")
+            self.stdout.write('    ' + plan_before.replace('\n', '\n    '))
+            self.stdout.write(f"  with indexes:    {ms_after:9.2f} ms")
+            self.stdout.write('    ' + plan_after.replace('\n', '\n    '))
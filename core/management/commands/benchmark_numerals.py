@@ -0,0 +1,72 @@
+import timeit
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+
+from core.utils.nepali_numerals import parse_decimal, to_ascii, to_nepali
+
+
+# The per-character conversions the codec replaced, kept here as the baseline
+def legacy_convert_to_nepali_number(num):
+    nepali_digits = "०१२३४५६७८९"
+    try:
+        return ''.join(nepali_digits[int(d)] if d.isdigit() else d for d in str(num))
+    except Exception:
+        return str(num)
+
+
+def legacy_eng_to_nep(num_str):
+    table = {'0': '०', '1': '१', '2': '२', '3': '३', '4': '४', '5': '५', '6': '६', '7': '७', '8': '८', '9': '९'}
+    return ''.join(table.get(ch, ch) for ch in str(num_str))
+
+
+def legacy_nep_to_eng(num_str):
+    table = {'०': '0', '१': '1', '२': '2', '३': '3', '४': '4', '५': '5', '६': '6', '७': '7', '८': '8', '९': '9'}
+    return ''.join(table.get(ch, ch) for ch in num_str)
+
+
+def legacy_convert_nepali_to_decimal(val):
+    nepali_digits = "०१२३४५६७८९"
+    english_digits = "0123456789"
+    converted = []
+    for ch in val:
+        if ch in nepali_digits:
+            converted.append(str(nepali_digits.index(ch)))
+        elif ch in english_digits or ch == '.':
+            converted.append(ch)
+    cleaned_val = ''.join(converted)
+    return Decimal(cleaned_val) if cleaned_val else Decimal('0.00')
+
+
+class Command(BaseCommand):
+    help = "Time the Nepali numeral codec against the per-character conversions it replaced."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000, help="Values converted per run.")
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        ids = [f"MU{n:06d}" for n in range(rows)]
+        amounts = [Decimal(n * 7919) / 100 for n in range(rows)]
+        nepali_amounts = [to_nepali(f"{amount:,}") for amount in amounts]
+
+        cases = [
+            ("digits to Nepali (ids)", lambda: [legacy_convert_to_nepali_number(v) for v in ids],
+             lambda: [to_nepali(v) for v in ids]),
+            ("digits to Nepali (amounts)", lambda: [legacy_eng_to_nep(v) for v in amounts],
+             lambda: [to_nepali(v) for v in amounts]),
+            ("digits to ASCII", lambda: [legacy_nep_to_eng(v) for v in nepali_amounts],
+             lambda: [to_ascii(v) for v in nepali_amounts]),
+            ("Decimal parsing", lambda: [legacy_convert_nepali_to_decimal(v) for v in nepali_amounts],
+             lambda: [parse_decimal(v) for v in nepali_amounts]),
+        ]
+        for label, legacy, codec in cases:
+            if legacy() != codec():
+                self.stderr.write(f"{label}: results differ")
+            before = min(timeit.repeat(legacy, number=1, repeat=options['repeat']))
+            after = min(timeit.repeat(codec, number=1, repeat=options['repeat']))
+            self.stdout.write(
+                f"{label:28} legacy {before * 1000:8.2f} ms   codec {after * 1000:8.2f} ms   "
+                f"{before / after:5.1f}x"
+            )
@@ -0,0 +1,223 @@
+import csv
+import os
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.jobs import enqueue_import
+from core.models import Bank, Issue
+from core.page_cache import bump_list_version
+from core.search import index_issues
+from core.summary import apply_issue_deltas, summary_values
+from core.utils.nepali_numerals import parse_decimal, to_ascii
+
+
+DECIMAL_FIELDS = ['principal_amount', 'interest_rate', 'prepaid_amount', 'claimed_amount']
+TEXT_FIELDS = ['title', 'defendant']
+DATE_FIELDS = ['issue_date_bs', 'final_date_bs']
+COLUMNS = ['id', 'petitioner', 'tax_rate', 'status'] + TEXT_FIELDS + DECIMAL_FIELDS + DATE_FIELDS
+
+
+class RowError(Exception):
+    pass
+
+
+# Header aliases: field names and their Nepali verbose names both work
+def _header_map():
+    aliases = {}
+    for name in COLUMNS:
+        field = Issue._meta.get_field(name)
+        aliases[name] = name
+        aliases[str(field.verbose_name).strip()] = name
+    return aliases
+
+
+def _read_csv(path, encoding):
+    with open(path, newline='', encoding=encoding) as fh:
+        reader = csv.reader(fh)
+        header = next(reader, [])
+        yield header
+        yield from reader
+
+
+def _read_xlsx(path):
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        for row in workbook.active.iter_rows(values_only=True):
+            yield [_cell_text(value) for value in row]
+    finally:
+        workbook.close()
+
+
+def _cell_text(value):
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _decimal(raw, field):
+    try:
+        value = parse_decimal(raw)
+    except ValueError:
+        raise RowError(f"{field}: अमान्य संख्या '{raw}'")
+    if value is None:
+        if field == 'prepaid_amount':
+            return Decimal('0.00')
+        raise RowError(f"{field}: खाली")
+    return value
+
+
+def _tax_rate(raw):
+    text = to_ascii(raw).strip()
+    if not text:
+        return Issue._meta.get_field('tax_rate').default
+    try:
+        rate = Decimal(text.rstrip('%')) / 100 if text.endswith('%') else Decimal(text)
+    except InvalidOperation:
+        raise RowError(f"tax_rate: अमान्य '{raw}'")
+    for choice, _ in Issue.TAX_RATE_CHOICES:
+        if rate == choice:
+            return choice
+    raise RowError(f"tax_rate: {raw} मान्य छैन")
+
+
+class Command(BaseCommand):
+    help = "Stream issues from a CSV or XLSX case book into the database with batched inserts."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=['csv', 'xlsx'], help="Defaults to the file extension.")
+        parser.add_argument('--encoding', default='utf-8-sig', help="CSV encoding (default: utf-8-sig).")
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help="Validate every row without writing anything.")
+        parser.add_argument('--rejects', help="Write invalid rows, with the reason, to this CSV file.")
+        parser.add_argument(
+            '--queue', action='store_true',
+            help="Copy the file aside and import it in a background job (see run_worker).",
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('xlsx' if path.lower().endswith('.xlsx') else 'csv')
+        if not os.path.exists(path):
+            raise CommandError(f"{path} does not exist.")
+        if options['queue']:
+            job = enqueue_import(path, fmt, options['encoding'])
+            self.stdout.write(self.style.SUCCESS(f"Queued job #{job.pk}."))
+            return
+
+        rows = _read_xlsx(path) if fmt == 'xlsx' else _read_csv(path, options['encoding'])
+        header = next(rows, [])
+        aliases = _header_map()
+        columns = [aliases.get(str(name).strip()) for name in header]
+        missing = {'id', 'principal_amount', 'interest_rate', 'claimed_amount'} | set(DATE_FIELDS)
+        missing -= set(columns)
+        if missing:
+            raise CommandError(f"Missing columns: {', '.join(sorted(missing))}")
+
+        self.dry_run = options['dry_run']
+        self.banks = dict(Bank.objects.values_list('name', 'id'))
+        self.seen_ids = set()
+        self.imported = 0
+        self.rejected = 0
+
+        rejects_file = open(options['rejects'], 'w', newline='', encoding='utf-8-sig') if options['rejects'] else None
+        self.rejects = csv.writer(rejects_file) if rejects_file else None
+        if self.rejects:
+            self.rejects.writerow(['line'] + list(header) + ['error'])
+
+        try:
+            batch = []
+            for line, row in enumerate(rows, start=2):
+                if not any(cell.strip() for cell in row):
+                    continue
+                values = {name: cell for name, cell in zip(columns, row) if name}
+                try:
+                    batch.append((line, row, self._build_issue(values)))
+                except (RowError, ValidationError) as e:
+                    self._reject(line, row, e)
+
+                if len(batch) >= options['batch_size']:
+                    self._flush(batch)
+                    batch = []
+            self._flush(batch)
+        finally:
+            if rejects_file:
+                rejects_file.close()
+
+        verb = "Would import" if self.dry_run else "Imported"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {self.imported} issues, rejected {self.rejected}."))
+
+    def _build_issue(self, values):
+        issue_id = values.get('id', '').strip()
+        if not issue_id:
+            raise RowError("id: खाली")
+        if issue_id in self.seen_ids:
+            raise RowError(f"id: {issue_id} फाइलमा दोहोरिएको")
+
+        bank_name = values.get('petitioner', '').strip()
+        issue = Issue(id=issue_id, petitioner_id=self.banks.get(bank_name))
+        issue._bank_name = bank_name
+        for field in TEXT_FIELDS:
+            setattr(issue, field, values.get(field, '').strip() or None)
+        for field in DECIMAL_FIELDS:
+            setattr(issue, field, _decimal(values.get(field, ''), field))
+        for field in DATE_FIELDS:
+            setattr(issue, field, to_ascii(values.get(field, '')).strip())
+        issue.tax_rate = _tax_rate(values.get('tax_rate', ''))
+        issue.status = values.get('status', '').strip() or 'open'
+
+        try:
+            issue.calculate()
+        except (ValueError, OverflowError) as e:
+            raise RowError(f"मिति त्रुटि : {e.args[0]}")
+        # petitioner ids come from the name map or are created in _flush;
+        # validating the foreign key would cost a SELECT per row
+        issue.clean_fields(exclude=['created_at', 'updated_at', 'petitioner'])
+        self.seen_ids.add(issue_id)
+        return issue
+
+    def _flush(self, batch):
+        if not batch:
+            return
+        existing = set(
+            Issue.objects.filter(pk__in=[issue.pk for _, _, issue in batch]).values_list('pk', flat=True)
+        )
+        issues = []
+        for line, row, issue in batch:
+            if issue.pk in existing:
+                self._reject(line, row, RowError(f"id: {issue.pk} पहिले नै छ"))
+            else:
+                issues.append(issue)
+
+        if not self.dry_run:
+            with transaction.atomic():
+                self._create_banks(issues)
+                Issue.objects.bulk_create(issues)
+                apply_issue_deltas(summary_values(issue) for issue in issues)
+                index_issues(issues, {bank_id: name for name, bank_id in self.banks.items()}, replace=False)
+                transaction.on_commit(bump_list_version)
+        self.imported += len(issues)
+
+    # Bank names resolve through an in-memory map. Unknown names are created
+    # with the first valid row that uses them, inside the chunk's transaction,
+    # so rejected rows leave no banks behind.
+    def _create_banks(self, issues):
+        for issue in issues:
+            if issue.petitioner_id is None and issue._bank_name:
+                if issue._bank_name not in self.banks:
+                    self.banks[issue._bank_name] = Bank.objects.create(name=issue._bank_name).id
+                issue.petitioner_id = self.banks[issue._bank_name]
+
+    def _reject(self, line, row, error):
+        self.rejected += 1
+        if isinstance(error, ValidationError):
+            error = '; '.join(f"{field}: {' '.join(messages)}" for field, messages in error.message_dict.items())
+        if self.rejects:
+            self.rejects.writerow([line] + list(row) + [str(error)])
@@ -0,0 +1,106 @@
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from urllib.parse import quote
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Issue
+from core.pdf import invalidate_issue_pdfs
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test a running server: fetch issue list pages while PDFs are rendered "
+        "concurrently, and report list and PDF latency percentiles. Start the server "
+        "first, e.g. `uvicorn firm.asgi:application` or `manage.py runserver`."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+        parser.add_argument('--duration', type=float, default=10.0, help="Seconds to run.")
+        parser.add_argument('--list-clients', type=int, default=8)
+        parser.add_argument('--pdf-clients', type=int, default=2)
+        parser.add_argument('--user', help="Staff username for the PDF requests (default: first superuser).")
+        parser.add_argument('--warm-pdfs', action='store_true', help="Allow cached PDFs instead of forcing renders.")
+
+    def handle(self, *args, **options):
+        base_url = options['base_url'].rstrip('/')
+        issue_ids = list(Issue.objects.order_by('-created_at').values_list('pk', flat=True)[:200])
+        if options['pdf_clients'] and not issue_ids:
+            raise CommandError("No issues to print; seed some first.")
+        cookie = self.session_cookie(options['user']) if options['pdf_clients'] else None
+
+        deadline = time.monotonic() + options['duration']
+        results = {'list': [], 'pdf': []}
+        errors = {'list': 0, 'pdf': 0}
+        lock = threading.Lock()
+
+        def record(kind, started, ok):
+            with lock:
+                if ok:
+                    results[kind].append(time.monotonic() - started)
+                else:
+                    errors[kind] += 1
+
+        def list_client():
+            while time.monotonic() < deadline:
+                started = time.monotonic()
+                record('list', started, self.fetch(f"{base_url}/issues/"))
+
+        def pdf_client(offset):
+            n = offset
+            while time.monotonic() < deadline:
+                issue_id = issue_ids[n % len(issue_ids)]
+                n += options['pdf_clients']
+                if not options['warm_pdfs']:
+                    invalidate_issue_pdfs(issue_id)
+                started = time.monotonic()
+                url = f"{base_url}/core/issue/{quote(str(issue_id))}/print_pdf/"
+                record('pdf', started, self.fetch(url, cookie))
+
+        threads = [threading.Thread(target=list_client) for _ in range(options['list_clients'])]
+        threads += [threading.Thread(target=pdf_client, args=(n,)) for n in range(options['pdf_clients'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for kind in ('list', 'pdf'):
+            self.report(kind, results[kind], errors[kind], options['duration'])
+
+    def session_cookie(self, username):
+        users = get_user_model().objects.filter(is_active=True, is_staff=True)
+        user = users.filter(username=username).first() if username else users.filter(is_superuser=True).first()
+        if user is None:
+            raise CommandError("No staff user to print PDFs as; pass --user.")
+        session = SessionStore()
+        session[SESSION_KEY] = str(user.pk)
+        session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.create()
+        return f"{settings.SESSION_COOKIE_NAME}={session.session_key}"
+
+    def fetch(self, url, cookie=None):
+        request = urllib.request.Request(url, headers={'Cookie': cookie} if cookie else {})
+        try:
+            with urllib.request.urlopen(request, timeout=120) as response:
+                response.read()
+                return response.status == 200
+        except (urllib.error.URLError, OSError):
+            return False
+
+    def report(self, kind, latencies, errors, duration):
+        if len(latencies) < 2:
+            self.stdout.write(f"{kind}: {len(latencies)} ok, {errors} failed")
+            return
+        cuts = statistics.quantiles(latencies, n=100)
+        self.stdout.write(
+            f"{kind:5} {len(latencies):6} ok {errors:4} failed {len(latencies) / duration:8.1f} req/s   "
+            f"p50 {cuts[49] * 1000:8.1f} ms   p95 {cuts[94] * 1000:8.1f} ms   p99 {cuts[98] * 1000:8.1f} ms"
+        )
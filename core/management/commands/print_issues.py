@@ -0,0 +1,44 @@
+import shutil
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Issue
+from core.pdf import render_issues_batch
+
+
+class Command(BaseCommand):
+    help = "Render many issues into one merged PDF or a ZIP of per-issue PDFs."
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help="Path of the .pdf or .zip file to write.")
+        parser.add_argument('ids', nargs='*', help="Issue ids to print (default: all matching --status).")
+        parser.add_argument('--status', choices=[choice for choice, _ in Issue.STATUS_CHOICES])
+        parser.add_argument('--format', choices=['pdf', 'zip'], help="Defaults to the output file extension.")
+        parser.add_argument(
+            '--base-url', default='http://localhost:8000/',
+            help="Base URL for relative links in the PDF template; static assets are read from STATIC_ROOT.",
+        )
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or ('zip' if options['output'].lower().endswith('.zip') else 'pdf')
+
+        issues = Issue.objects.select_related('petitioner').order_by('-created_at')
+        if options['ids']:
+            issues = issues.filter(pk__in=options['ids'])
+        if options['status']:
+            issues = issues.filter(status=options['status'])
+        if not issues.exists():
+            raise CommandError("No issues matched.")
+
+        def progress(done, total):
+            width = 40
+            filled = width * done // total
+            self.stdout.write(f"\r[{'#' * filled}{'.' * (width - filled)}] {done}/{total}", ending='')
+            self.stdout.flush()
+
+        output = render_issues_batch(issues, fmt, base_url=options['base_url'], progress=progress)
+        with output, open(options['output'], 'wb') as fh:
+            shutil.copyfileobj(output, fh)
+
+        self.stdout.write('')
+        self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
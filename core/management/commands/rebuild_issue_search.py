@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.search import rebuild_index, search_enabled
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index over issue ids, titles, defendants and bank names."
+
+    def handle(self, *args, **options):
+        if not search_enabled():
+            raise CommandError("The full-text index needs SQLite FTS5; other databases search with icontains.")
+        count = rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} issues."))
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from core.models import IssueSummary
+from core.summary import SUMMARY_AMOUNTS, computed_buckets, rebuild_summary
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the per-bank, per-status issue summary from scratch and report any "
+        "buckets that had drifted from the incremental totals."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true', help="Only report drift, do not rewrite the table.")
+
+    def handle(self, *args, **options):
+        fields = ['issue_count'] + SUMMARY_AMOUNTS
+        stored = {
+            (row['petitioner_id'], row['status']): row
+            for row in IssueSummary.objects.values('petitioner_id', 'status', *fields)
+        }
+        fresh = rebuild_summary() if not options['check'] else computed_buckets()
+
+        drifted = 0
+        for bucket in sorted(set(stored) | set(fresh), key=lambda b: (b[0] or 0, b[1])):
+            old = stored.get(bucket, {})
+            new = fresh.get(bucket, {})
+            diff = [
+                f"{field}: {old.get(field, 0)} -> {new.get(field, 0)}"
+                for field in fields if (old.get(field) or 0) != (new.get(field) or 0)
+            ]
+            if diff:
+                drifted += 1
+                self.stdout.write(f"bank {bucket[0]} / {bucket[1]}: {', '.join(diff)}")
+
+        verb = "Found" if options['check'] else "Rebuilt; fixed"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {drifted} drifted of {len(fresh)} buckets."))
@@ -0,0 +1,70 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Bank, Issue
+from core.recalculate import recalculate_issues
+from core.utils import bs_calendar
+
+
+class Command(BaseCommand):
+    help = "Recompute total days, interest, DRT fee and payable amounts for stored issues."
+
+    def add_arguments(self, parser):
+        parser.add_argument('ids', nargs='*', help="Issue ids to recalculate (default: all matching the filters).")
+        parser.add_argument('--status', choices=[choice for choice, _ in Issue.STATUS_CHOICES])
+        parser.add_argument('--petitioner', help="Only issues of this bank (exact name).")
+        parser.add_argument('--final-date', help="Move every matching issue to this final date (BS, YYYY-MM-DD).")
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--workers', type=int, default=1, help="Recalculate chunks in this many processes.")
+        parser.add_argument('--dry-run', action='store_true', help="Report what would change without writing.")
+        parser.add_argument('--quiet-rows', action='store_true', help="Only print the totals.")
+
+    def handle(self, *args, **options):
+        issues = Issue.objects.all()
+        if options['ids']:
+            issues = issues.filter(pk__in=options['ids'])
+        if options['status']:
+            issues = issues.filter(status=options['status'])
+        if options['petitioner']:
+            if not Bank.objects.filter(name=options['petitioner']).exists():
+                raise CommandError(f"No bank named {options['petitioner']!r}.")
+            issues = issues.filter(petitioner__name=options['petitioner'])
+
+        final_date_bs = options['final_date']
+        if final_date_bs:
+            try:
+                final_date_bs = bs_calendar.format_bs(*bs_calendar.parse(final_date_bs))
+            except (ValueError, TypeError) as e:
+                raise CommandError(f"Invalid --final-date: {e}")
+
+        delta = {'interest_amount': 0, 'tax_revenue_amount': 0, 'payable_amount': 0}
+
+        def on_change(pk, diff):
+            for field in delta:
+                old, new = diff[field]
+                delta[field] += new - (old or 0)
+            if options['quiet_rows']:
+                return
+            changed = ', '.join(
+                f"{field}: {old} -> {new}" for field, (old, new) in diff.items() if old != new
+            )
+            self.stdout.write(f"{pk}: {changed}")
+
+        def on_error(pk, message):
+            self.stderr.write(f"{pk}: {message}")
+
+        totals = recalculate_issues(
+            issues,
+            final_date_bs=final_date_bs,
+            chunk_size=options['chunk_size'],
+            workers=options['workers'],
+            dry_run=options['dry_run'],
+            on_change=on_change,
+            on_error=on_error,
+        )
+
+        verb = "Would change" if options['dry_run'] else "Changed"
+        self.stdout.write(self.style.SUCCESS(
+            f"Checked {totals['checked']}, {verb.lower()} {totals['changed']}, errors {totals['errors']}."
+        ))
+        for field, amount in delta.items():
+            self.stdout.write(f"  {Issue._meta.get_field(field).verbose_name}: {amount:+}")
@@ -0,0 +1,60 @@
+import multiprocessing
+import signal
+import threading
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+
+# Process entry point. Imports core.jobs itself so it also works where
+# workers are spawned rather than forked (Windows, macOS).
+def worker_main(poll, once):
+    django.setup()
+    from core import jobs
+
+    stop = _stop_on_signals()
+    jobs.work(jobs.worker_name(), stop, poll=poll, once=once)
+
+
+# SIGTERM and Ctrl-C let the running job finish; the worker then exits
+def _stop_on_signals():
+    stop = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *args: stop.set())
+    return stop
+
+
+class Command(BaseCommand):
+    help = (
+        "Run queued background jobs (batch prints, imports, recalculations). "
+        "Several workers can run at once, on the same SQLite database too."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=1, help="Number of worker processes.")
+        parser.add_argument('--poll', type=float, default=1.0, help="Seconds between checks of an empty queue.")
+        parser.add_argument('--once', action='store_true', help="Exit once the queue is empty.")
+
+    def handle(self, *args, **options):
+        if options['workers'] <= 1:
+            from core import jobs
+
+            jobs.work(jobs.worker_name(), _stop_on_signals(), poll=options['poll'], once=options['once'])
+            return
+
+        # Children open their own connections
+        connections.close_all()
+        processes = [
+            multiprocessing.Process(target=worker_main, args=(options['poll'], options['once']))
+            for _ in range(options['workers'])
+        ]
+        for process in processes:
+            process.start()
+        self.stdout.write(f"Started {len(processes)} workers.")
+
+        # Ctrl-C reaches the children directly; SIGTERM is passed on
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, lambda *args: [process.terminate() for process in processes])
+        for process in processes:
+            process.join()
@@ -0,0 +1,195 @@
+import datetime
+import itertools
+import random
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from core import interest
+from core.bank_index import bump_bank_index_version
+from core.models import Bank, Issue
+from core.page_cache import bump_list_version
+from core.paginator import bump_count_version
+from core.search import index_issues
+from core.summary import apply_issue_deltas, summary_values
+from core.utils import bs_calendar
+from core.utils.nepali_numerals import to_nepali
+
+
+BANK_PREFIXES = [
+    'नेपाल', 'हिमालयन', 'एभरेष्ट', 'सगरमाथा', 'कञ्चन', 'लुम्बिनी', 'जनकपुर', 'गण्डकी',
+    'कर्णाली', 'सुदूरपश्चिम', 'मेची', 'कोशी', 'बागमती', 'राप्ती', 'भेरी', 'सेती',
+    'महाकाली', 'नारायणी', 'पशुपति', 'अन्नपूर्ण', 'मकालु', 'धौलागिरि', 'त्रिशूली', 'गौरीशंकर',
+]
+BANK_KINDS = [
+    'बैंक लिमिटेड', 'विकास बैंक लिमिटेड', 'फाइनान्स लिमिटेड',
+    'लघुवित्त वित्तीय संस्था लिमिटेड', 'बचत तथा ऋण सहकारी संस्था लिमिटेड',
+]
+CASE_TYPES = [
+    'ऋण असुली', 'कर्जा असुली', 'धितो लिलाम', 'बैंकिङ कसुर', 'जमानत दायित्व',
+    'चेक अनादर', 'हायर पर्चेज कर्जा असुली', 'ओभरड्राफ्ट असुली',
+]
+GIVEN_NAMES = [
+    'राम', 'सीता', 'हरि', 'गीता', 'कृष्ण', 'लक्ष्मी', 'विष्णु', 'सरिता',
+    'गोपाल', 'मीना', 'सुरेश', 'अनिता', 'दिपक', 'पुष्पा', 'राजेश', 'कमला',
+]
+MIDDLE_NAMES = ['बहादुर', 'प्रसाद', 'कुमार', 'कुमारी', 'राज', 'नाथ', '']
+SURNAMES = [
+    'थापा', 'श्रेष्ठ', 'गुरुङ', 'तामाङ', 'राई', 'लिम्बु', 'मगर', 'अधिकारी',
+    'पौडेल', 'खड्का', 'कार्की', 'भट्टराई', 'शर्मा', 'यादव', 'महर्जन', 'शाह',
+]
+FIRM_KINDS = ['ट्रेडर्स प्रा.लि.', 'उद्योग प्रा.लि.', 'कन्स्ट्रक्सन प्रा.लि.', 'एण्ड सन्स']
+
+# Weighted the way a real case book is: most loans at the common rates, most
+# cases still open, the 1% fee far more often than 0.5%
+RATES = [Decimal(rate) for rate in ('8', '9', '10', '11', '12', '12.5', '13', '14', '15', '16', '18')]
+RATE_WEIGHTS = [2, 4, 8, 10, 14, 12, 10, 8, 6, 4, 2]
+STATUSES = ['open', 'pending', 'closed']
+STATUS_WEIGHTS = [55, 25, 20]
+TAX_RATES = [interest.DEFAULT_TAX_RATE, Decimal('0.005')]
+TAX_RATE_WEIGHTS = [85, 15]
+
+# Fixed bounds, so a seed gives the same rows whatever day it runs
+FIRST_DATE = bs_calendar.to_ordinal(2060, 1, 1)
+LAST_DATE = bs_calendar.to_ordinal(2082, 3, 15)
+ID_DIGITS = 9
+
+
+def bank_names(count):
+    names = []
+    combos = len(BANK_PREFIXES) * len(BANK_KINDS)
+    for n in range(count):
+        round_, index = divmod(n, combos)
+        kind, prefix = divmod(index, len(BANK_PREFIXES))
+        name = f"{BANK_PREFIXES[prefix]} {BANK_KINDS[kind]}"
+        names.append(f"{name} ({to_nepali(round_ + 1)})" if round_ else name)
+    return names
+
+
+def _defendant(rng):
+    surname = rng.choice(SURNAMES)
+    if rng.random() < 0.1:
+        return f"{surname} {rng.choice(FIRM_KINDS)}"
+    middle = rng.choice(MIDDLE_NAMES)
+    return ' '.join(part for part in (rng.choice(GIVEN_NAMES), middle, surname) if part)
+
+
+def _paisa(amount):
+    return Decimal(int(amount)).scaleb(-2)
+
+
+# One row of editable fields. Amounts are log-normal (a few huge loans, many
+# small ones), capped well inside max_digits.
+def generate_row(rng):
+    start = rng.randrange(FIRST_DATE, LAST_DATE)
+    end = min(LAST_DATE, start + 1 + int(rng.lognormvariate(6.3, 0.8)))
+    principal = min(max(rng.lognormvariate(15.4, 1.3), 1_000_000), 1e13)
+    claimed = principal * (1 + rng.random() * 0.25)
+    tax_rate = rng.choices(TAX_RATES, TAX_RATE_WEIGHTS)[0]
+    prepaid = claimed * float(tax_rate) * rng.random() * 0.5 if rng.random() < 0.3 else 0
+    return {
+        'title': f"{rng.choice(CASE_TYPES)} मुद्दा",
+        'defendant': _defendant(rng),
+        'principal_amount': _paisa(principal),
+        'interest_rate': rng.choices(RATES, RATE_WEIGHTS)[0],
+        'claimed_amount': _paisa(claimed),
+        'prepaid_amount': _paisa(prepaid),
+        'tax_rate': tax_rate,
+        'status': rng.choices(STATUSES, STATUS_WEIGHTS)[0],
+        'issue_date_bs': bs_calendar.format_bs(*bs_calendar.from_ordinal(start)),
+        'final_date_bs': bs_calendar.format_bs(*bs_calendar.from_ordinal(end)),
+        'issue_date': bs_calendar.ordinal_to_ad(start),
+        'final_date': bs_calendar.ordinal_to_ad(end),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the database with synthetic issues for benchmarks: valid BS date pairs, Devanagari "
+        "titles and defendants, Zipf-distributed banks and log-normal amounts. The same --seed "
+        "always gives the same rows. Derived fields are computed in batches and rows go in "
+        "with bulk_create; the summary, search index, cached counts and pages are kept in step."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=100_000, help="Issues to create.")
+        parser.add_argument('--banks', type=int, default=300, help="Banks to spread them over.")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--prefix', default='SD', help="Issue numbers are PREFIX plus 9 digits.")
+        parser.add_argument('--batch-size', type=int, default=10_000)
+
+    def handle(self, *args, **options):
+        count, prefix = options['count'], options['prefix']
+        if count < 1 or options['banks'] < 1:
+            raise CommandError("--count and --banks must be positive.")
+        if count >= 10 ** ID_DIGITS or len(prefix) + ID_DIGITS > Issue._meta.get_field('id').max_length:
+            raise CommandError(f"Issue numbers {prefix}{'9' * ID_DIGITS} would not fit.")
+        if Issue.objects.filter(pk__startswith=prefix).exists():
+            raise CommandError(f"Issues numbered {prefix}… already exist; pick another --prefix.")
+
+        banks = self.banks(options['banks'])
+        names = {bank_id: name for name, bank_id in banks}
+        # Bank n is picked with weight 1/(n+1): a few banks own most cases
+        cum_weights = list(itertools.accumulate(1 / (n + 1) for n in range(len(banks))))
+        bank_ids = [bank_id for _, bank_id in banks]
+
+        rng = random.Random(options['seed'])
+        now = timezone.now()
+        started = time.perf_counter()
+
+        for first in range(0, count, options['batch_size']):
+            size = min(options['batch_size'], count - first)
+            self.seed_batch(rng, first, size, prefix, bank_ids, cum_weights, names, now)
+            self.stdout.write(f"\rseeded {first + size}/{count}", ending='')
+            self.stdout.flush()
+        bump_count_version()
+        bump_list_version()
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write('')
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {count} issues over {len(banks)} banks in {elapsed:.1f} s ({count / elapsed:.0f} rows/s)."
+        ))
+
+    # Creates the banks that are missing; returns [(name, id)] in generation order
+    def banks(self, count):
+        wanted = bank_names(count)
+        existing = dict(Bank.objects.filter(name__in=wanted).values_list('name', 'id'))
+        missing = [Bank(name=name) for name in wanted if name not in existing]
+        if missing:
+            Bank.objects.bulk_create(missing)
+            existing.update(Bank.objects.filter(name__in=wanted).values_list('name', 'id'))
+            bump_bank_index_version()
+        return [(name, existing[name]) for name in wanted]
+
+    def seed_batch(self, rng, first, size, prefix, bank_ids, cum_weights, names, now):
+        rows = [generate_row(rng) for _ in range(size)]
+        petitioners = rng.choices(bank_ids, cum_weights=cum_weights, k=size)
+        amounts = interest.calculate_many(
+            (row['principal_amount'], row['interest_rate'], row['claimed_amount'], row['prepaid_amount'],
+             row['tax_rate'], row['issue_date_bs'], row['final_date_bs'])
+            for row in rows
+        )
+
+        issues = []
+        for n, row, petitioner_id, result in zip(itertools.count(first), rows, petitioners, amounts):
+            issue = Issue(id=f"{prefix}{n:0{ID_DIGITS}d}", petitioner_id=petitioner_id, **row, **result._asdict())
+            filed = datetime.datetime.combine(row['issue_date'], datetime.time(10), datetime.timezone.utc)
+            issue.created_at = min(now, filed + datetime.timedelta(minutes=rng.randrange(60 * 24 * 30)))
+            issues.append(issue)
+
+        # bulk_create would stamp created_at with now (auto_now_add); switch
+        # that off for the insert so the filing times spread over the issue
+        # dates are written as they are
+        created_at = Issue._meta.get_field('created_at')
+        with transaction.atomic():
+            created_at.auto_now_add = False
+            try:
+                Issue.objects.bulk_create(issues)
+            finally:
+                created_at.auto_now_add = True
+            apply_issue_deltas(summary_values(issue) for issue in issues)
+            index_issues(issues, names, replace=False)
@@ -0,0 +1,210 @@
+# Per-request timings, sent back as Server-Timing headers and aggregated into
+# Prometheus histograms for /metrics.
+#
+# A request's timings live in a context variable, so code anywhere below the
+# middleware (the DB cursor wrapper, the template backend, the PDF renderer)
+# can add to them without being handed the request. asgiref copies the
+# context into sync_to_async threads, so async views are covered too. With
+# no request active (management commands, job workers) timer() only checks
+# the variable and does nothing else.
+#
+# Histograms and counters are per process; with several web workers each one
+# reports its own and Prometheus sums them.
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.template.backends.django import DjangoTemplates, Template
+
+
+# Phases, in Server-Timing order: (name, description)
+PHASES = [
+    ('db', 'Database'),
+    ('template', 'Template render'),
+    ('pdf_html', 'PDF HTML render'),
+    ('pdf_layout', 'PDF layout'),
+    ('pdf_write', 'PDF write'),
+]
+# Upper bounds in seconds, and in queries for the per-request query count
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+_timings = ContextVar('request_timings', default=None)
+
+
+# {phase: [seconds, count]} for the current request
+class Timings(dict):
+    def add(self, phase, seconds, count=1):
+        entry = self.get(phase)
+        if entry is None:
+            self[phase] = [seconds, count]
+        else:
+            entry[0] += seconds
+            entry[1] += count
+
+
+# Collect timings for the code inside the block (a request, or a render in a
+# pool worker, whose timings are sent back to the parent)
+@contextmanager
+def collecting():
+    timings = Timings()
+    token = _timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _timings.reset(token)
+
+
+@contextmanager
+def timer(phase):
+    timings = _timings.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(phase, time.perf_counter() - started)
+
+
+# Merge timings collected elsewhere, e.g. returned by a render pool worker
+def record(collected):
+    timings = _timings.get()
+    if timings is not None:
+        for phase, (seconds, count) in collected.items():
+            timings.add(phase, seconds, count)
+
+
+# Installed on every connection (see core.signals)
+def query_timer(execute, sql, params, many, context):
+    timings = _timings.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.add('db', time.perf_counter() - started)
+
+
+# DjangoTemplates whose templates time their own render. Only the outer
+# render is timed; includes and extends happen inside it.
+class TimedDjangoTemplates(DjangoTemplates):
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return TimedTemplate(template.template, self)
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        with timer('template'):
+            return super().render(context, request)
+
+
+def server_timing(timings, total):
+    parts = []
+    for phase, description in PHASES:
+        if phase in timings:
+            seconds, count = timings[phase]
+            if phase == 'db':
+                description = f"{count} queries"
+            parts.append(f'{phase};dur={seconds * 1000:.1f};desc="{description}"')
+    parts.append(f'total;dur={total * 1000:.1f}')
+    return ', '.join(parts)
+
+
+class Histogram:
+    def __init__(self, name, help_text, labels, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = buckets
+        self.series = {}
+
+    def observe(self, label_values, value):
+        series = self.series.get(label_values)
+        if series is None:
+            series = self.series.setdefault(label_values, [[0] * len(self.buckets), 0, 0.0])
+        counts = series[0]
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[index] += 1
+                break
+        series[1] += 1
+        series[2] += value
+
+    def exposition(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for label_values, (counts, count, total) in sorted(self.series.items()):
+            labels = ','.join(f'{label}="{_escape(value)}"' for label, value in zip(self.labels, label_values))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f'{self.name}_sum{{{labels}}} {total!r}')
+            lines.append(f'{self.name}_count{{{labels}}} {count}')
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help_text, labels):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.series = {}
+
+    def inc(self, label_values, amount=1):
+        self.series[label_values] = self.series.get(label_values, 0) + amount
+
+    def exposition(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for label_values, total in sorted(self.series.items()):
+            labels = ','.join(f'{label}="{_escape(value)}"' for label, value in zip(self.labels, label_values))
+            lines.append(f'{self.name}{{{labels}}} {total}')
+        return lines
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+_lock = threading.Lock()
+REQUEST_SECONDS = Histogram(
+    'firm_request_duration_seconds', 'Time to produce a response.', ('view',), DURATION_BUCKETS,
+)
+PHASE_SECONDS = Histogram(
+    'firm_request_phase_seconds', 'Time spent per request in each phase.', ('view', 'phase'), DURATION_BUCKETS,
+)
+REQUEST_QUERIES = Histogram(
+    'firm_request_db_queries', 'Database queries per request.', ('view',), QUERY_BUCKETS,
+)
+PAGE_CACHE_LOOKUPS = Counter(
+    'firm_page_cache_lookups_total', 'Page cache lookups (core.page_cache) by result.', ('cache', 'result'),
+)
+COLLECTORS = [REQUEST_SECONDS, PHASE_SECONDS, REQUEST_QUERIES, PAGE_CACHE_LOOKUPS]
+
+
+def observe(view, timings, total):
+    with _lock:
+        REQUEST_SECONDS.observe((view,), total)
+        REQUEST_QUERIES.observe((view,), timings.get('db', (0, 0))[1])
+        for phase, (seconds, _) in timings.items():
+            PHASE_SECONDS.observe((view, phase), seconds)
+
+
+def count_page_cache(name, result):
+    with _lock:
+        PAGE_CACHE_LOOKUPS.inc((name, result))
+
+
+def exposition():
+    with _lock:
+        lines = [line for collector in COLLECTORS for line in collector.exposition()]
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,123 @@
+import mimetypes
+import os
+import posixpath
+import time
+from functools import lru_cache
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import FileResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from . import metrics
+
+
+# Content-hashed names never change, so browsers may keep them for a year;
+# plain names are revalidated
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+PLAIN_CACHE_CONTROL = 'public, max-age=0, must-revalidate'
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+
+# Serve STATIC_ROOT straight from the application server, picking the .br or
+# .gz file collectstatic wrote (see core.storage) when the browser accepts
+# it. Only active with DEBUG off; runserver serves static files itself then.
+class StaticFilesMiddleware:
+    def __init__(self, get_response):
+        if settings.DEBUG or '://' in settings.STATIC_URL:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.prefix = '/' + settings.STATIC_URL.strip('/') + '/'
+
+    def __call__(self, request):
+        if request.method in ('GET', 'HEAD') and request.path_info.startswith(self.prefix):
+            response = serve_static(request, request.path_info[len(self.prefix):])
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+
+@lru_cache(maxsize=1)
+def _hashed_names():
+    return frozenset(getattr(staticfiles_storage, 'hashed_files', {}).values())
+
+
+def _accepted_encodings(request):
+    accepted = set()
+    for item in request.headers.get('Accept-Encoding', '').split(','):
+        coding, _, params = item.strip().partition(';')
+        if params.replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def serve_static(request, name):
+    name = posixpath.normpath(name).lstrip('/')
+    try:
+        path = safe_join(settings.STATIC_ROOT, name)
+    except ValueError:
+        return None
+    if not os.path.isfile(path):
+        return None
+
+    content_type, _ = mimetypes.guess_type(name)
+    encoding = None
+    accepted = _accepted_encodings(request)
+    for coding, suffix in ENCODINGS:
+        if coding in accepted and os.path.isfile(path + suffix):
+            path, encoding = path + suffix, coding
+            break
+
+    stat = os.stat(path)
+    etag = f'"{stat.st_size:x}-{int(stat.st_mtime):x}{"-" + encoding if encoding else ""}"'
+    response = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if response is None:
+        response = FileResponse(open(path, 'rb'), content_type=content_type or 'application/octet-stream')
+        response.headers.pop('Content-Disposition', None)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+
+    response.headers['ETag'] = etag
+    response.headers['Last-Modified'] = http_date(stat.st_mtime)
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL if name in _hashed_names() else PLAIN_CACHE_CONTROL
+    return response
+
+
+# Times every request and its DB, template and PDF phases (see core.metrics),
+# adds a Server-Timing header when METRICS_SERVER_TIMING is on and feeds the
+# /metrics histograms. Works both ways round so async views stay async.
+class ServerTimingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.header = settings.METRICS_SERVER_TIMING
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with metrics.collecting() as timings:
+            started = time.perf_counter()
+            response = self.get_response(request)
+            return self.finish(request, response, timings, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        with metrics.collecting() as timings:
+            started = time.perf_counter()
+            response = await self.get_response(request)
+            return self.finish(request, response, timings, time.perf_counter() - started)
+
+    def finish(self, request, response, timings, total):
+        match = request.resolver_match
+        metrics.observe(match.view_name if match else 'unmatched', timings, total)
+        if self.header:
+            response.headers['Server-Timing'] = metrics.server_timing(timings, total)
+        return response
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.1 on 2026-10-17 06:15
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+AMOUNTS = ['principal_amount', 'interest_amount', 'tax_revenue_amount', 'payable_amount']
+
+
+def build_summary(apps, schema_editor):
+    Issue = apps.get_model('core', 'Issue')
+    IssueSummary = apps.get_model('core', 'IssueSummary')
+    rows = Issue.objects.values('petitioner_id', 'status').annotate(
+        issue_count=Count('pk'), **{field: Sum(field) for field in AMOUNTS}
+    ).order_by()
+    IssueSummary.objects.bulk_create(
+        IssueSummary(**{**row, **{field: row[field] or Decimal('0.00') for field in AMOUNTS}})
+        for row in rows
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_issue_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IssueSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('open', 'Open'), ('closed', 'Closed'), ('pending', 'Pending')], max_length=20)),
+                ('issue_count', models.IntegerField(default=0, verbose_name='मुद्दा संख्या')),
+                ('principal_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=24, verbose_name='सावा रकम')),
+                ('interest_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=24, verbose_name='ब्याज रकम')),
+                ('tax_revenue_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=24, verbose_name='राजस्व रकम')),
+                ('payable_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=24, verbose_name='भुक्तानी गर्नुपर्ने रकम')),
+                ('petitioner', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='core.bank', verbose_name='वादी')),
+            ],
+            options={
+                'verbose_name': 'सारांश',
+                'verbose_name_plural': 'बैंक र स्थिति अनुसार सारांश',
+                'constraints': [models.UniqueConstraint(fields=('petitioner', 'status'), name='issue_summary_bucket_unique')],
+            },
+        ),
+        migrations.RunPython(build_summary, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,59 @@
+import itertools
+import unicodedata
+
+from django.db import migrations
+
+
+# Frozen copy of core.search.document as it was when the index was created,
+# so later changes there cannot change what this migration writes
+_VARIANTS = str.maketrans({
+    'ँ': 'ं',
+    '़': None,
+    '‌': None,
+    '‍': None,
+})
+_TO_ASCII = str.maketrans('०१२३४५६७८९', '0123456789')
+
+
+def _normalize(text):
+    text = unicodedata.normalize('NFD', str(text or ''))
+    text = text.translate(_VARIANTS).translate(_TO_ASCII)
+    return unicodedata.normalize('NFC', text).casefold()
+
+
+def _document(issue_id, title, defendant, petitioner_name):
+    return _normalize(' '.join(filter(None, [issue_id, title, defendant, petitioner_name])))
+
+
+# FTS5 is SQLite only; elsewhere core.search falls back to icontains
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS core_issue_fts "
+        "USING fts5(issue_id UNINDEXED, content, tokenize='trigram')"
+    )
+
+    # Rows are streamed and inserted in batches rather than held in a list
+    Issue = apps.get_model('core', 'Issue')
+    issues = Issue.objects.values_list('id', 'title', 'defendant', 'petitioner__name').iterator(chunk_size=2000)
+    rows = ((row[0], _document(*row)) for row in issues)
+    with schema_editor.connection.cursor() as cursor:
+        while batch := list(itertools.islice(rows, 2000)):
+            cursor.executemany("INSERT INTO core_issue_fts (issue_id, content) VALUES (%s, %s)", batch)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS core_issue_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_issue_summary'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,39 @@
+from django.db import migrations, models
+from django.db.models import Min
+
+
+AMOUNTS = ['issue_count', 'principal_amount', 'interest_amount', 'tax_revenue_amount', 'payable_amount']
+
+
+# Fold any duplicate petitioner-less buckets into one row per status before
+# the constraint goes on
+def merge_unassigned_buckets(apps, schema_editor):
+    IssueSummary = apps.get_model('core', 'IssueSummary')
+    unassigned = IssueSummary.objects.filter(petitioner=None)
+    for row in unassigned.values('status').annotate(keep=Min('pk')).order_by():
+        rows = list(unassigned.filter(status=row['status']))
+        if len(rows) < 2:
+            continue
+        kept = next(bucket for bucket in rows if bucket.pk == row['keep'])
+        for field in AMOUNTS:
+            setattr(kept, field, sum(getattr(bucket, field) for bucket in rows))
+        kept.save()
+        unassigned.filter(status=row['status']).exclude(pk=kept.pk).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_jobs'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_unassigned_buckets, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='issuesummary',
+            constraint=models.UniqueConstraint(
+                condition=models.Q(('petitioner__isnull', True)), fields=('status',),
+                name='issue_summary_unassigned_bucket_unique',
+            ),
+        ),
+    ]
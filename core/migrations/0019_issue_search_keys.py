@@ -0,0 +1,36 @@
+from django.db import migrations
+
+
+# Integer keys for core_issue_fts rows, indexed by issue_id (see core.search).
+# Existing rows keep their rowid as their key; any duplicate rows for one
+# issue are dropped.
+def create_keys(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        "CREATE TABLE IF NOT EXISTS core_issue_fts_key "
+        "(id INTEGER PRIMARY KEY, issue_id TEXT NOT NULL UNIQUE)"
+    )
+    schema_editor.execute(
+        "INSERT OR IGNORE INTO core_issue_fts_key (id, issue_id) "
+        "SELECT rowid, issue_id FROM core_issue_fts ORDER BY rowid"
+    )
+    schema_editor.execute(
+        "DELETE FROM core_issue_fts WHERE rowid NOT IN (SELECT id FROM core_issue_fts_key)"
+    )
+
+
+def drop_keys(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS core_issue_fts_key")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_issue_summary_unassigned_bucket'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_keys, drop_keys),
+    ]
@@ -1,6 +1,8 @@
+from django.conf import settings
 from django.db import models
 from decimal import Decimal
-from nepali_datetime import date as bs_date
+from . import interest
+from .utils import bs_calendar
 
 class Bank(models.Model):
     name = models.CharField(max_length=255, unique=True)
@@ -14,7 +16,7 @@ class Bank(models.Model):
 class Issue(models.Model):
     id = models.CharField(max_length=15, primary_key=True, verbose_name='मुद्दा नम्बर')
     title = models.CharField(max_length=100, null=True, blank=True, verbose_name='शीर्षक')
-    petitioner = models.ForeignKey(Bank, on_delete=models.SET_NULL, null=True, blank=True, verbose_name='वादी')
+    petitioner = models.ForeignKey(Bank, on_delete=models.SET_NULL, null=True, blank=True, db_index=False, verbose_name='वादी')
     defendant = models.CharField(max_length=100, null=True, blank=True, verbose_name='प्रतिवादी')
 
     principal_amount = models.DecimalField(max_digits=20, decimal_places=2)
@@ -27,8 +29,8 @@ class Issue(models.Model):
     total_days = models.IntegerField(blank=True, editable=False, verbose_name="कुल दिन")
     interest_amount = models.DecimalField(max_digits=20, decimal_places=2, blank=True, editable=False, verbose_name="ब्याज रकम")
     claimed_amount = models.DecimalField(max_digits=20, decimal_places=2)
-    TAX_RATE_CHOICES = [(Decimal('0.010'), '1%'), (Decimal('0.005'), '0.5%')]
-    tax_rate = models.DecimalField(max_digits=6, decimal_places=3, choices=TAX_RATE_CHOICES, default=Decimal('0.010'), verbose_name="drt-शुल्क")
+    TAX_RATE_CHOICES = interest.TAX_RATE_CHOICES
+    tax_rate = models.DecimalField(max_digits=6, decimal_places=3, choices=TAX_RATE_CHOICES, default=interest.DEFAULT_TAX_RATE, verbose_name="drt-शुल्क")
     tax_revenue_amount = models.DecimalField(max_digits=20, decimal_places=2, blank=True, editable=False, verbose_name="राजस्व रकम")
     total_amount = models.DecimalField(max_digits=20, decimal_places=2, blank=True, editable=False,  verbose_name='कुल रकम')
     payable_amount = models.DecimalField(max_digits=20, decimal_places=2, blank=True, editable=False, verbose_name='भुक्तानी गर्नुपर्ने रकम')
@@ -43,21 +45,19 @@ class Issue(models.Model):
     issue_date = models.DateField(editable=False, null=True, blank=True)
     final_date = models.DateField(editable=False, null=True, blank=True)
 
-    def save(self, *args, **kwargs):
-        # Convert BS dates to AD datetime.date objects for calculations
-        bs1 = bs_date(*map(int, self.issue_date_bs.split('-')))
-        bs2 = bs_date(*map(int, self.final_date_bs.split('-')))
-        self.issue_date = bs1.to_datetime_date()
-        self.final_date = bs2.to_datetime_date()
-
-        self.total_days = (bs2 - bs1).days
-
-        self.interest_amount = ((self.principal_amount * self.interest_rate * self.total_days) / Decimal('36500')).quantize(Decimal('0.01'))
-
-        self.total_amount = (self.claimed_amount + self.interest_amount).quantize(Decimal('0.01'))
-        self.tax_revenue_amount = (self.total_amount * self.tax_rate).quantize(Decimal('0.01'))
-        self.payable_amount = (self.tax_revenue_amount - self.prepaid_amount).quantize(Decimal('0.01'))
+    # Fill the AD dates and every derived amount from the editable fields
+    def calculate(self):
+        self.issue_date = bs_calendar.bs_to_ad(self.issue_date_bs)
+        self.final_date = bs_calendar.bs_to_ad(self.final_date_bs)
+        amounts = interest.calculate(
+            self.principal_amount, self.interest_rate, self.claimed_amount, self.prepaid_amount,
+            self.tax_rate, self.issue_date_bs, self.final_date_bs,
+        )
+        for field, value in amounts._asdict().items():
+            setattr(self, field, value)
 
+    def save(self, *args, **kwargs):
+        self.calculate()
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -66,3 +66,87 @@ class Issue(models.Model):
     class Meta:
         verbose_name = "थप गणना"
         verbose_name_plural = "गणना गर्नु होस"
+        # Match the changelist/list ordering and filters and the reporting
+        # queries; (petitioner, status) also serves plain petitioner lookups.
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='issue_created_idx'),
+            models.Index(fields=['status', 'created_at'], name='issue_status_created_idx'),
+            models.Index(fields=['petitioner', 'status'], name='issue_petitioner_status_idx'),
+            models.Index(fields=['issue_date'], name='issue_issue_date_idx'),
+            models.Index(fields=['final_date'], name='issue_final_date_idx'),
+        ]
+
+
+# Running totals per petitioner bank and status, kept in step with Issue by
+# applying deltas (see core.summary) so dashboards never aggregate Issue itself
+class IssueSummary(models.Model):
+    petitioner = models.ForeignKey(Bank, on_delete=models.CASCADE, null=True, blank=True, verbose_name='वादी')
+    status = models.CharField(max_length=20, choices=Issue.STATUS_CHOICES)
+
+    issue_count = models.IntegerField(default=0, verbose_name='मुद्दा संख्या')
+    principal_amount = models.DecimalField(max_digits=24, decimal_places=2, default=Decimal('0.00'), verbose_name='सावा रकम')
+    interest_amount = models.DecimalField(max_digits=24, decimal_places=2, default=Decimal('0.00'), verbose_name='ब्याज रकम')
+    tax_revenue_amount = models.DecimalField(max_digits=24, decimal_places=2, default=Decimal('0.00'), verbose_name='राजस्व रकम')
+    payable_amount = models.DecimalField(max_digits=24, decimal_places=2, default=Decimal('0.00'), verbose_name='भुक्तानी गर्नुपर्ने रकम')
+
+    def __str__(self):
+        return f"{self.petitioner or '-'} / {self.status}"
+
+    class Meta:
+        verbose_name = "सारांश"
+        verbose_name_plural = "बैंक र स्थिति अनुसार सारांश"
+        constraints = [
+            models.UniqueConstraint(fields=['petitioner', 'status'], name='issue_summary_bucket_unique'),
+            # NULLs are distinct in the index above, so issues without a
+            # petitioner need their own one-row-per-status constraint
+            models.UniqueConstraint(
+                fields=['status'], condition=models.Q(petitioner__isnull=True),
+                name='issue_summary_unassigned_bucket_unique',
+            ),
+        ]
+
+
+# Background work queued from the admin or the command line and run by
+# `manage.py run_worker` (see core.jobs); the table itself is the queue
+class Job(models.Model):
+    KIND_CHOICES = [
+        ('print', 'PDF प्रिन्ट'),
+        ('import', 'मुद्दा आयात'),
+        ('recalculate', 'पुनः गणना'),
+    ]
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    params = models.JSONField(default=dict)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=3)
+    run_after = models.DateTimeField()
+    worker = models.CharField(max_length=100, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+
+    progress_done = models.IntegerField(default=0)
+    progress_total = models.IntegerField(default=0)
+    message = models.TextField(blank=True)
+    result_name = models.CharField(max_length=255, blank=True)
+
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.pk}"
+
+    class Meta:
+        verbose_name = "काम"
+        verbose_name_plural = "पृष्ठभूमि कामहरु"
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='job_status_run_after_idx'),
+        ]
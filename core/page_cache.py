@@ -0,0 +1,105 @@
+# Rendered issue pages, kept in the 'pages' cache (file-based, so every web
+# worker sees the same entries and the same invalidations).
+#
+# Keys carry versions: a detail fragment has its issue's version plus a
+# detail generation shared by all issues, and the issue list has one version
+# as a whole, since any edit can move a row between pages. Saving an issue
+# replaces its own version; changes that touch many issues at once (a bank
+# rename or delete, a recalculation) replace the generation instead, so they
+# cost one cache write rather than one per issue. Versions are replaced
+# rather than entries deleted, so a stale page is never looked up again and
+# simply ages out. A missing version starts at a fresh random value, not 1,
+# so pages written under an evicted version cannot come back.
+
+import hashlib
+import itertools
+import secrets
+
+from django.core.cache import caches
+from django.core.cache.backends.filebased import FileBasedCache
+
+from . import metrics
+
+
+CACHE_ALIAS = 'pages'
+LIST_VERSION_KEY = 'issue-list-version'
+DETAIL_GENERATION_KEY = 'issue-detail-generation'
+
+
+def _fresh_version():
+    return secrets.token_hex(8)
+
+
+def _digest(value):
+    return hashlib.sha1(str(value).encode()).hexdigest()
+
+
+def issue_version_key(pk):
+    return f"issue-version:{_digest(pk)}"
+
+
+def detail_version_keys(pk):
+    return [issue_version_key(pk), DETAIL_GENERATION_KEY]
+
+
+def bump_issue_version(pk):
+    cache = caches[CACHE_ALIAS]
+    cache.set(issue_version_key(pk), _fresh_version())
+    cache.set(LIST_VERSION_KEY, _fresh_version())
+
+
+# Expire every issue's detail page (and the list) in two writes
+def bump_detail_generation():
+    cache = caches[CACHE_ALIAS]
+    cache.set(DETAIL_GENERATION_KEY, _fresh_version())
+    cache.set(LIST_VERSION_KEY, _fresh_version())
+
+
+def bump_list_version():
+    caches[CACHE_ALIAS].set(LIST_VERSION_KEY, _fresh_version())
+
+
+# Version keys of other per-process caches (core.paginator's counts, the
+# bank index), kept here so a bump in one worker process reaches them all
+def shared_version(key):
+    return caches[CACHE_ALIAS].get_or_set(key, _fresh_version, None)
+
+
+def bump_shared_version(key):
+    caches[CACHE_ALIAS].set(key, _fresh_version(), None)
+
+
+# The cached text for (name, variant) under the current versions, produced
+# by awaiting render() on a miss. Hits and misses are counted per name in
+# core.metrics.
+async def acached(name, version_keys, variant, render):
+    cache = caches[CACHE_ALIAS]
+    versions = await cache.aget_many(version_keys)
+    for version_key in version_keys:
+        if version_key not in versions:
+            versions[version_key] = await cache.aget_or_set(version_key, _fresh_version)
+    key = f"{name}:{':'.join(versions[version_key] for version_key in version_keys)}:{_digest(variant)}"
+    content = await cache.aget(key)
+    if content is not None:
+        metrics.count_page_cache(name, 'hit')
+        return content
+
+    metrics.count_page_cache(name, 'miss')
+    content = await render()
+    await cache.aset(key, content)
+    return content
+
+
+# FileBasedCache lists its whole directory before every write to check
+# MAX_ENTRIES, which makes each write cost as much as the cache is large.
+# This one checks every CULL_EVERY writes per process (OPTIONS, default 100),
+# so the directory can overshoot MAX_ENTRIES by that many entries per worker.
+class PageFileCache(FileBasedCache):
+    def __init__(self, dir, params):
+        super().__init__(dir, params)
+        self._cull_every = int(params.get('OPTIONS', {}).get('CULL_EVERY', 100))
+        self._writes = itertools.count(1)
+
+    def _cull(self):
+        if next(self._writes) % self._cull_every == 0:
+            super()._cull()
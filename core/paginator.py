@@ -0,0 +1,41 @@
+import hashlib
+
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+
+from .page_cache import bump_shared_version, shared_version
+
+
+COUNT_VERSION_KEY = 'issue-count-version'
+
+
+# Paginator that remembers COUNT(*) results in the (per-process) default
+# cache. The key covers the exact SQL and a version that bumps whenever an
+# issue is added or deleted; the version lives in the shared page cache, so
+# every worker's unfiltered count follows creates and deletes at once. An
+# edit that moves a row in or out of a filter (a status change, say) does not
+# bump it, so filtered counts may be up to cache_timeout seconds stale, as is every
+# count after a bulk change that bypasses signals.
+class CachedCountPaginator(Paginator):
+    cache_timeout = 60
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is None:
+            return super().count
+
+        sql, params = query.sql_with_params()
+        version = shared_version(COUNT_VERSION_KEY)
+        key = 'paginator-count:%s' % hashlib.sha1(f"{version}|{sql}|{params!r}".encode()).hexdigest()
+
+        count = cache.get(key)
+        if count is None:
+            count = super().count
+            cache.set(key, count, self.cache_timeout)
+        return count
+
+
+def bump_count_version():
+    bump_shared_version(COUNT_VERSION_KEY)
@@ -0,0 +1,387 @@
+import asyncio
+import hashlib
+import itertools
+import logging
+import mimetypes
+import os
+import posixpath
+import re
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from functools import lru_cache
+from urllib.parse import unquote, urlsplit
+
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.template.loader import get_template, render_to_string
+from django.utils.module_loading import import_string
+
+from . import metrics
+
+
+logger = logging.getLogger(__name__)
+
+
+# Render the printable HTML for one issue
+def render_issue_html(issue):
+    with metrics.timer('pdf_html'):
+        return render_to_string("issue_pdf.html", {"issue": issue})
+
+
+# Lay out HTML with the configured engine and return the PDF bytes
+def html_to_pdf(html_string, base_url):
+    return get_renderer().render(html_string, base_url)
+
+
+# The stylesheet is read from disk rather than through the template loader
+# so batch print workers can use it without setting up Django.
+STYLESHEET_PATH = os.path.join(os.path.dirname(__file__), 'templates', 'issue_pdf.css')
+
+
+# PDF engines sit behind one method, render(html_string, base_url) -> bytes.
+# The engine named by PDF_RENDERER is imported on first use, so processes
+# that never print (manage.py commands, tests, most job runs) do not load it
+# or its fonts.
+@lru_cache(maxsize=1)
+def get_renderer():
+    return import_string(settings.PDF_RENDERER)()
+
+
+class WeasyPrintRenderer:
+    # Fonts and the shared stylesheet are set up once per process and reused
+    # by every render; @font-face rules register their fonts on the first parse.
+    def __init__(self):
+        from weasyprint import CSS, HTML
+        from weasyprint.text.fonts import FontConfiguration
+
+        self.html = HTML
+        self.font_config = FontConfiguration()
+        self.stylesheet = CSS(
+            filename=STYLESHEET_PATH,
+            base_url=f"http://localhost/{settings.STATIC_URL.lstrip('/')}",
+            url_fetcher=local_url_fetcher,
+            font_config=self.font_config,
+        )
+
+    # Layout and PDF writing are separate steps so core.metrics can time them
+    def render(self, html_string, base_url):
+        with metrics.timer('pdf_layout'):
+            document = self.html(string=html_string, base_url=base_url, url_fetcher=local_url_fetcher).render(
+                stylesheets=[self.stylesheet],
+                font_config=self.font_config,
+            )
+        with metrics.timer('pdf_write'):
+            return document.write_pdf()
+
+
+# Load the engine and its fonts now instead of on the first print. Rendering
+# a throwaway page also loads the @font-face fonts.
+def warm_up():
+    get_renderer().render('<p>०</p>', 'http://localhost/')
+
+
+# Render pool initializer: a failed warm-up must not break the pool, the
+# first real render reports the problem instead
+def _warm_up_worker():
+    try:
+        warm_up()
+    except Exception:
+        logger.exception("PDF renderer warm-up failed")
+
+
+# Serve static assets straight from STATIC_ROOT instead of making WeasyPrint
+# request them over HTTP from the server that is busy rendering.
+def local_url_fetcher(url, *args, **kwargs):
+    path = unquote(urlsplit(url).path)
+    for prefix in _static_prefixes():
+        if path.startswith(prefix):
+            relative = posixpath.normpath(path[len(prefix):]).lstrip('/')
+            if relative.startswith('..'):
+                break
+            mime_type, encoding = mimetypes.guess_type(relative)
+            return {
+                'string': _read_static(relative),
+                'mime_type': mime_type,
+                'encoding': encoding,
+                'redirected_url': url,
+            }
+    from weasyprint import default_url_fetcher
+
+    return default_url_fetcher(url, *args, **kwargs)
+
+
+def _static_prefixes():
+    return ('/' + settings.STATIC_URL.strip('/') + '/', '/staticfiles/')
+
+
+@lru_cache(maxsize=64)
+def _read_static(relative):
+    with open(os.path.join(settings.STATIC_ROOT, relative), 'rb') as fh:
+        return fh.read()
+
+
+def issue_pdf_filename(issue):
+    safe_id = re.sub(r'[\\/:*?"<>|\s]+', '_', str(issue.id))
+    return f"mudda_{safe_id}.pdf"
+
+
+# Worker entry point: runs in a child process, so it must not touch the ORM.
+# The PDF goes straight to disk and only the path travels back to the parent.
+def _write_pdf(html_string, base_url, target):
+    with open(target, 'wb') as fh:
+        fh.write(html_to_pdf(html_string, base_url))
+    return target
+
+
+# _write_pdf() for the render pool, returning the worker's phase timings so
+# the parent can add them to the request
+def _write_pdf_timed(html_string, base_url, target):
+    with metrics.collecting() as timings:
+        _write_pdf(html_string, base_url, target)
+    return dict(timings)
+
+
+# Render many issues in a process pool and pack them into one file.
+#
+# fmt is 'pdf' (a single merged document, in selection order) or 'zip'
+# (one PDF per issue). Peak memory is capped by keeping at most
+# 2 x workers HTML documents in flight, spooling every rendered PDF to a
+# temporary directory, and recycling workers after
+# ISSUE_BATCH_PRINT_TASKS_PER_CHILD renders. progress(done, total) is
+# called after every finished render.
+def render_issues_batch(issues, fmt, base_url, progress=None):
+    issues = list(issues)
+    total = len(issues)
+    workers = max(1, min(settings.ISSUE_BATCH_PRINT_WORKERS, total))
+    output = tempfile.TemporaryFile()
+
+    with tempfile.TemporaryDirectory(prefix='issue-batch-') as workdir:
+        paths = [None] * total
+        pending = {}
+        done = 0
+
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            max_tasks_per_child=settings.ISSUE_BATCH_PRINT_TASKS_PER_CHILD,
+        ) as pool:
+            for index, issue in enumerate(issues):
+                if len(pending) >= workers * 2:
+                    done += _collect(pending, paths, FIRST_COMPLETED)
+                    if progress:
+                        progress(done, total)
+
+                target = os.path.join(workdir, f"{index:06d}.pdf")
+                future = pool.submit(_write_pdf, render_issue_html(issue), base_url, target)
+                pending[future] = index
+
+            while pending:
+                done += _collect(pending, paths, FIRST_COMPLETED)
+                if progress:
+                    progress(done, total)
+
+        if fmt == 'zip':
+            with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as archive:
+                for issue, path in zip(issues, paths):
+                    archive.write(path, issue_pdf_filename(issue))
+        else:
+            from pypdf import PdfWriter
+
+            writer = PdfWriter()
+            for path in paths:
+                writer.append(path)
+            writer.write(output)
+            writer.close()
+
+    output.seek(0)
+    return output
+
+
+def _collect(pending, paths, return_when):
+    finished, _ = wait(pending, return_when=return_when)
+    for future in finished:
+        paths[pending.pop(future)] = future.result()
+    return len(finished)
+
+
+# On-disk cache of rendered issue PDFs.
+#
+# Files live at "<issue hash>/<content key>.pdf". The content key covers the
+# issue id, its updated_at, the printed petitioner name and a hash of the PDF
+# template, so an edited issue, bank or template simply misses; each issue's
+# own directory lets save/delete drop its stale copies without listing the
+# whole cache.
+# Hits refresh the file mtime, which drives least-recently-used eviction once
+# the cache grows past PDF_CACHE_MAX_BYTES. Eviction has to walk everything,
+# so it runs once every PDF_CACHE_EVICT_EVERY stores per process.
+@lru_cache(maxsize=1)
+def _template_hash():
+    digest = hashlib.sha256(str(settings.PDF_CACHE_VERSION).encode())
+    digest.update(get_template("issue_pdf.html").template.source.encode())
+    with open(STYLESHEET_PATH, 'rb') as fh:
+        digest.update(fh.read())
+    return digest.hexdigest()
+
+
+def _issue_dir(issue_pk):
+    return os.path.join(settings.PDF_CACHE_DIR, hashlib.sha1(str(issue_pk).encode()).hexdigest()[:16])
+
+
+def issue_pdf_key(issue):
+    raw = f"{issue.pk}|{issue.updated_at.isoformat()}|{issue.petitioner}|{_template_hash()}"
+    return hashlib.sha256(raw.encode()).hexdigest()[:32]
+
+
+def _cache_path(issue):
+    return os.path.join(_issue_dir(issue.pk), f"{issue_pdf_key(issue)}.pdf")
+
+
+# Return the path of the cached PDF for an issue, rendering it on a miss.
+# WeasyPrint runs in the bounded render pool, so the event loop keeps
+# serving other requests meanwhile. The template render and the cache
+# directory scans in _store() block too, so they run in threads; only the
+# single-stat hit check stays on the loop.
+async def acached_issue_pdf(issue, base_url):
+    path = _cache_hit(issue)
+    if path:
+        return path
+
+    html = await sync_to_async(render_issue_html)(issue)
+    tmp_path = _reserve_tmp()
+    loop = asyncio.get_running_loop()
+    try:
+        timings = await loop.run_in_executor(render_executor(), _write_pdf_timed, html, base_url, tmp_path)
+    except BaseException:
+        _remove(tmp_path)
+        raise
+    metrics.record(timings)
+    return await sync_to_async(_store, thread_sensitive=False)(issue, tmp_path)
+
+
+_render_executor = None
+
+
+# At most PDF_RENDER_WORKERS single-issue renders run at once; further
+# requests wait in the executor queue
+def render_executor():
+    global _render_executor
+    if _render_executor is None:
+        _render_executor = ProcessPoolExecutor(
+            max_workers=settings.PDF_RENDER_WORKERS,
+            max_tasks_per_child=settings.ISSUE_BATCH_PRINT_TASKS_PER_CHILD,
+            initializer=_warm_up_worker,
+        )
+    return _render_executor
+
+
+# A forked child (a gunicorn --preload worker, say) inherits the executor
+# object but not its management thread or the pipes to its processes, so it
+# would hang on the first submit. Children start their own pool on first use.
+def _forget_render_executor():
+    global _render_executor
+    _render_executor = None
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_forget_render_executor)
+
+
+# Start-up hook for web workers (firm/asgi.py, firm/wsgi.py): start the
+# render pool now so its processes have the engine and fonts loaded before
+# the first print request arrives
+def start_render_pool():
+    executor = render_executor()
+    for _ in range(settings.PDF_RENDER_WORKERS):
+        executor.submit(os.getpid)
+
+
+def _cache_hit(issue):
+    path = _cache_path(issue)
+    try:
+        os.utime(path)
+        return path
+    except FileNotFoundError:
+        return None
+
+
+def _reserve_tmp():
+    os.makedirs(settings.PDF_CACHE_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=settings.PDF_CACHE_DIR, suffix='.tmp')
+    os.close(fd)
+    return tmp_path
+
+
+_stores = itertools.count(1)
+
+
+def _store(issue, tmp_path):
+    path = _cache_path(issue)
+    invalidate_issue_pdfs(issue.pk)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    try:
+        os.replace(tmp_path, path)
+    except FileNotFoundError:
+        # Another process dropped the (still empty) directory in between
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(tmp_path, path)
+    if next(_stores) % settings.PDF_CACHE_EVICT_EVERY == 0:
+        evict_pdf_cache()
+    return path
+
+
+# Drop an issue's cached PDFs; only its own directory is listed
+def invalidate_issue_pdfs(issue_pk):
+    directory = _issue_dir(issue_pk)
+    try:
+        entries = list(os.scandir(directory))
+    except FileNotFoundError:
+        return
+    for entry in entries:
+        _remove(entry.path)
+    try:
+        os.rmdir(directory)
+    except OSError:
+        pass
+
+
+def invalidate_many_issue_pdfs(issue_pks):
+    for issue_pk in issue_pks:
+        invalidate_issue_pdfs(issue_pk)
+
+
+# Drop least recently served PDFs until the cache fits PDF_CACHE_MAX_BYTES.
+# PDFs left at the top level by the older flat layout are counted too, so
+# they age out like the rest.
+def evict_pdf_cache():
+    files = []
+    total = 0
+    try:
+        entries = list(os.scandir(settings.PDF_CACHE_DIR))
+    except FileNotFoundError:
+        return
+    for entry in entries:
+        for pdf in os.scandir(entry.path) if entry.is_dir() else [entry]:
+            if pdf.name.endswith('.pdf'):
+                stat = pdf.stat()
+                files.append((stat.st_mtime, stat.st_size, pdf.path))
+                total += stat.st_size
+
+    files.sort()
+    for _, size, path in files:
+        if total <= settings.PDF_CACHE_MAX_BYTES:
+            break
+        if _remove(path):
+            total -= size
+
+
+def _remove(path):
+    # A PDF still being streamed cannot be removed on Windows; it is retried
+    # on the next eviction pass.
+    try:
+        os.remove(path)
+        return True
+    except FileNotFoundError:
+        return True
+    except OSError:
+        return False
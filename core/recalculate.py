@@ -0,0 +1,129 @@
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import django
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Issue
+from .page_cache import bump_detail_generation
+from .summary import SUMMARY_AMOUNTS, apply_bucket_deltas
+
+
+INPUT_FIELDS = [
+    'id', 'petitioner_id', 'status', 'principal_amount', 'interest_rate', 'prepaid_amount', 'claimed_amount',
+    'tax_rate', 'issue_date_bs', 'final_date_bs',
+]
+DERIVED_FIELDS = [
+    'issue_date', 'final_date', 'total_days', 'interest_amount',
+    'total_amount', 'tax_revenue_amount', 'payable_amount',
+]
+
+
+def written_fields(final_date_bs=None):
+    return (['final_date_bs'] if final_date_bs else []) + DERIVED_FIELDS
+
+
+# Recompute one chunk of rows (plain dicts from .values()) and return
+# (changes, errors). changes holds (pk, {field: (old, new)}) for every row
+# whose stored values differ from a fresh calculation; the diff always lists
+# all written fields so it can be saved as is. Runs in worker processes too,
+# so it only builds unsaved Issue instances and never queries.
+def recalculate_rows(rows, final_date_bs=None):
+    changes = []
+    errors = []
+    fields = written_fields(final_date_bs)
+    for row in rows:
+        issue = Issue(**row)
+        if final_date_bs:
+            issue.final_date_bs = final_date_bs
+        try:
+            issue.calculate()
+        except (ValueError, OverflowError, TypeError) as e:
+            errors.append((row['id'], str(e.args[0] if e.args else e)))
+            continue
+        diff = {field: (row[field], getattr(issue, field)) for field in fields}
+        if any(old != new for old, new in diff.values()):
+            changes.append((row['id'], diff))
+    return changes, errors
+
+
+# Keyset walk over the primary key, so writing a chunk back never disturbs
+# the read of the next one
+def _chunks(queryset, chunk_size):
+    rows = queryset.order_by('pk').values(*INPUT_FIELDS, *DERIVED_FIELDS)
+    chunk = list(rows[:chunk_size])
+    while chunk:
+        yield chunk
+        chunk = list(rows.filter(pk__gt=chunk[-1]['id'])[:chunk_size])
+
+
+# Recompute the stored interest/tax/payable fields for a whole queryset.
+#
+# Rows are read in chunks, recomputed (in a process pool when workers > 1)
+# and only the rows that actually change are written back with bulk_update,
+# one transaction per chunk. final_date_bs moves every row to a common final
+# date first. on_change(pk, diff) and on_error(pk, message) receive each
+# changed or broken row and progress(checked) runs after every chunk; with
+# dry_run nothing is written.
+def recalculate_issues(queryset, final_date_bs=None, chunk_size=1000, workers=1,
+                       dry_run=False, on_change=None, on_error=None, progress=None):
+    totals = {'checked': 0, 'changed': 0, 'errors': 0}
+
+    def apply(chunk, result):
+        changes, errors = result
+        totals['checked'] += len(chunk)
+        totals['changed'] += len(changes)
+        totals['errors'] += len(errors)
+        for pk, message in errors:
+            if on_error:
+                on_error(pk, message)
+        for pk, diff in changes:
+            if on_change:
+                on_change(pk, diff)
+        if changes and not dry_run:
+            buckets = {row['id']: (row['petitioner_id'], row['status']) for row in chunk}
+            _write(changes, written_fields(final_date_bs), buckets)
+        if progress:
+            progress(totals['checked'])
+
+    if workers <= 1:
+        for chunk in _chunks(queryset, chunk_size):
+            apply(chunk, recalculate_rows(chunk, final_date_bs))
+        return totals
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as pool:
+        pending = {}
+        for chunk in _chunks(queryset, chunk_size):
+            if len(pending) >= workers * 2:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    apply(pending.pop(future), future.result())
+            pending[pool.submit(recalculate_rows, chunk, final_date_bs)] = chunk
+        for future in pending:
+            apply(pending[future], future.result())
+    return totals
+
+
+# bulk_update fires no signals, so the summary buckets (keyed by the
+# unchanged petitioner and status) get the amount deltas here, and cached
+# issue pages are expired with one detail generation bump per chunk
+def _write(changes, fields, buckets):
+    now = timezone.now()
+    issues = []
+    deltas = {}
+    for pk, diff in changes:
+        issue = Issue(pk=pk, updated_at=now)
+        for field, (_, new) in diff.items():
+            setattr(issue, field, new)
+        issues.append(issue)
+
+        delta = deltas.setdefault(buckets[pk], {field: 0 for field in SUMMARY_AMOUNTS})
+        for field in SUMMARY_AMOUNTS:
+            if field in diff:
+                old, new = diff[field]
+                delta[field] += (new or 0) - (old or 0)
+
+    with transaction.atomic():
+        Issue.objects.bulk_update(issues, fields + ['updated_at'])
+        apply_bucket_deltas(deltas)
+        transaction.on_commit(bump_detail_generation)
@@ -0,0 +1,135 @@
+# Full-text issue search backed by an SQLite FTS5 table.
+#
+# core_issue_fts holds one row per issue: its id and a single normalized
+# text made of the id, title, defendant and petitioner bank name. The table
+# uses the trigram tokenizer, since unicode61 treats Devanagari vowel signs
+# as separators and would split every word; trigrams also give substring
+# matches. Terms shorter than three characters fall back to LIKE over the
+# same (small) table. On other databases search degrades to icontains.
+#
+# FTS5 cannot index issue_id, so finding an issue's row by it scans the
+# whole table. core_issue_fts_key gives every issue a fixed integer key
+# (indexed by issue_id) that is also the rowid of its FTS row, and rows are
+# replaced and deleted by rowid.
+
+import re
+import unicodedata
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .utils.nepali_numerals import to_ascii
+
+
+FTS_TABLE = 'core_issue_fts'
+KEY_TABLE = 'core_issue_fts_key'
+
+# Spelling variants that should match each other: chandrabindu/anusvara,
+# nukta forms, and the invisible joiners some keyboards insert
+_VARIANTS = str.maketrans({
+    'ँ': 'ं',
+    '़': None,
+    '‌': None,
+    '‍': None,
+})
+
+
+def normalize(text):
+    text = unicodedata.normalize('NFD', str(text or ''))
+    text = to_ascii(text.translate(_VARIANTS))
+    return unicodedata.normalize('NFC', text).casefold()
+
+
+def search_enabled():
+    return connection.vendor == 'sqlite'
+
+
+def document(issue, petitioner_name=None):
+    if petitioner_name is None and issue.petitioner_id:
+        petitioner_name = issue.petitioner.name
+    return normalize(' '.join(filter(None, [issue.id, issue.title, issue.defendant, petitioner_name])))
+
+
+# Delete the FTS rows of the given issue ids, by rowid through their keys
+def _delete_rows(cursor, pks):
+    cursor.executemany(
+        f"DELETE FROM {FTS_TABLE} WHERE rowid = (SELECT id FROM {KEY_TABLE} WHERE issue_id = %s)",
+        [(pk,) for pk in pks],
+    )
+
+
+# (Re)index issues. They should come with select_related('petitioner'), or
+# bank_names ({bank id: name}) saves the per-issue bank lookup. Pass
+# replace=False for issues known to have no index row yet to skip the
+# deletes.
+def index_issues(issues, bank_names=None, replace=True):
+    if not search_enabled():
+        return
+    bank_names = bank_names or {}
+    rows = [(issue.pk, document(issue, bank_names.get(issue.petitioner_id))) for issue in issues]
+    if not rows:
+        return
+    with connection.cursor() as cursor:
+        if replace:
+            _delete_rows(cursor, [pk for pk, _ in rows])
+        cursor.executemany(f"INSERT OR IGNORE INTO {KEY_TABLE} (issue_id) VALUES (%s)", [(pk,) for pk, _ in rows])
+        cursor.executemany(
+            f"INSERT INTO {FTS_TABLE} (rowid, issue_id, content) "
+            f"SELECT id, issue_id, %s FROM {KEY_TABLE} WHERE issue_id = %s",
+            [(content, pk) for pk, content in rows],
+        )
+
+
+def unindex_issue(pk):
+    if search_enabled():
+        with connection.cursor() as cursor:
+            _delete_rows(cursor, [pk])
+            cursor.execute(f"DELETE FROM {KEY_TABLE} WHERE issue_id = %s", [pk])
+
+
+def rebuild_index(chunk_size=2000):
+    from .models import Issue
+
+    if not search_enabled():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        cursor.execute(f"DELETE FROM {KEY_TABLE}")
+    count = 0
+    batch = []
+    for issue in Issue.objects.select_related('petitioner').iterator(chunk_size=chunk_size):
+        batch.append(issue)
+        if len(batch) == chunk_size:
+            index_issues(batch, replace=False)
+            count += len(batch)
+            batch = []
+    index_issues(batch, replace=False)
+    return count + len(batch)
+
+
+# Narrow a queryset to issues matching every whitespace-separated term
+def search_issues(queryset, text):
+    terms = normalize(text).split()
+    if not terms:
+        return queryset
+    if not search_enabled():
+        for term in terms:
+            queryset = queryset.filter(
+                Q(id__icontains=term) | Q(title__icontains=term)
+                | Q(defendant__icontains=term) | Q(petitioner__name__icontains=term)
+            )
+        return queryset
+
+    long_terms = [term for term in terms if len(term) >= 3]
+    where = []
+    params = []
+    if long_terms:
+        where.append('content MATCH %s')
+        params.append(' AND '.join('"%s"' % term.replace('"', '""') for term in long_terms))
+    for term in terms:
+        if len(term) < 3:
+            where.append(r"content LIKE %s ESCAPE '\'")
+            params.append('%' + re.sub(r'([\\%_])', r'\\\1', term) + '%')
+    sql = f"SELECT issue_id FROM {FTS_TABLE} WHERE " + ' AND '.join(where)
+    return queryset.filter(pk__in=RawSQL(sql, params))
@@ -0,0 +1,160 @@
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import metrics
+
+from .bank_index import bump_bank_index_version
+from .jobs import remove_job_files
+from .models import Bank, Issue, IssueSummary, Job
+from .page_cache import bump_detail_generation, bump_issue_version, bump_list_version
+from .paginator import bump_count_version
+from .pdf import invalidate_issue_pdfs, invalidate_many_issue_pdfs
+from .search import index_issues, unindex_issue
+from .summary import SUMMARY_AMOUNTS, SUMMARY_FIELDS, apply_bucket_deltas, apply_issue_change, summary_values
+
+
+# Drop cached PDFs as soon as an issue changes or goes away
+@receiver(post_save, sender=Issue)
+@receiver(post_delete, sender=Issue)
+def drop_issue_pdfs(sender, instance, **kwargs):
+    invalidate_issue_pdfs(instance.pk)
+
+
+# Bank handlers below only act on a rename; the stored name is read back
+# before it is overwritten
+@receiver(pre_save, sender=Bank)
+def remember_bank_name(sender, instance, raw=False, **kwargs):
+    instance._name_old = None
+    if not raw and instance.pk:
+        instance._name_old = Bank.objects.filter(pk=instance.pk).values_list('name', flat=True).first()
+
+
+def bank_renamed(instance, created):
+    return not created and getattr(instance, '_name_old', None) != instance.name
+
+
+# A renamed bank changes the PDF key of its issues; free the old files
+@receiver(post_save, sender=Bank)
+def drop_bank_issue_pdfs(sender, instance, created, **kwargs):
+    if bank_renamed(instance, created):
+        invalidate_many_issue_pdfs(Issue.objects.filter(petitioner=instance).values_list('pk', flat=True))
+
+
+# Cached changelist counts are versioned on rows being added or removed;
+# edits are left to the count's timeout (see core.paginator)
+@receiver(post_save, sender=Issue)
+def bump_issue_count_on_create(sender, instance, created, **kwargs):
+    if created:
+        bump_count_version()
+
+
+@receiver(post_delete, sender=Issue)
+def bump_issue_count_on_delete(sender, instance, **kwargs):
+    bump_count_version()
+
+
+# Summary buckets move by the difference between the stored row and the saved
+# one, so the pre-save state is read back before it is overwritten
+@receiver(pre_save, sender=Issue)
+def remember_issue_summary(sender, instance, raw=False, **kwargs):
+    instance._summary_old = None
+    if not raw and instance.pk:
+        instance._summary_old = Issue.objects.filter(pk=instance.pk).values(*SUMMARY_FIELDS).first()
+
+
+@receiver(post_save, sender=Issue)
+def update_issue_summary(sender, instance, raw=False, **kwargs):
+    if not raw:
+        apply_issue_change(getattr(instance, '_summary_old', None), summary_values(instance))
+
+
+@receiver(post_delete, sender=Issue)
+def drop_issue_summary(sender, instance, **kwargs):
+    apply_issue_change(summary_values(instance), None)
+
+
+# Deleting a bank nulls its issues' petitioner with a plain UPDATE; fold its
+# buckets into the no-bank ones before they cascade away
+@receiver(pre_delete, sender=Bank)
+def fold_bank_summary(sender, instance, **kwargs):
+    deltas = {}
+    for row in IssueSummary.objects.filter(petitioner=instance).values('status', 'issue_count', *SUMMARY_AMOUNTS):
+        deltas[(None, row.pop('status'))] = row
+    apply_bucket_deltas(deltas)
+
+
+# Keep the full-text index in step with the indexed fields
+@receiver(post_save, sender=Issue)
+def index_issue(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_issues([instance])
+
+
+@receiver(post_delete, sender=Issue)
+def unindex_deleted_issue(sender, instance, **kwargs):
+    unindex_issue(instance.pk)
+
+
+# Issue documents carry the bank name, so only a rename changes them
+@receiver(post_save, sender=Bank)
+def reindex_bank_issues(sender, instance, created, **kwargs):
+    if bank_renamed(instance, created):
+        index_issues(Issue.objects.filter(petitioner=instance).select_related('petitioner'))
+
+
+# The bank name drops out of its issues' documents once they are detached
+@receiver(pre_delete, sender=Bank)
+def remember_bank_issues(sender, instance, **kwargs):
+    instance._issue_pks = list(Issue.objects.filter(petitioner=instance).values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Bank)
+def reindex_detached_issues(sender, instance, **kwargs):
+    index_issues(Issue.objects.filter(pk__in=getattr(instance, '_issue_pks', [])))
+
+
+# Bank autocomplete indexes are rebuilt lazily once the version moves
+@receiver(post_save, sender=Bank)
+@receiver(post_delete, sender=Bank)
+def invalidate_bank_index(sender, **kwargs):
+    bump_bank_index_version()
+
+
+# Cached pages: new versions are published on commit, so a request that
+# reads in between cannot cache the old rows under the new version
+@receiver(post_save, sender=Issue)
+@receiver(post_delete, sender=Issue)
+def expire_issue_pages(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: bump_issue_version(pk))
+
+
+# Issue pages show the bank name, and list filters match on it. A new bank
+# has no issues yet but shows up in the filter; only a rename changes pages.
+@receiver(post_save, sender=Bank)
+def expire_bank_pages(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(bump_list_version)
+    elif bank_renamed(instance, created):
+        transaction.on_commit(bump_detail_generation)
+
+
+@receiver(post_delete, sender=Bank)
+def expire_detached_issue_pages(sender, instance, **kwargs):
+    if getattr(instance, '_issue_pks', None):
+        transaction.on_commit(bump_detail_generation)
+
+
+# Result files go with their job
+@receiver(post_delete, sender=Job)
+def drop_job_files(sender, instance, **kwargs):
+    remove_job_files(instance.pk)
+
+
+# Every connection reports query times to the request being served
+@receiver(connection_created)
+def time_queries(sender, connection, **kwargs):
+    if metrics.query_timer not in connection.execute_wrappers:
+        connection.execute_wrappers.append(metrics.query_timer)
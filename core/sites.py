@@ -0,0 +1,87 @@
+import hashlib
+from functools import update_wrapper
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.contrib import admin
+from django.contrib.admin.apps import AdminConfig
+from django.contrib.admin.views.autocomplete import AutocompleteJsonView
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponseRedirect, JsonResponse
+from django.urls import path, reverse
+from django.utils.cache import get_conditional_response
+from django.views.decorators.cache import never_cache
+from django.views.decorators.csrf import csrf_protect
+
+from .bank_index import get_bank_index
+
+
+# Bank lookups are answered from the in-memory bank index instead of a
+# search query; the response carries an ETag over the index contents, term
+# and page, so repeated keystrokes revalidate with a 304.
+class CachedAutocompleteJsonView(AutocompleteJsonView):
+    def get(self, request, *args, **kwargs):
+        from .models import Bank
+
+        term, model_admin, source_field, to_field_name = self.process_request(request)
+        if model_admin.model is not Bank or to_field_name != Bank._meta.pk.attname:
+            return super().get(request, *args, **kwargs)
+
+        self.term, self.model_admin, self.source_field = term, model_admin, source_field
+        if not self.has_perm(request):
+            raise PermissionDenied
+
+        try:
+            page = max(int(request.GET.get('page', 1)), 1)
+        except ValueError:
+            page = 1
+        index = get_bank_index()
+        etag = '"%s"' % hashlib.sha1(f"{index.digest}|{term}|{page}".encode()).hexdigest()
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            pks = index.search(term, limit=page * self.paginate_by + 1)
+            shown = pks[(page - 1) * self.paginate_by:page * self.paginate_by]
+            response = JsonResponse({
+                'results': [{'id': str(pk), 'text': index.names[pk]} for pk in shown],
+                'pagination': {'more': len(pks) > page * self.paginate_by},
+            })
+        response.headers['ETag'] = etag
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+
+
+class FirmAdminSite(admin.AdminSite):
+    def autocomplete_view(self, request):
+        return CachedAutocompleteJsonView.as_view(admin_site=self)(request)
+
+    # Same checks as AdminSite.admin_view, but async views stay async so
+    # they do not tie up the shared sync thread under ASGI
+    def admin_view(self, view, cacheable=False):
+        if not iscoroutinefunction(view):
+            return super().admin_view(view, cacheable)
+
+        async def inner(request, *args, **kwargs):
+            if not await sync_to_async(self.has_permission)(request):
+                if request.path == reverse('admin:logout', current_app=self.name):
+                    return HttpResponseRedirect(reverse('admin:index', current_app=self.name))
+                from django.contrib.auth.views import redirect_to_login
+
+                return redirect_to_login(request.get_full_path(), reverse('admin:login', current_app=self.name))
+            return await view(request, *args, **kwargs)
+
+        if not cacheable:
+            inner = never_cache(inner)
+        if not getattr(view, 'csrf_exempt', False):
+            inner = csrf_protect(inner)
+        return update_wrapper(inner, view)
+
+    # The stock route is wrapped in never_cache, whose no-store would stop
+    # browsers from keeping responses to revalidate
+    def get_urls(self):
+        return [
+            path('autocomplete/', self.admin_view(self.autocomplete_view, cacheable=True), name='autocomplete'),
+        ] + super().get_urls()
+
+
+# Replaces django.contrib.admin in INSTALLED_APPS so admin.site is ours
+class FirmAdminConfig(AdminConfig):
+    default_site = 'core.sites.FirmAdminSite'
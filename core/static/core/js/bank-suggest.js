@@ -0,0 +1,26 @@
+// Bank name suggestions for <input data-suggest-url list="...">: one delegated
+// listener fills each input's <datalist> from the bank index as the user types.
+(function() {
+    'use strict';
+
+    var timers = new WeakMap();
+
+    document.addEventListener('input', function(event) {
+        var input = event.target;
+        if (!input.matches || !input.matches('input[data-suggest-url]')) return;
+
+        clearTimeout(timers.get(input));
+        timers.set(input, setTimeout(function() {
+            fetch(input.dataset.suggestUrl + '?q=' + encodeURIComponent(input.value))
+                .then(function(response) { return response.json(); })
+                .then(function(data) {
+                    var options = document.getElementById(input.getAttribute('list'));
+                    options.replaceChildren.apply(options, data.results.map(function(bank) {
+                        var option = document.createElement('option');
+                        option.value = bank.text;
+                        return option;
+                    }));
+                });
+        }, 150));
+    });
+})();
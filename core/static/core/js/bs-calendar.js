@@ -0,0 +1,135 @@
+// Bikram Sambat month lengths, 1975..2100 BS, copied from the table
+// nepali_datetime ships (the same one core.utils.bs_calendar is built from;
+// a test keeps the two in step). Day 1 = 1975-01-01 BS = 1918-04-13 AD.
+window.BS_CALENDAR = {
+    minYear: 1975,
+    referenceAd: [1918, 4, 13],
+    monthLengths: [
+        [31, 31, 32, 32, 31, 30, 30, 29, 30, 29, 30, 30],
+        [31, 32, 31, 32, 31, 30, 30, 30, 29, 29, 30, 31],
+        [30, 32, 31, 32, 31, 30, 30, 30, 29, 30, 29, 31],
+        [31, 31, 32, 31, 31, 31, 30, 29, 30, 29, 30, 30],
+        [31, 31, 32, 32, 31, 30, 30, 29, 30, 29, 30, 30],
+        [31, 32, 31, 32, 31, 30, 30, 30, 29, 29, 30, 31],
+        [31, 31, 31, 32, 31, 31, 29, 30, 30, 29, 30, 30],
+        [31, 31, 32, 31, 31, 31, 30, 29, 30, 29, 30, 30],
+        [31, 31, 32, 32, 31, 30, 30, 29, 30, 29, 30, 30],
+        [31, 32, 31, 32, 31, 30, 30, 30, 29, 29, 30, 31],
+        [31, 31, 31, 32, 31, 31, 29, 30, 30, 29, 30, 30],
+        [31, 31, 32, 31, 31, 31, 30, 29, 30, 29, 30, 30],
+        [31, 32, 31, 32, 31, 30, 30, 29, 30, 29, 30, 30],
+        [31, 32, 31, 32, 31, 30, 30, 30, 29, 29, 30, 31],
+        [31, 31, 31, 32, 31, 31, 29, 30, 30, 29, 30, 30],
+        [31, 31, 32, 31, 31, 31, 30, 29, 30, 29, 30, 30],
+        [31, 32, 31, 32, 31, 30, 30, 30, 29, 29, 30, 30],
+        [31, 32, 31, 32, 31, 30, 30, 30, 29, 30, 29, 31],
+        [31, 31, 32, 31, 31, 31, 30, 29, 30, 29, 30, 30],
+        [31, 31, 32, 31, 31, 31, 30, 29, 30, 29, 30, 30],
+        [31, 32, 31, 32, 31, 30, 30, 30, 29, 29, 30, 30],
+        [31, 32, 31, 32, 31, 30, 30, 30, 29, 30, 29, 31],
+        [31, 31, 32, 31, 31, 31, 30, 29, 30, 29, 30, 30],
+        [31, 31, 32, 31, 31, 31, 30, 29, 30, 29, 30, 30],
+        [31, 32, 31, 32, 31, 30, 30, 30, 29, 29, 30, 31],
+        [30, 32, 31, 32, 31, 30, 30, 30, 29, 30, 29, 31],
+        [31, 31, 32, 31, 31, 31, 30, 29, 30, 29, 30, 30],
+        [31, 31, 32, 32, 31, 30, 30, 29, 30, 29, 30, 30],
+        [31, 32, 31, 32, 31, 30, 30, 30, 29, 29, 30, 31],
+        [30, 32, 31, 32, 31, 30, 30, 30, 29, 30, 29, 31],
+        [31, 31, 32, 31, 31, 31, 30, 29, 30, 29, 30, 30],
+        [31, 31, 32, 32, 31, 30, 30, 29, 30, 29, 30, 30],
+        [31, 32, 31, 32, 31, 30, 30, 30, 29, 29, 30, 31],
+        [31, 31, 31, 32, 31, 31, 29, 30, 30, 29, 29, 31],
+        [31, 31, 32, 31, 31, 31, 30, 29, 30, 29, 30, 30],
+        [31, 31, 32, 32, 31, 30, 30, 29, 30, 29, 30, 30],
+        [31, 32, 31, 32, 31, 30, 30, 30, 29, 29, 30, 31],
+        [31, 31, 31, 32, 31, 31, 29, 30, 30, 29, 30, 30],
+        [31, 31, 32, 31, 31, 31, 30, 29, 30, 29, 30, 30],
+        [31, 31, 32, 32, 31, 30, 30, 29, 30, 29, 30, 30],
+        [31, 32, 31, 32, 31, 30, 30, 30, 29, 29, 30, 31],
+        [31, 31, 31, 32, 31, 31, 29, 30, 30, 29, 30, 30],
+        [31, 31, 32, 31, 31, 31, 30, 29, 30, 29, 30, 30],
+        [31, 32, 31, 32, 31, 30, 30, 29, 30, 29, 30, 30],
+        [31, 32, 31, 32, 31, 30, 30, 30, 29, 30, 29, 31],
+        [31, 31, 31, 32, 31, 31, 30, 29, 30, 29, 30, 30],
+        [31, 31, 32, 31, 31, 31, 30, 29, 30, 29, 30, 30],
+        [31, 32, 31, 32, 31, 30, 30, 30, 29, 29, 30, 30],
+        [31, 32, 31, 32, 31, 30, 30, 30, 29, 30, 29, 31],
+        [31, 31, 31, 32, 31, 31, 30, 29, 30, 29, 30, 30],
+        [31, 31, 32, 31, 31, 31, 30, 29, 30, 29, 30, 30],
+        [31, 32, 31, 32, 31, 30, 30, 30, 29, 29, 30, 31],
+        [30, 32, 31, 32, 31, 30, 30, 30, 29, 30, 29, 31],
+        [31, 31, 32, 31, 31, 31, 30, 29, 30, 29, 30, 30],
+        [31, 31, 32, 31, 32, 30, 30, 29, 30, 29, 30, 30],
+        [31, 32, 31, 32, 31, 30, 30, 30, 29, 29, 30, 31],
+        [30, 32, 31, 32, 31, 30, 30, 30, 29, 30, 29, 31],
+        [31, 31, 32, 31, 31, 31, 30, 29, 30, 29, 30, 30],
+        [31, 31, 32, 32, 31, 30, 30, 29, 30, 29, 30, 30],
+        [31, 32, 31, 32, 31, 30, 30, 30, 29, 29, 30, 31],
+        [30, 32, 31, 32, 31, 31, 29, 30, 30, 29, 29, 31],
+        [31, 31, 32, 31, 31, 31, 30, 29, 30, 29, 30, 30],
+        [31, 31, 32, 32, 31, 30, 30, 29, 30, 29, 30, 30],
+        [31, 32, 31, 32, 31, 30, 30, 30, 29, 29, 30, 31],
+        [31, 31, 31, 32, 31, 31, 29, 30, 30, 29, 30, 30],
+        [31, 31, 32, 31, 31, 31, 30, 29, 30, 29, 30, 30],
+        [31, 31, 32, 32, 31, 30, 30, 29, 30, 29, 30, 30],
+        [31, 32, 31, 32, 31, 30, 30, 30, 29, 29, 30, 31],
+        [31, 31, 31, 32, 31, 31, 29, 30, 30, 29, 30, 30],
+        [31, 31, 32, 31, 31, 31, 30, 29, 30, 29, 30, 30],
+        [31, 32, 31, 32, 31, 30, 30, 29, 30, 29, 30, 30],
+        [31, 32, 31, 32, 31, 30, 30, 30, 29, 29, 30, 31],
+        [31, 31, 31, 32, 31, 31, 30, 29, 30, 29, 30, 30],
+        [31, 31, 32, 31, 31, 31, 30, 29, 30, 29, 30, 30],
+        [31, 32, 31, 32, 31, 30, 30, 30, 29, 29, 30, 30],
+        [31, 32, 31, 32, 31, 30, 30, 30, 29, 30, 29, 31],
+        [31, 31, 31, 32, 31, 31, 30, 29, 30, 29, 30, 30],
+        [31, 31, 32, 31, 31, 31, 30, 29, 30, 29, 30, 30],
+        [31, 32, 31, 32, 31, 30, 30, 30, 29, 29, 30, 30],
+        [31, 32, 31, 32, 31, 30, 30, 30, 29, 30, 29, 31],
+        [31, 31, 32, 31, 31, 31, 30, 29, 30, 29, 30, 30],
+        [31, 31, 32, 31, 32, 30, 30, 29, 30, 29, 30, 30],
+        [31, 32, 31, 32, 31, 30, 30, 30, 29, 29, 30, 31],
+        [30, 32, 31, 32, 31, 30, 30, 30, 29, 30, 29, 31],
+        [31, 31, 32, 31, 31, 31, 30, 29, 30, 29, 30, 30],
+        [31, 31, 32, 32, 31, 30, 30, 29, 30, 29, 30, 30],
+        [31, 32, 31, 32, 31, 30, 30, 30, 29, 29, 30, 31],
+        [31, 31, 31, 32, 31, 31, 29, 30, 29, 30, 29, 31],
+        [31, 31, 32, 31, 31, 31, 30, 29, 30, 29, 30, 30],
+        [31, 31, 32, 32, 31, 30, 30, 29, 30, 29, 30, 30],
+        [31, 32, 31, 32, 31, 30, 30, 30, 29, 29, 30, 31],
+        [31, 31, 31, 32, 31, 31, 29, 30, 30, 29, 29, 31],
+        [31, 31, 32, 31, 31, 31, 30, 29, 30, 29, 30, 30],
+        [31, 31, 32, 32, 31, 30, 30, 29, 30, 29, 30, 30],
+        [31, 32, 31, 32, 31, 30, 30, 30, 29, 29, 30, 31],
+        [31, 31, 31, 32, 31, 31, 29, 30, 30, 29, 30, 30],
+        [31, 31, 32, 31, 31, 31, 30, 29, 30, 29, 30, 30],
+        [31, 32, 31, 32, 31, 30, 30, 29, 30, 29, 30, 30],
+        [31, 32, 31, 32, 31, 30, 30, 30, 29, 29, 30, 31],
+        [31, 31, 31, 32, 31, 31, 30, 29, 30, 29, 30, 30],
+        [31, 31, 32, 31, 31, 31, 30, 29, 30, 29, 30, 30],
+        [31, 32, 31, 32, 31, 30, 30, 30, 29, 29, 30, 30],
+        [31, 32, 31, 32, 31, 30, 30, 30, 29, 30, 29, 31],
+        [31, 31, 31, 32, 31, 31, 30, 29, 30, 29, 30, 30],
+        [31, 31, 32, 31, 31, 31, 30, 29, 30, 29, 30, 30],
+        [31, 32, 31, 32, 31, 30, 30, 30, 29, 29, 30, 30],
+        [31, 32, 31, 32, 31, 30, 30, 30, 29, 30, 29, 31],
+        [31, 31, 32, 31, 31, 31, 30, 29, 30, 29, 30, 30],
+        [31, 31, 32, 31, 31, 30, 30, 30, 29, 30, 30, 30],
+        [31, 31, 32, 31, 31, 30, 30, 30, 29, 30, 30, 30],
+        [31, 32, 31, 32, 30, 31, 30, 30, 29, 30, 30, 30],
+        [30, 32, 31, 32, 31, 30, 30, 30, 29, 30, 30, 30],
+        [31, 31, 32, 31, 31, 31, 30, 29, 30, 30, 30, 30],
+        [30, 31, 32, 32, 30, 31, 30, 30, 29, 30, 30, 30],
+        [30, 32, 31, 32, 31, 30, 30, 30, 29, 30, 30, 30],
+        [30, 32, 31, 32, 31, 30, 30, 30, 29, 30, 30, 30],
+        [31, 31, 32, 31, 31, 31, 30, 30, 29, 30, 30, 30],
+        [30, 31, 32, 32, 31, 30, 30, 30, 29, 30, 30, 30],
+        [30, 32, 31, 32, 31, 30, 30, 30, 29, 30, 30, 30],
+        [31, 31, 32, 31, 31, 30, 30, 30, 29, 30, 30, 30],
+        [31, 31, 32, 31, 31, 31, 30, 29, 30, 30, 30, 30],
+        [30, 31, 32, 32, 31, 30, 30, 29, 30, 29, 30, 30],
+        [31, 32, 31, 32, 31, 30, 30, 30, 29, 30, 30, 30],
+        [31, 31, 32, 31, 31, 31, 29, 30, 29, 30, 29, 31],
+        [31, 31, 32, 31, 31, 31, 30, 29, 29, 30, 30, 30],
+        [31, 32, 31, 32, 30, 31, 30, 29, 30, 29, 30, 30],
+    ]
+};
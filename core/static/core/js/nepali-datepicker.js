@@ -0,0 +1,191 @@
+// Bikram Sambat date picker for <input class="nepali-datepicker">.
+//
+// One delegated listener on the document serves every such input on the
+// page, including ones added later (admin inlines), so widgets need no
+// per-field script. Values are written as ASCII "YYYY-MM-DD", the format the
+// forms store. Month lengths come from bs-calendar.js.
+(function() {
+    'use strict';
+
+    var cal = window.BS_CALENDAR;
+    var DIGITS = '०१२३४५६७८९';
+    var MONTHS = ['बैशाख', 'जेठ', 'असार', 'साउन', 'भदौ', 'असोज', 'कार्तिक', 'मंसिर', 'पुस', 'माघ', 'फागुन', 'चैत'];
+    var WEEKDAYS = ['आ', 'सो', 'मं', 'बु', 'बि', 'शु', 'श'];
+    var DAY_MS = 86400000;
+    var maxYear = cal.minYear + cal.monthLengths.length - 1;
+    var referenceMs = Date.UTC(cal.referenceAd[0], cal.referenceAd[1] - 1, cal.referenceAd[2]);
+
+    var popup = null;
+    var target = null;
+    var shown = null;  // [year, month] on display
+
+    function nepali(n) {
+        return String(n).replace(/[0-9]/g, function(d) { return DIGITS[d]; });
+    }
+
+    function pad(n) {
+        return (n < 10 ? '0' : '') + n;
+    }
+
+    function daysIn(year, month) {
+        return cal.monthLengths[year - cal.minYear][month - 1];
+    }
+
+    // Day number with 1975-01-01 BS as day 1
+    function ordinal(year, month, day) {
+        var n = day;
+        for (var y = cal.minYear; y < year; y++) {
+            for (var m = 0; m < 12; m++) n += cal.monthLengths[y - cal.minYear][m];
+        }
+        for (var i = 1; i < month; i++) n += daysIn(year, i);
+        return n;
+    }
+
+    function fromOrdinal(n) {
+        for (var y = cal.minYear; y <= maxYear; y++) {
+            for (var m = 1; m <= 12; m++) {
+                var length = daysIn(y, m);
+                if (n <= length) return [y, m, n];
+                n -= length;
+            }
+        }
+        return null;
+    }
+
+    function today() {
+        var now = new Date();
+        var ms = Date.UTC(now.getFullYear(), now.getMonth(), now.getDate());
+        return fromOrdinal(Math.round((ms - referenceMs) / DAY_MS) + 1);
+    }
+
+    // Accepts ASCII or Devanagari digits; anything else yields null
+    function parse(text) {
+        var ascii = text.replace(/[०-९]/g, function(d) { return DIGITS.indexOf(d); });
+        var match = /^\s*(\d{4})-(\d{1,2})-(\d{1,2})\s*$/.exec(ascii);
+        if (!match) return null;
+        var y = +match[1], m = +match[2], d = +match[3];
+        if (y < cal.minYear || y > maxYear || m < 1 || m > 12 || d < 1 || d > daysIn(y, m)) return null;
+        return [y, m, d];
+    }
+
+    function element(tag, className, text) {
+        var el = document.createElement(tag);
+        if (className) el.className = className;
+        if (text !== undefined) el.textContent = text;
+        return el;
+    }
+
+    function select(className, first, last, current, label) {
+        var el = element('select', className);
+        for (var i = first; i <= last; i++) {
+            var option = element('option', null, label(i));
+            option.value = i;
+            option.selected = i === current;
+            el.appendChild(option);
+        }
+        return el;
+    }
+
+    function render() {
+        var year = shown[0], month = shown[1];
+        var selected = parse(target.value);
+        var now = today();
+        popup.replaceChildren();
+
+        var head = element('div', 'ndp-head');
+        head.appendChild(element('button', 'ndp-prev', '‹'));
+        head.appendChild(select('ndp-month', 1, 12, month, function(m) { return MONTHS[m - 1]; }));
+        head.appendChild(select('ndp-year', cal.minYear, maxYear, year, nepali));
+        head.appendChild(element('button', 'ndp-next', '›'));
+        popup.appendChild(head);
+
+        var grid = element('div', 'ndp-grid');
+        WEEKDAYS.forEach(function(name) { grid.appendChild(element('span', 'ndp-weekday', name)); });
+
+        var first = new Date(referenceMs + (ordinal(year, month, 1) - 1) * DAY_MS).getUTCDay();
+        for (var i = 0; i < first; i++) grid.appendChild(element('span'));
+        for (var day = 1; day <= daysIn(year, month); day++) {
+            var cell = element('button', 'ndp-day', nepali(day));
+            cell.type = 'button';
+            cell.dataset.day = day;
+            if (selected && selected[0] === year && selected[1] === month && selected[2] === day) {
+                cell.classList.add('ndp-selected');
+            }
+            if (now && now[0] === year && now[1] === month && now[2] === day) {
+                cell.classList.add('ndp-today');
+            }
+            grid.appendChild(cell);
+        }
+        popup.appendChild(grid);
+        head.querySelectorAll('button').forEach(function(button) { button.type = 'button'; });
+    }
+
+    function open(input) {
+        if (!cal) return;
+        if (!popup) {
+            popup = element('div', 'ndp-popup');
+            popup.addEventListener('mousedown', function(event) {
+                // Keep focus (and the popup) on the input while clicking inside
+                if (event.target.tagName !== 'SELECT') event.preventDefault();
+            });
+            popup.addEventListener('click', onPopupClick);
+            popup.addEventListener('change', onPopupChange);
+            document.body.appendChild(popup);
+        }
+        target = input;
+        var value = parse(input.value) || today() || [cal.minYear, 1, 1];
+        shown = [value[0], value[1]];
+        render();
+
+        var box = input.getBoundingClientRect();
+        popup.style.left = (box.left + window.scrollX) + 'px';
+        popup.style.top = (box.bottom + window.scrollY + 2) + 'px';
+        popup.hidden = false;
+    }
+
+    function close() {
+        if (popup) popup.hidden = true;
+        target = null;
+    }
+
+    function move(step) {
+        var index = shown[0] * 12 + shown[1] - 1 + step;
+        var year = Math.floor(index / 12);
+        if (year < cal.minYear || year > maxYear) return;
+        shown = [year, index % 12 + 1];
+        render();
+    }
+
+    function onPopupClick(event) {
+        var el = event.target;
+        if (el.classList.contains('ndp-prev')) {
+            move(-1);
+        } else if (el.classList.contains('ndp-next')) {
+            move(1);
+        } else if (el.dataset.day) {
+            target.value = shown[0] + '-' + pad(shown[1]) + '-' + pad(+el.dataset.day);
+            target.dispatchEvent(new Event('change', {bubbles: true}));
+            close();
+        }
+    }
+
+    function onPopupChange(event) {
+        if (event.target.classList.contains('ndp-month')) shown[1] = +event.target.value;
+        if (event.target.classList.contains('ndp-year')) shown[0] = +event.target.value;
+        render();
+    }
+
+    document.addEventListener('focusin', function(event) {
+        if (event.target.matches && event.target.matches('input.nepali-datepicker')) {
+            if (event.target !== target) open(event.target);
+        } else if (!popup || !popup.contains(event.target)) {
+            close();
+        }
+    });
+    document.addEventListener('mousedown', function(event) {
+        if (target && event.target !== target && !popup.contains(event.target)) close();
+    });
+    document.addEventListener('keydown', function(event) {
+        if (event.key === 'Escape' && target) close();
+    });
+})();
@@ -0,0 +1,58 @@
+import gzip
+import os
+
+import brotli
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+
+COMPRESSIBLE_EXTENSIONS = {'.css', '.js', '.json', '.map', '.svg', '.txt', '.html', '.xml', '.ttf', '.otf', '.ico'}
+# A variant is only kept when it saves at least this fraction of the original
+MIN_SAVING = 0.05
+
+
+# collectstatic writes content-hashed copies (as ManifestStaticFilesStorage
+# does) plus .br and .gz variants of every text-like file next to them, so
+# core.middleware.StaticFilesMiddleware can send them as they are.
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    # Files missing from STATIC_ROOT (collectstatic not run yet, as in tests)
+    # keep their plain names instead of failing the whole page
+    manifest_strict = False
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        names = set(paths) | set(self.hashed_files.values())
+        for name in sorted(names):
+            if os.path.splitext(name)[1].lower() in COMPRESSIBLE_EXTENSIONS:
+                for variant in self.compress(name):
+                    yield name, variant, True
+
+    def compress(self, name):
+        path = self.path(name)
+        if not os.path.exists(path):
+            return
+        with open(path, 'rb') as fh:
+            data = fh.read()
+        for suffix, encode in (('.gz', _gzip), ('.br', brotli.compress)):
+            target = path + suffix
+            if os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(path):
+                continue
+            encoded = encode(data)
+            if len(encoded) <= len(data) * (1 - MIN_SAVING):
+                with open(target, 'wb') as fh:
+                    fh.write(encoded)
+                yield name + suffix
+            elif os.path.exists(target):
+                os.remove(target)
+
+
+def _gzip(data):
+    # mtime=0 keeps the output identical between runs
+    return gzip.compress(data, compresslevel=9, mtime=0)
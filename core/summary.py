@@ -0,0 +1,81 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+
+from .models import Issue, IssueSummary
+
+
+SUMMARY_AMOUNTS = ['principal_amount', 'interest_amount', 'tax_revenue_amount', 'payable_amount']
+SUMMARY_FIELDS = ['petitioner_id', 'status'] + SUMMARY_AMOUNTS
+
+
+def summary_values(issue):
+    return {field: getattr(issue, field) for field in SUMMARY_FIELDS}
+
+
+# Add (sign=1) or remove (sign=-1) issues, given as summary_values() dicts,
+# from their buckets. Deltas are grouped per bucket first, so bulk paths
+# cost one UPDATE per touched bucket rather than one per issue.
+def apply_issue_deltas(rows, sign=1):
+    deltas = defaultdict(lambda: {'issue_count': 0, **{field: Decimal('0.00') for field in SUMMARY_AMOUNTS}})
+    for row in rows:
+        delta = deltas[(row['petitioner_id'], row['status'])]
+        delta['issue_count'] += sign
+        for field in SUMMARY_AMOUNTS:
+            delta[field] += sign * (row[field] or 0)
+    apply_bucket_deltas(deltas)
+
+
+# deltas: {(petitioner_id, status): {'issue_count': n, amount field: Decimal}}
+# A bucket created concurrently by another writer makes our create fail on
+# the unique constraints; the update is then retried against that row.
+def apply_bucket_deltas(deltas):
+    with transaction.atomic():
+        for (petitioner_id, status), delta in deltas.items():
+            if not any(delta.values()):
+                continue
+            bucket = IssueSummary.objects.filter(petitioner_id=petitioner_id, status=status)
+            increments = {field: F(field) + value for field, value in delta.items()}
+            if bucket.update(**increments):
+                continue
+            try:
+                with transaction.atomic():
+                    IssueSummary.objects.create(petitioner_id=petitioner_id, status=status, **delta)
+            except IntegrityError:
+                bucket.update(**increments)
+
+
+# Move one issue from its old state (None when new) to its new state
+def apply_issue_change(old, new):
+    rows_out = [old] if old else []
+    rows_in = [new] if new else []
+    with transaction.atomic():
+        apply_issue_deltas(rows_out, sign=-1)
+        apply_issue_deltas(rows_in, sign=1)
+
+
+# Fresh per-bucket totals straight from Issue, for rebuild and reconciliation
+def computed_buckets():
+    rows = Issue.objects.values('petitioner_id', 'status').annotate(
+        issue_count=Count('pk'), **{field: Sum(field) for field in SUMMARY_AMOUNTS}
+    ).order_by()
+    return {
+        (row['petitioner_id'], row['status']): {
+            'issue_count': row['issue_count'],
+            **{field: (row[field] or Decimal('0')).quantize(Decimal('0.01')) for field in SUMMARY_AMOUNTS},
+        }
+        for row in rows
+    }
+
+
+def rebuild_summary():
+    buckets = computed_buckets()
+    with transaction.atomic():
+        IssueSummary.objects.all().delete()
+        IssueSummary.objects.bulk_create(
+            IssueSummary(petitioner_id=petitioner_id, status=status, **totals)
+            for (petitioner_id, status), totals in buckets.items()
+        )
+    return buckets
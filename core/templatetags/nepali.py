@@ -0,0 +1,22 @@
+from django import template
+
+from core.utils.nepali_numerals import group_lakh, to_nepali
+
+register = template.Library()
+
+
+# {{ issue.final_date_bs|nepali }} -> २०८१-०३-१५
+@register.filter
+def nepali(value):
+    if value is None:
+        return ''
+    return to_nepali(value)
+
+
+# {{ issue.payable_amount|lakh }} -> १२,३४,५६७.००; lakh:0 drops the paisa
+@register.filter
+def lakh(value, places=2):
+    try:
+        return group_lakh(value, places=int(places))
+    except (ValueError, ArithmeticError):
+        return value
@@ -1,3 +1,1023 @@
-from django.test import TestCase
+import base64
+import csv
+import datetime
+import html
+import io
+import json
+import multiprocessing
+import os
+import re
+import subprocess
+import sys
+import random
+import tempfile
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+import brotli
+import nepali_datetime
+from django.contrib.auth.models import User
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection, connections, transaction
+from django.db.backends.sqlite3.base import DatabaseWrapper as SQLiteDatabaseWrapper
+from django.db.models import QuerySet
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from firm import db_profiles
+
+from . import interest, jobs, metrics, page_cache, pdf
+from .admin import IssueAdminForm
+from .bank_index import BankIndex, bump_bank_index_version
+from .models import Bank, Issue, IssueSummary, Job
+from .pdf import (
+    _cache_path, _issue_dir, evict_pdf_cache, get_renderer, render_issue_html, render_issues_batch,
+)
+from .recalculate import recalculate_issues
+from .search import rebuild_index, search_issues
+from .storage import CompressedManifestStaticFilesStorage
+from .summary import SUMMARY_AMOUNTS, apply_bucket_deltas, computed_buckets, rebuild_summary
+from .utils import bs_calendar
+from .utils.nepali_numerals import group_lakh, parse_decimal, to_ascii, to_nepali
+from .widgets import NepaliDatePickerWidget
+
+
+class BsCalendarTests(SimpleTestCase):
+    # Walk every day nepali_datetime supports and compare each conversion
+    def test_matches_nepali_datetime_exhaustively(self):
+        day = nepali_datetime.date(bs_calendar.MIN_YEAR, 1, 1)
+        last = nepali_datetime.date(bs_calendar.MAX_YEAR, 12, 30)
+        self.assertEqual(last.toordinal(), bs_calendar.MAX_ORDINAL)
+
+        one_day = datetime.timedelta(days=1)
+        while True:
+            ordinal = day.toordinal()
+            text = day.strftime('%Y-%m-%d')
+            ad = day.to_datetime_date()
+
+            self.assertEqual(bs_calendar.to_ordinal(day.year, day.month, day.day), ordinal)
+            self.assertEqual(bs_calendar.from_ordinal(ordinal), (day.year, day.month, day.day))
+            self.assertEqual(bs_calendar.parse(text), (day.year, day.month, day.day))
+            self.assertEqual(bs_calendar.bs_to_ad(text), ad)
+            self.assertEqual(bs_calendar.ad_to_bs(ad), text)
+            if day == last:
+                break
+            day += one_day
+
+    def test_days_in_month_matches_nepali_datetime(self):
+        for year in range(bs_calendar.MIN_YEAR, bs_calendar.MAX_YEAR + 1):
+            for month in range(1, 13):
+                self.assertEqual(
+                    bs_calendar.days_in_month(year, month),
+                    nepali_datetime._days_in_month(year, month),
+                )
+
+    def test_days_between_matches_subtraction(self):
+        start, end = nepali_datetime.date(2075, 4, 15), nepali_datetime.date(2081, 11, 3)
+        self.assertEqual(
+            bs_calendar.days_between('2075-04-15', '2081-11-03'),
+            (end - start).days,
+        )
+
+    def test_devanagari_digits(self):
+        self.assertEqual(bs_calendar.parse('२०८०-०१-३१'), (2080, 1, 31))
+
+    def test_invalid_dates_are_rejected(self):
+        for text in ['1974-12-30', '2101-01-01', '2080-13-01', '2080-01-00', '2081-01-32']:
+            with self.subTest(text=text):
+                with self.assertRaises(ValueError):
+                    nepali_datetime.date(*map(int, text.split('-')))
+                with self.assertRaises(ValueError):
+                    bs_calendar.parse(text)
+
+    def test_ad_outside_range_overflows(self):
+        with self.assertRaises(OverflowError):
+            bs_calendar.ad_to_bs(datetime.date(1900, 1, 1))
+        with self.assertRaises(OverflowError):
+            bs_calendar.ad_to_bs(datetime.date(2100, 1, 1))
+
+
+# Page cache in memory, so tests neither read nor leave files in page_cache/
+LOCMEM_PAGE_CACHES = override_settings(CACHES={
+    **settings.CACHES,
+    'pages': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'test-pages'},
+})
+
+
+def make_issues(count, banks=10, start=0):
+    petitioners = Bank.objects.bulk_create(
+        Bank(name=f"बैंक {start + n}") for n in range(banks)
+    )
+    issues = []
+    for n in range(count):
+        issue = Issue(
+            id=f"MU{start + n:06d}",
+            title=f"मुद्दा {n}",
+            petitioner=petitioners[n % banks],
+            defendant=f"प्रतिवादी {n}",
+            principal_amount=Decimal('100000.00') + n,
+            interest_rate=Decimal('12.00'),
+            claimed_amount=Decimal('100000.00') + n,
+            issue_date_bs='2078-01-01',
+            final_date_bs='2081-03-15',
+        )
+        issue.calculate()
+        issues.append(issue)
+    return Issue.objects.bulk_create(issues)
+
+
+@LOCMEM_PAGE_CACHES
+class IssueChangelistTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+
+    def changelist_queries(self):
+        # Warm up once so per-process lookups (content types, theme) are not counted
+        self.client.get('/core/issue/')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/core/issue/')
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    # The query count must not grow with the number of rows on the page
+    def test_query_budget_is_independent_of_page_size(self):
+        make_issues(10)
+        small_page = self.changelist_queries()
+
+        make_issues(90, start=10)
+        full_page = self.changelist_queries()
+
+        self.assertEqual(small_page, full_page)
+        self.assertLessEqual(full_page, 6)
+
+    def test_count_is_cached_until_an_issue_is_added_or_deleted(self):
+        make_issues(5)
+        self.changelist_queries()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/core/issue/')
+        self.assertFalse(any('COUNT(' in q['sql'] for q in queries.captured_queries))
+
+        Issue.objects.first().delete()
+        response = self.client.get('/core/issue/')
+        self.assertEqual(response.context['cl'].result_count, 4)
+
+        issue = Issue.objects.first()
+        issue.pk = 'MU999999'
+        issue.save(force_insert=True)
+        response = self.client.get('/core/issue/')
+        self.assertEqual(response.context['cl'].result_count, 5)
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+        make_issues(3, banks=1)
+        Issue.objects.filter(pk='MU000001').update(status='closed', title='पुरानो\x0bमुद्दा')
+
+    def test_csv_follows_changelist_filter(self):
+        response = self.client.get('/core/issue/export/csv/?status=closed')
+        text = b''.join(response.streaming_content).decode('utf-8-sig')
+        header, *rows = csv.reader(io.StringIO(text))
+        self.assertEqual(header[0], str(Issue._meta.get_field('id').verbose_name))
+        self.assertEqual([(row[0], row[1]) for row in rows], [('MU000001', 'पुरानो\x0bमुद्दा')])
+
+    def test_xlsx_follows_changelist_filter(self):
+        from openpyxl import load_workbook
+
+        response = self.client.get('/core/issue/export/xlsx/?status=closed')
+        sheet = load_workbook(io.BytesIO(b''.join(response.streaming_content))).active
+        rows = list(sheet.iter_rows(min_row=2, values_only=True))
+        self.assertEqual(len(rows), 1)
+        # The control character is dropped; the file would not open otherwise
+        self.assertEqual(rows[0][:2], ('MU000001', 'पुरानोमुद्दा'))
+        self.assertEqual(rows[0][4], 100001)
+
+    def test_bad_filter_redirects_to_changelist(self):
+        response = self.client.get('/core/issue/export/csv/?nosuchfield=1')
+        self.assertRedirects(response, '/core/issue/?e=1', fetch_redirect_response=False)
+
+
+@LOCMEM_PAGE_CACHES
+class IssueListTests(TestCase):
+    def setUp(self):
+        # Cached list pages and the bank index from other tests must not be used here
+        page_cache.bump_list_version()
+        bump_bank_index_version()
+
+    def listed(self, url):
+        content = self.client.get(url).content.decode()
+        pks = re.findall(r'<a href="([^"/]+)/">', content)
+        next_url = re.search(r'<a href="(\?[^"]+)">Next page', content)
+        return pks, next_url and html.unescape(next_url.group(1))
+
+    # Rows sharing a created_at are split by id, so no row is repeated or lost
+    def test_keyset_pages_with_equal_timestamps(self):
+        make_issues(120, banks=3)
+        Issue.objects.update(created_at=datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc))
+        seen, url, pages = [], '/issues/?status=open', 0
+        while url:
+            pks, next_url = self.listed(url if url.startswith('/') else f'/issues/{url}')
+            seen += pks
+            url, pages = next_url, pages + 1
+            if url:
+                self.assertIn('status=open', url)
+        self.assertEqual(pages, 3)
+        self.assertEqual(seen, sorted(Issue.objects.values_list('pk', flat=True), reverse=True))
+
+    def test_tampered_cursor_shows_first_page(self):
+        make_issues(3, banks=1)
+        first_page, _ = self.listed('/issues/')
+        for cursor in ['!!!', base64.urlsafe_b64encode(b'no separator').decode(), 'gA']:
+            self.assertEqual(self.listed(f'/issues/?cursor={cursor}')[0], first_page)
+
+    def test_filters(self):
+        make_issues(6, banks=2)
+        Issue.objects.filter(pk__in=['MU000000', 'MU000001']).update(status='closed')
+        Issue.objects.filter(pk='MU000004').update(issue_date=bs_calendar.bs_to_ad('2080-05-01'))
+
+        self.assertEqual(self.listed('/issues/?status=closed')[0], ['MU000001', 'MU000000'])
+        self.assertEqual(self.listed('/issues/?petitioner=बैंक 1')[0], ['MU000005', 'MU000003', 'MU000001'])
+        self.assertEqual(self.listed('/issues/?date_from=२०८०-०१-०१')[0], ['MU000004'])
+        self.assertEqual(self.listed('/issues/?date_to=2079-01-01&status=open')[0], ['MU000005', 'MU000003', 'MU000002'])
+        # An invalid filter leaves the list unfiltered
+        self.assertEqual(len(self.listed('/issues/?date_from=2080-13-40')[0]), 6)
+
+
+def stored_buckets():
+    return {
+        (row.pop('petitioner_id'), row.pop('status')): row
+        for row in IssueSummary.objects.exclude(issue_count=0).values(
+            'petitioner_id', 'status', 'issue_count', *SUMMARY_AMOUNTS
+        )
+    }
+
+
+class IssueSummaryTests(TestCase):
+    # Every write path must leave the incremental totals equal to a fresh aggregate
+    def test_deltas_track_every_write_path(self):
+        make_issues(6, banks=2)
+        rebuild_summary()
+
+        issue = Issue.objects.get(pk='MU000000')
+        issue.status = 'closed'
+        issue.principal_amount += 5000
+        issue.save()
+        self.assertEqual(stored_buckets(), computed_buckets())
+
+        Issue.objects.filter(pk='MU000001').update(final_date_bs='2081-01-01')
+        recalculate_issues(Issue.objects.all())
+        self.assertEqual(stored_buckets(), computed_buckets())
+
+        Issue.objects.get(pk='MU000002').delete()
+        Bank.objects.get(name='बैंक 1').delete()
+        self.assertEqual(stored_buckets(), computed_buckets())
+        self.assertEqual(IssueSummary.objects.get(petitioner=None, status='open').issue_count, 3)
+
+    # NULL petitioners must still share one bucket per status
+    def test_one_unassigned_bucket_per_status(self):
+        IssueSummary.objects.create(petitioner=None, status='open', issue_count=1)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            IssueSummary.objects.create(petitioner=None, status='open', issue_count=1)
+
+        with mock.patch.object(QuerySet, 'update', side_effect=[0, 1]) as update:
+            apply_bucket_deltas({(None, 'open'): {'issue_count': 1}})
+        self.assertEqual(update.call_count, 2)
+
+
+class IssueSearchTests(TestCase):
+    def setUp(self):
+        make_issues(3, banks=3)
+        rebuild_index()
+
+    def matches(self, text):
+        return sorted(search_issues(Issue.objects.all(), text).values_list('pk', flat=True))
+
+    def test_numerals_and_fields(self):
+        self.assertEqual(self.matches('MU००००01'), ['MU000001'])
+        self.assertEqual(self.matches('मुद्दा 2'), ['MU000002'])
+        self.assertEqual(self.matches('प्रतिवादी'), ['MU000000', 'MU000001', 'MU000002'])
+
+    def test_index_follows_saves_and_deletes(self):
+        issue = Issue.objects.get(pk='MU000001')
+        issue.defendant = 'राम बहादुर'
+        # The old row is found by rowid, not by a scan over issue_id
+        with CaptureQueriesContext(connection) as queries:
+            issue.save()
+        self.assertFalse(any('core_issue_fts WHERE issue_id' in q['sql'] for q in queries.captured_queries))
+        self.assertEqual(self.matches('बहादुर'), ['MU000001'])
+        self.assertEqual(self.matches('प्रतिवादी'), ['MU000000', 'MU000002'])
+
+        Bank.objects.filter(name='बैंक 2').update(name='x')
+        bank = Bank.objects.get(name='x')
+        bank.name = 'नबिल बैंक'
+        bank.save()
+        self.assertEqual(self.matches('नबिल'), ['MU000002'])
+        # Saving without a rename leaves the index alone
+        with CaptureQueriesContext(connection) as queries:
+            bank.save()
+        self.assertFalse(any('core_issue_fts' in q['sql'] for q in queries.captured_queries))
+
+        issue.delete()
+        self.assertEqual(self.matches('बहादुर'), [])
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT issue_id FROM core_issue_fts_key ORDER BY issue_id")
+            self.assertEqual(cursor.fetchall(), [('MU000000',), ('MU000002',)])
+
+
+@LOCMEM_PAGE_CACHES
+class BankIndexTests(TestCase):
+    def test_ranking(self):
+        index = BankIndex([(1, 'नबिल बैंक'), (2, 'नेपाल बैंक'), (3, 'Nabil Bank'), (4, 'कृषि विकास बैंक')])
+        self.assertEqual(index.search('न'), [1, 2])
+        self.assertEqual(index.search('बैं'), [1, 2, 4])
+        self.assertEqual(index.search('ABIL'), [3])
+        self.assertEqual(index.lookup(' nabil   BANK '), 3)
+
+    def test_autocomplete_revalidates_and_sees_new_banks(self):
+        # Banks indexed by other tests are gone after their rollback
+        bump_bank_index_version()
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+        url = '/autocomplete/?app_label=core&model_name=issue&field_name=petitioner&term=नबिल'
+        Bank.objects.create(name='नबिल बैंक')
+
+        response = self.client.get(url)
+        self.assertEqual([r['text'] for r in response.json()['results']], ['नबिल बैंक'])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+        Bank.objects.create(name='नबिल इन्भेस्टमेन्ट')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(len(response.json()['results']), 2)
+
+
+class NepaliNumeralTests(SimpleTestCase):
+    def test_digits_round_trip(self):
+        self.assertEqual(to_nepali('MU2081-03'), 'MU२०८१-०३')
+        self.assertEqual(to_ascii('MU२०८१-०३'), 'MU2081-03')
+
+    def test_lakh_grouping(self):
+        self.assertEqual(group_lakh(Decimal('123456789.5')), '१२,३४,५६,७८९.५०')
+        self.assertEqual(group_lakh(-1234, nepali=False), '-1,234.00')
+        self.assertEqual(group_lakh(999, places=0, nepali=False), '999')
+
+    def test_parse_decimal(self):
+        self.assertEqual(parse_decimal('१,२३,४५६.७८'), Decimal('123456.78'))
+        self.assertEqual(parse_decimal(' ', default=Decimal('0.00')), Decimal('0.00'))
+        self.assertEqual(parse_decimal('रू. १,०००'), Decimal('1000'))
+        self.assertEqual(parse_decimal('Rs 2,500.50'), Decimal('2500.50'))
+        self.assertEqual(parse_decimal('12.5 %'), Decimal('12.5'))
+        for text in ['१२क', '1.2.3', 'NaN', '%', 'रू.']:
+            with self.assertRaises(ValueError):
+                parse_decimal(text)
+
+
+class IssueAdminFormTests(TestCase):
+    # Amounts are typed the way they are written on paper
+    def test_amounts_accept_currency_and_percent(self):
+        form = IssueAdminForm(data={
+            'principal_amount': 'रू. १,००,०००', 'claimed_amount': 'Rs 1,20,000', 'interest_rate': '12%',
+            'tax_rate': str(interest.DEFAULT_TAX_RATE), 'status': 'open',
+            'issue_date_bs': '2078-01-01', 'final_date_bs': '2081-03-15',
+        })
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertEqual(
+            [form.cleaned_data[field] for field in ('principal_amount', 'claimed_amount', 'interest_rate')],
+            [Decimal('100000'), Decimal('120000'), Decimal('12')],
+        )
+
+
+class InterestEngineTests(SimpleTestCase):
+    def test_matches_simple_interest(self):
+        amounts = interest.calculate(
+            Decimal('100000.00'), Decimal('12.00'), Decimal('100000.00'), Decimal('500.00'),
+            Decimal('0.010'), '2078-01-01', '2081-03-15',
+        )
+        days = bs_calendar.days_between('2078-01-01', '2081-03-15')
+        self.assertEqual(amounts.total_days, days)
+        self.assertEqual(amounts.interest_amount, (Decimal('100000') * 12 * days / 36500).quantize(Decimal('0.01')))
+        self.assertEqual(amounts.payable_amount, amounts.tax_revenue_amount - Decimal('500.00'))
+
+    def test_rate_schedule_splits_periods(self):
+        schedule = interest.RateSchedule([('2079-01-01', '14'), ('2080-01-01', '9.5')])
+        first = bs_calendar.days_between('2078-06-01', '2079-01-01')
+        second = bs_calendar.days_between('2079-01-01', '2080-01-01')
+        third = bs_calendar.days_between('2080-01-01', '2080-06-01')
+        amounts = interest.calculate(
+            Decimal('100000'), Decimal('12'), Decimal('100000'), Decimal('0'), Decimal('0.010'),
+            '2078-06-01', '2080-06-01', schedule,
+        )
+        expected = Decimal('100000') * (12 * first + 14 * second + Decimal('9.5') * third) / 36500
+        self.assertEqual(amounts.interest_amount, expected.quantize(Decimal('0.01')))
+
+        # Issues pick up the configured changes on both paths
+        row = (Decimal('100000'), Decimal('12'), Decimal('100000'), Decimal('0'), Decimal('0.010'), '2078-06-01', '2080-06-01')
+        with self.settings(INTEREST_RATE_CHANGES=[('2079-01-01', '14'), ('2080-01-01', '9.5')]):
+            self.assertEqual(interest.calculate(*row), amounts)
+            self.assertEqual(interest.calculate_many([row]), [amounts])
+        self.assertNotEqual(interest.calculate(*row), amounts)
+
+    # The integer batch path must agree to the paisa, ties included, with and
+    # without NumPy
+    def test_batch_is_bit_identical(self):
+        rng = random.Random(0)
+        rows = [(Decimal('365.00'), Decimal('0.50'), Decimal('0'), Decimal('0'), Decimal('0.010'), '2078-01-01', '2078-01-02')]
+        for _ in range(2000):
+            principal = Decimal(rng.randrange(10 ** 12)) / 100
+            start = rng.randrange(1, 40000)
+            rows.append((
+                principal, Decimal(rng.randrange(3000)) / 100, principal + Decimal(rng.randrange(10 ** 8)) / 100,
+                Decimal(rng.randrange(10 ** 6)) / 100, rng.choice([Decimal('0.010'), Decimal('0.005')]),
+                bs_calendar.format_bs(*bs_calendar.from_ordinal(start)),
+                bs_calendar.format_bs(*bs_calendar.from_ordinal(max(1, start + rng.randrange(-30, 5000)))),
+            ))
+        expected = [tuple(map(str, interest.calculate(*row))) for row in rows]
+        for numpy in {interest._numpy(), None}:
+            with mock.patch.object(interest, 'np', numpy):
+                got = [tuple(map(str, amounts)) for amounts in interest.calculate_many(rows)]
+            self.assertEqual(got, expected)
+
+
+class CalculateBulkTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+
+    def post(self, body, content_type, query=''):
+        response = self.client.post('/calculate/' + query, data=body, content_type=content_type)
+        self.assertEqual(response.status_code, 200)
+        with CaptureQueriesContext(connection) as queries:
+            content = b''.join(response.streaming_content).decode()
+        self.assertEqual(len(queries), 0)
+        return content
+
+    def test_matches_issue_save(self):
+        issue = make_issues(1)[0]
+        body = (
+            'id,principal,rate,start,end,prepaid\n'
+            f'a,"१,००,०००.००",१२,२०७८-०१-०१,2081-03-15,\n'
+            'b,abc,12,2078-01-01,2081-03-15,\n'
+            'c,1e70,12,2078-01-01,2081-03-15,\n'
+            f'd,"१,००,०००.००",१२,२०७८-०१-०१,2081-03-15,\n'
+        )
+        rows = [json.loads(line) for line in self.post(body, 'text/csv', '?output=ndjson').splitlines()]
+        self.assertEqual(rows[0]['payable_amount'], str(issue.payable_amount))
+        self.assertEqual(rows[0]['total_days'], issue.total_days)
+        self.assertEqual(rows[1]['error'], 'principal_amount: not a number')
+        self.assertEqual(rows[2]['error'], 'amount out of range')
+        self.assertEqual(rows[3]['payable_amount'], str(issue.payable_amount))
+
+    def test_ndjson_in_csv_out_as_of(self):
+        body = '{"principal": "1000", "rate": "10", "start": "2080-01-01", "end": "2080-01-02"}\n'
+        lines = self.post(body, 'application/x-ndjson', '?output=csv&as_of=2081-01-01').splitlines()
+        self.assertEqual(lines[0].split(',')[:3], ['line', 'id', 'total_days'])
+        self.assertEqual(lines[1].split(',')[2], str(bs_calendar.days_between('2080-01-01', '2081-01-01')))
+
+    # A line in another encoding fails on its own; the rows around it still come out
+    def test_non_utf8_line_is_a_row_error(self):
+        row = '1000,10,2080-01-01,2080-01-02\n'
+        body = ('principal,rate,start,end\n' + row).encode() + '१०००'.encode()[:-1] + b',10\n' + row.encode()
+        rows = [json.loads(line) for line in self.post(body, 'text/csv', '?output=ndjson').splitlines()]
+        self.assertEqual([row['line'] for row in rows], [2, 3, 4])
+        self.assertEqual(rows[1]['error'], 'not valid UTF-8')
+        self.assertNotIn('error', rows[2])
+
+        body = b'{"principal": "1\xff"}\n{"principal": "1000", "rate": "10", "start": "2080-01-01", "end": "2080-01-02"}\n'
+        rows = [json.loads(line) for line in self.post(body, 'application/x-ndjson').splitlines()]
+        self.assertEqual([row.get('error') for row in rows], ['not valid UTF-8', None])
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        result_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(result_dir.cleanup)
+        self.enterContext(override_settings(JOB_RESULT_DIR=result_dir.name))
+        self.user = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        self.client.force_login(self.user)
+
+    def drain(self):
+        jobs.work('test', threading.Event(), once=True)
+
+    def test_recalculate_action_runs_in_worker(self):
+        issues = make_issues(3)
+        Issue.objects.update(payable_amount=0)
+        response = self.client.post('/core/issue/', {
+            'action': 'recalculate_selected', '_selected_action': [issue.pk for issue in issues],
+        })
+        self.assertRedirects(response, '/core/job/')
+        self.assertEqual(Issue.objects.filter(payable_amount=0).count(), 3)
+
+        self.drain()
+        job = Job.objects.get()
+        self.assertEqual((job.status, job.attempts, job.progress_done, job.progress_total), ('done', 1, 3, 3))
+        self.assertFalse(Issue.objects.filter(payable_amount=0).exists())
+        self.assertIsNone(jobs.claim_job('test'))
+
+    def test_failures_back_off_then_fail(self):
+        job = jobs.enqueue('recalculate', {'ids': []}, self.user)
+        failing = {'recalculate': mock.Mock(side_effect=RuntimeError('boom'))}
+        with mock.patch.dict(jobs.HANDLERS, failing), self.assertLogs('core.jobs', 'ERROR'):
+            self.drain()
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.attempts, job.message), ('queued', 1, 'RuntimeError: boom'))
+            self.assertIsNone(jobs.claim_job('test'))
+
+            Job.objects.update(run_after=job.created_at)
+            self.drain()
+            Job.objects.update(run_after=job.created_at)
+            self.drain()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('failed', 3))
+
+        self.client.post('/core/job/', {'action': 'retry_selected', '_selected_action': [job.pk]})
+        self.drain()
+        self.assertEqual(Job.objects.get().status, 'done')
+
+    def test_download_and_stale_lease(self):
+        job = jobs.enqueue('print', {}, self.user)
+
+        def write_result(job, progress):
+            with open(f"{jobs.job_dir(job.pk)}/batch.pdf", 'wb') as fh:
+                fh.write(b'%PDF-')
+            return 'ok', 'batch.pdf'
+
+        with mock.patch.dict(jobs.HANDLERS, {'print': write_result}):
+            self.drain()
+        response = self.client.get(f'/core/job/{job.pk}/download/')
+        self.assertEqual(b''.join(response.streaming_content), b'%PDF-')
+
+        stuck = jobs.enqueue('print', {})
+        Job.objects.filter(pk=stuck.pk).update(
+            status='running', attempts=1, heartbeat_at=job.created_at - datetime.timedelta(hours=1),
+        )
+        self.assertEqual(jobs.claim_job('test').pk, stuck.pk)
+
+    # A worker whose lease was taken over must not record its outcome
+    def test_lost_lease_keeps_the_new_run(self):
+        job = jobs.enqueue('print', {})
+
+        def lose_lease(job, progress):
+            Job.objects.filter(pk=job.pk).update(worker='other', attempts=2)
+            progress(1, 1)
+            return 'ok', ''
+
+        with mock.patch.dict(jobs.HANDLERS, {'print': lose_lease}):
+            self.drain()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.worker, job.progress_total), ('running', 'other', 0))
+
+
+# Stands in for WeasyPrint: a one-page PDF whose width encodes the
+# defendant number, so merged output can be checked for order
+class StubPdfRenderer:
+    def render(self, html_string, base_url):
+        from pypdf import PdfWriter
+
+        # The pool's warm-up page has no defendant
+        match = re.search(r'प्रतिवादी (\d+)', html_string)
+        number = int(match.group(1)) if match else 0
+        writer = PdfWriter()
+        writer.add_blank_page(width=100 + number, height=100)
+        output = io.BytesIO()
+        writer.write(output)
+        return output.getvalue()
+
+
+IMPORT_ROWS = [
+    ['id', 'petitioner', 'title', 'principal_amount', 'interest_rate', 'claimed_amount', 'issue_date_bs', 'final_date_bs'],
+    ['IM1', 'नयाँ बैंक', 'ऋण असुली', '100000', '12', '100000', '2078-01-01', '2081-03-15'],
+    ['IM2', 'रद्द बैंक', 'ऋण असुली', '100000', '12', '100000', '2078-13-01', '2081-03-15'],
+    ['IM1', 'नयाँ बैंक', 'दोहोरो', '100000', '12', '100000', '2078-01-01', '2081-03-15'],
+    ['MU000000', 'नयाँ बैंक', 'पहिले नै छ', '100000', '12', '100000', '2078-01-01', '2081-03-15'],
+    ['IM3', 'नयाँ बैंक', 'ऋण असुली', '१,००,०००', '१२.५', '१,२०,०००', '२०७८-०१-०१', '2081-03-15'],
+]
+
+
+class ImportIssuesTests(TestCase):
+    def setUp(self):
+        make_issues(1, banks=1)
+        workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(workdir.cleanup)
+        self.path = os.path.join(workdir.name, 'issues.csv')
+        self.rejects = os.path.join(workdir.name, 'rejects.csv')
+        with open(self.path, 'w', newline='', encoding='utf-8') as fh:
+            csv.writer(fh).writerows(IMPORT_ROWS)
+
+    def test_valid_rejected_and_duplicate_rows(self):
+        out = io.StringIO()
+        with CaptureQueriesContext(connection) as queries:
+            call_command('import_issues', self.path, '--rejects', self.rejects, '--batch-size', '2', stdout=out)
+        self.assertIn('Imported 2 issues, rejected 3', out.getvalue())
+        # Bank ids come from the name map, never from a per-row lookup
+        self.assertFalse([q for q in queries.captured_queries if '"core_bank"."id" =' in q['sql']])
+
+        issue = Issue.objects.get(pk='IM3')
+        self.assertEqual((issue.principal_amount, issue.interest_rate), (Decimal('100000'), Decimal('12.5')))
+        self.assertEqual(issue.petitioner, Issue.objects.get(pk='IM1').petitioner)
+        self.assertEqual(Issue.objects.get(pk='MU000000').title, 'मुद्दा 0')
+        # The bank of the rejected row was never created
+        self.assertTrue(Bank.objects.filter(name='नयाँ बैंक').exists())
+        self.assertFalse(Bank.objects.filter(name='रद्द बैंक').exists())
+
+        with open(self.rejects, encoding='utf-8-sig') as fh:
+            rejected = list(csv.reader(fh))[1:]
+        self.assertEqual([row[0] for row in rejected], ['3', '4', '5'])
+        self.assertIn('दोहोरिएको', rejected[1][-1])
+        self.assertIn('पहिले नै छ', rejected[2][-1])
+
+    def test_dry_run_writes_nothing(self):
+        out = io.StringIO()
+        call_command('import_issues', self.path, '--dry-run', stdout=out)
+        self.assertIn('Would import 2 issues, rejected 3', out.getvalue())
+        self.assertEqual(Issue.objects.count(), 1)
+        self.assertFalse(Bank.objects.filter(name='नयाँ बैंक').exists())
+
+
+class PdfCacheTests(TestCase):
+    def setUp(self):
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        self.cache_dir = cache_dir.name
+        self.enterContext(override_settings(PDF_CACHE_DIR=self.cache_dir, PDF_RENDERER='core.tests.StubPdfRenderer'))
+        get_renderer.cache_clear()
+        self.addCleanup(get_renderer.cache_clear)
+        # The render pool is spawned and would not see the overridden setting
+        executor = ThreadPoolExecutor(1)
+        self.addCleanup(executor.shutdown)
+        self.enterContext(mock.patch('core.pdf.render_executor', lambda: executor))
+
+    def cached_files(self):
+        return sorted(
+            os.path.relpath(os.path.join(root, name), self.cache_dir)
+            for root, _, names in os.walk(self.cache_dir) for name in names
+        )
+
+    def fetch(self, pk, **headers):
+        response = self.client.get(f'/core/issue/{pk}/print_pdf/', headers=headers)
+        if response.status_code == 200:
+            content = b''.join(response.streaming_content)
+            response.close()
+            return response, content
+        return response, None
+
+    def test_conditional_requests_and_invalidation_on_save(self):
+        from pypdf import PdfReader
+
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+        make_issues(2, banks=1)
+        response, content = self.fetch('MU000001')
+        self.assertEqual(int(PdfReader(io.BytesIO(content)).pages[0].mediabox.width), 101)
+        etag, last_modified = response['ETag'], response['Last-Modified']
+        self.assertEqual(self.fetch('MU000001', if_none_match=etag)[0].status_code, 304)
+        self.assertEqual(self.fetch('MU000001', if_modified_since=last_modified)[0].status_code, 304)
+        self.fetch('MU000000')
+        self.assertEqual(len(self.cached_files()), 2)
+
+        # Saving drops only that issue's copy, and the old ETag no longer matches
+        issue = Issue.objects.get(pk='MU000001')
+        issue.defendant = 'प्रतिवादी 7'
+        issue.save()
+        self.assertEqual(self.cached_files(), [os.path.relpath(_cache_path(Issue.objects.get(pk='MU000000')), self.cache_dir)])
+        response, content = self.fetch('MU000001', if_none_match=etag)
+        self.assertEqual(int(PdfReader(io.BytesIO(content)).pages[0].mediabox.width), 107)
+
+    @override_settings(PDF_CACHE_MAX_BYTES=250)
+    def test_eviction_drops_least_recently_served(self):
+        for age, name in enumerate(['a/new.pdf', 'b/old.pdf', 'legacy.pdf', 'c/older.pdf']):
+            path = os.path.join(self.cache_dir, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as fh:
+                fh.write(b'x' * 100)
+            os.utime(path, (1_000_000 - age, 1_000_000 - age))
+        evict_pdf_cache()
+        self.assertEqual(self.cached_files(), [os.path.join('a', 'new.pdf'), os.path.join('b', 'old.pdf')])
+
+    def test_only_a_rename_drops_the_banks_pdfs(self):
+        make_issues(4, banks=2)
+        for issue in Issue.objects.all():
+            os.makedirs(_issue_dir(issue.pk))
+            open(os.path.join(_issue_dir(issue.pk), 'key.pdf'), 'wb').close()
+
+        bank = Bank.objects.get(name='बैंक 0')
+        bank.save()
+        self.assertEqual(len(self.cached_files()), 4)
+
+        bank.name = 'नबिल बैंक'
+        bank.save()
+        self.assertEqual(self.cached_files(), sorted(
+            os.path.relpath(os.path.join(_issue_dir(pk), 'key.pdf'), self.cache_dir) for pk in ['MU000001', 'MU000003']
+        ))
+
+
+# The real render pool, forked (which rules out worker recycling) so its
+# workers see the stub renderer setting
+class RenderPoolTests(TestCase):
+    def setUp(self):
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        self.enterContext(override_settings(
+            PDF_CACHE_DIR=cache_dir.name, PDF_RENDERER='core.tests.StubPdfRenderer', PDF_RENDER_WORKERS=1,
+            ISSUE_BATCH_PRINT_TASKS_PER_CHILD=None,
+        ))
+        get_renderer.cache_clear()
+        self.addCleanup(get_renderer.cache_clear)
+        self.enterContext(mock.patch.object(pdf, '_render_executor', None))
+        self.enterContext(mock.patch.object(
+            pdf, 'ProcessPoolExecutor', partial(ProcessPoolExecutor, mp_context=multiprocessing.get_context('fork')),
+        ))
+        self.addCleanup(lambda: pdf._render_executor and pdf._render_executor.shutdown())
+
+    def test_print_view_renders_in_the_pool(self):
+        from pypdf import PdfReader
+
+        executor = pdf.render_executor()
+        self.assertIs(pdf.render_executor(), executor)
+        self.assertNotEqual(executor.submit(os.getpid).result(), os.getpid())
+
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+        issue = make_issues(2, banks=1)[1]
+        response = self.client.get(f'/core/issue/{issue.pk}/print_pdf/')
+        content = b''.join(response.streaming_content)
+        response.close()
+        self.assertEqual(int(PdfReader(io.BytesIO(content)).pages[0].mediabox.width), 101)
+        self.assertTrue(os.path.exists(_cache_path(issue)))
+
+
+class BatchPrintTests(TestCase):
+    def setUp(self):
+        self.enterContext(override_settings(
+            PDF_RENDERER='core.tests.StubPdfRenderer', ISSUE_BATCH_PRINT_WORKERS=2,
+        ))
+        get_renderer.cache_clear()
+        self.addCleanup(get_renderer.cache_clear)
+        # Batch workers are spawned and would not see the overridden setting;
+        # threads run the same code in this process
+        self.enterContext(mock.patch(
+            'core.pdf.ProcessPoolExecutor', lambda max_workers, **kwargs: ThreadPoolExecutor(max_workers),
+        ))
+        workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(workdir.cleanup)
+        self.workdir = workdir.name
+        self.issues = make_issues(3, banks=1)
+
+    def test_merged_pdf_keeps_selection_order(self):
+        from pypdf import PdfReader
+
+        issues = [self.issues[2], self.issues[0], self.issues[1]]
+        done = []
+        with render_issues_batch(issues, 'pdf', 'http://localhost/', progress=lambda d, t: done.append(d)) as output:
+            widths = [int(page.mediabox.width) for page in PdfReader(output).pages]
+        self.assertEqual(widths, [102, 100, 101])
+        self.assertEqual(done[-1], 3)
+
+    def test_print_issues_writes_zip(self):
+        target = os.path.join(self.workdir, 'batch.zip')
+        call_command('print_issues', target, 'MU000000', 'MU000002', stdout=io.StringIO())
+        with zipfile.ZipFile(target) as archive:
+            self.assertEqual(sorted(archive.namelist()), ['mudda_MU000000.pdf', 'mudda_MU000002.pdf'])
+
+    @override_settings(ISSUE_BATCH_PRINT_MAX=2)
+    def test_admin_action_limit(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+        response = self.client.post('/core/issue/', {
+            'action': 'print_selected_pdf', '_selected_action': [issue.pk for issue in self.issues],
+        }, follow=True)
+        self.assertContains(response, 'बढीमा 2 मुद्दा')
+        self.assertFalse(Job.objects.exists())
+
+
+class StaticAssetTests(SimpleTestCase):
+    def test_calendar_script_matches_bs_calendar(self):
+        path = os.path.join(os.path.dirname(__file__), 'static', 'core', 'js', 'bs-calendar.js')
+        with open(path, encoding='utf-8') as fh:
+            rows = re.findall(r'\[(\d+(?:, \d+){11})\]', fh.read())
+        expected = [
+            ', '.join(str(bs_calendar.days_in_month(year, month)) for month in range(1, 13))
+            for year in range(bs_calendar.MIN_YEAR, bs_calendar.MAX_YEAR + 1)
+        ]
+        self.assertEqual(rows, expected)
+
+    def test_date_widget_has_no_inline_script(self):
+        html = NepaliDatePickerWidget().render('final_date_bs', '2081-01-01')
+        self.assertNotIn('<script', html)
+        self.assertIn('nepali-datepicker', html)
+
+    def test_precompressed_variants_are_served(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        source = b'window.x = "' + b'nepali ' * 500 + b'";\n'
+        os.makedirs(os.path.join(root.name, 'core'))
+        with open(os.path.join(root.name, 'core', 'app.js'), 'wb') as fh:
+            fh.write(source)
+        self.assertEqual(
+            list(CompressedManifestStaticFilesStorage(location=root.name).compress('core/app.js')),
+            ['core/app.js.gz', 'core/app.js.br'],
+        )
+
+        with override_settings(STATIC_ROOT=root.name):
+            response = self.client.get('/static/core/app.js', HTTP_ACCEPT_ENCODING='gzip, br')
+            self.assertEqual(response.headers['Content-Encoding'], 'br')
+            self.assertEqual(response.headers['Vary'], 'Accept-Encoding')
+            self.assertEqual(brotli.decompress(b''.join(response.streaming_content)), source)
+
+            response = self.client.get('/static/core/app.js', HTTP_ACCEPT_ENCODING='br;q=0')
+            self.assertNotIn('Content-Encoding', response.headers)
+            self.assertEqual(b''.join(response.streaming_content), source)
+
+            response = self.client.get('/static/core/app.js', HTTP_IF_NONE_MATCH=response.headers['ETag'])
+            self.assertEqual(response.status_code, 304)
+
+
+# django.setup() runs on every manage.py command, test run and worker boot.
+# Heavy optional engines must stay out of it, and the whole import must fit
+# the budget (generous, so slow machines do not fail it spuriously).
+STARTUP_IMPORT_BUDGET_MS = 1500
+LAZY_MODULES = {'weasyprint', 'reportlab', 'pypdf', 'numpy', 'openpyxl'}
+
+
+class StartupImportTests(SimpleTestCase):
+    def test_setup_import_budget(self):
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', 'import django; django.setup()'],
+            env={**os.environ, 'DJANGO_SETTINGS_MODULE': 'firm.settings'},
+            cwd=os.path.dirname(os.path.dirname(__file__)),
+            capture_output=True, text=True, check=True,
+        )
+        total_us = 0
+        imported = set()
+        for line in result.stderr.splitlines():
+            if not line.startswith('import time:') or 'self [us]' in line:
+                continue
+            _, cumulative, name = line[len('import time:'):].split('|')
+            imported.add(name.strip().split('.')[0])
+            if not name.startswith('  '):
+                total_us += int(cumulative)
+        self.assertFalse(imported & LAZY_MODULES)
+        self.assertLess(total_us / 1000, STARTUP_IMPORT_BUDGET_MS)
+
+
+class DatabaseProfileTests(SimpleTestCase):
+    def test_sqlite_profile_pragmas(self):
+        workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(workdir.cleanup)
+        config = connections.configure_settings({
+            'default': db_profiles.sqlite(os.path.join(workdir.name, 'profile.sqlite3')),
+        })['default']
+        wrapper = SQLiteDatabaseWrapper(config, 'profile')
+        self.addCleanup(wrapper.close)
+        with wrapper.cursor() as cursor:
+            pragmas = {
+                name: cursor.execute(f'PRAGMA {name}').fetchone()[0]
+                for name in ('journal_mode', 'synchronous', 'busy_timeout', 'cache_size')
+            }
+        self.assertEqual(pragmas, {'journal_mode': 'wal', 'synchronous': 1, 'busy_timeout': 20000, 'cache_size': -65536})
+        self.assertIsNone(config['CONN_MAX_AGE'])
+
+    def test_conn_max_age_from_environment(self):
+        self.assertEqual(db_profiles.sqlite('x', env={'FIRM_DB_CONN_MAX_AGE': '0'})['CONN_MAX_AGE'], 0)
+        self.assertEqual(db_profiles.sqlite('x', env={'FIRM_DB_CONN_MAX_AGE': '60'})['CONN_MAX_AGE'], 60)
+        self.assertIsNone(db_profiles.sqlite('x', env={})['CONN_MAX_AGE'])
+
+
+class HotPathBenchmarkTests(TestCase):
+    def test_baseline_round_trip_and_regression(self):
+        workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(workdir.cleanup)
+        baseline = os.path.join(workdir.name, 'baseline.json')
+        args = ['issue_calculate', 'issue_save', '--baseline', baseline, '--min-time', '0.01', '--repeat', '1']
+
+        call_command('benchmark_hot_paths', *args, '--save', stdout=io.StringIO())
+        with open(baseline) as fh:
+            saved = json.load(fh)['results']
+        self.assertEqual(set(saved), {'issue_calculate', 'issue_save'})
+        self.assertFalse(Issue.objects.exists())
+
+        saved['issue_calculate']['ops_per_sec'] *= 100
+        with open(baseline, 'w') as fh:
+            json.dump({'results': saved}, fh)
+        with self.assertRaisesMessage(CommandError, 'issue_calculate'):
+            call_command('benchmark_hot_paths', *args, stdout=io.StringIO())
+
+
+@LOCMEM_PAGE_CACHES
+class SeedIssuesTests(TestCase):
+    def seeded(self, prefix):
+        rows = Issue.objects.filter(pk__startswith=prefix).order_by('pk').values()
+        return [{k: v for k, v in row.items() if k not in ('id', 'created_at', 'updated_at')} for row in rows]
+
+    def test_reproducible_and_consistent(self):
+        args = ['--count', '120', '--banks', '130', '--seed', '7', '--batch-size', '50']
+        call_command('seed_issues', *args, '--prefix', 'A', stdout=io.StringIO())
+        call_command('seed_issues', *args, '--prefix', 'B', stdout=io.StringIO())
+        self.assertEqual(Bank.objects.count(), 130)
+        self.assertEqual(self.seeded('A'), self.seeded('B'))
+
+        issue = Issue.objects.get(pk='A000000042')
+        stored = {field: getattr(issue, field) for field in ('total_days', 'interest_amount', 'payable_amount')}
+        issue.calculate()
+        self.assertEqual(stored, {field: getattr(issue, field) for field in stored})
+        self.assertEqual(issue.issue_date, bs_calendar.bs_to_ad(issue.issue_date_bs))
+        # created_at follows the issue date, and auto_now_add is back on afterwards
+        self.assertLessEqual((issue.created_at.date() - issue.issue_date).days, 31)
+        self.assertTrue(Issue._meta.get_field('created_at').auto_now_add)
+
+        self.assertEqual(stored_buckets(), computed_buckets())
+        self.assertIn('A000000042', search_issues(Issue.objects.all(), issue.defendant).values_list('pk', flat=True))
+
+        with self.assertRaisesMessage(CommandError, 'already exist'):
+            call_command('seed_issues', *args, '--prefix', 'A', stdout=io.StringIO())
+
+
+@LOCMEM_PAGE_CACHES
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        make_issues(1, banks=1)
+        page_cache.bump_issue_version('MU000000')
+
+    def test_server_timing_and_histograms(self):
+        response = self.client.get('/issues/MU000000/')
+        timing = response['Server-Timing']
+        self.assertRegex(timing, r'db;dur=[\d.]+;desc="\d+ queries"')
+        self.assertIn('template;dur=', timing)
+        self.assertIn('total;dur=', timing)
+
+        self.assertEqual(self.client.get('/metrics').status_code, 302)
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+        body = self.client.get('/metrics').content.decode()
+        self.assertIn('firm_request_duration_seconds_bucket{view="issue_detail",le="+Inf"}', body)
+        self.assertIn('firm_request_phase_seconds_count{view="issue_detail",phase="template"}', body)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_token_and_pdf_html_phase(self):
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer wrong').status_code, 302)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret').status_code, 200)
+
+        with metrics.collecting() as timings:
+            render_issue_html(Issue.objects.get())
+        self.assertEqual(timings['pdf_html'][1], 1)
+        self.assertIn('pdf_html;dur=', metrics.server_timing(timings, 0.1))
+
+
+@LOCMEM_PAGE_CACHES
+class PageCacheTests(TestCase):
+    def setUp(self):
+        make_issues(2, banks=2)
+        page_cache.bump_detail_generation()
+
+    def test_detail_and_list_follow_saves(self):
+        self.client.get('/issues/MU000001/')
+        self.assertContains(self.client.get('/issues/MU000000/'), 'मुद्दा 0')
+        with self.assertNumQueries(0):
+            self.assertContains(self.client.get('/issues/MU000000/'), 'मुद्दा 0')
+        self.assertContains(self.client.get('/issues/'), 'मुद्दा 1')
+        with self.assertNumQueries(0):
+            self.client.get('/issues/')
+
+        issue = Issue.objects.get(pk='MU000000')
+        issue.title = 'धितो लिलाम'
+        with self.captureOnCommitCallbacks(execute=True):
+            issue.save()
+        self.assertContains(self.client.get('/issues/MU000000/'), 'धितो लिलाम')
+        self.assertContains(self.client.get('/issues/'), 'धितो लिलाम')
+        with self.assertNumQueries(0):
+            self.client.get('/issues/MU000001/')
+
+        # Saving a bank without renaming it leaves its issues' pages cached
+        bank = Bank.objects.get(name='बैंक 1')
+        with self.captureOnCommitCallbacks(execute=True):
+            bank.save()
+        with self.assertNumQueries(0):
+            self.client.get('/issues/MU000001/')
+
+        bank.name = 'नबिल बैंक'
+        with self.captureOnCommitCallbacks(execute=True):
+            bank.save()
+        self.assertContains(self.client.get('/issues/MU000001/'), 'नबिल बैंक')
+
+        # A recalculation expires every detail page at once
+        Issue.objects.filter(pk='MU000000').update(payable_amount=0)
+        self.client.get('/issues/MU000001/')
+        with self.captureOnCommitCallbacks(execute=True):
+            recalculate_issues(Issue.objects.filter(pk='MU000000'))
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/issues/MU000001/')
+        self.assertEqual(len(queries), 1)
+
+        lookups = metrics.exposition()
+        self.assertRegex(lookups, r'firm_page_cache_lookups_total\{cache="issue_detail",result="hit"\} \d+')
+        self.assertRegex(lookups, r'firm_page_cache_lookups_total\{cache="issue_list",result="miss"\} \d+')
+
+    # The file cache lists its directory once per CULL_EVERY writes, not per write
+    def test_file_cache_culls_every_n_writes(self):
+        workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(workdir.cleanup)
+        pages = page_cache.PageFileCache(workdir.name, {'OPTIONS': {'MAX_ENTRIES': 4, 'CULL_EVERY': 5}})
+        with mock.patch.object(pages, '_list_cache_files', wraps=pages._list_cache_files) as listed:
+            for n in range(10):
+                pages.set(f'page-{n}', n)
+        self.assertEqual(listed.call_count, 2)
+        self.assertLess(len(os.listdir(workdir.name)), 10)
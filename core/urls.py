@@ -11,4 +11,7 @@ urlpatterns = [
     path('issues/<str:pk>/', views.issue_detail, name='issue_detail'),
     path('issues/<str:pk>/edit/', views.issue_update, name='issue_update'),
     path('issues/<str:pk>/delete/', views.issue_delete, name='issue_delete'),
+    path('banks/suggest/', views.bank_suggest, name='bank_suggest'),
+    path('calculate/', views.calculate_bulk, name='calculate_bulk'),
+    path('metrics', views.metrics_view, name='metrics'),
 ]
\ No newline at end of file
@@ -0,0 +1,114 @@
+# Array-backed Bikram Sambat calendar.
+#
+# Built once at import from the same month-length table nepali_datetime ships,
+# so every answer matches it over its supported range (1975-01-01 .. 2100-12-30
+# BS). Ordinals follow nepali_datetime: 1975-01-01 BS is day 1.
+#
+#   _MONTH_START[i]  ordinal of the day before month i starts, where
+#                    i = (year - MIN_YEAR) * 12 + (month - 1); one extra entry
+#                    closes the last month.
+#   _DAY_MONTH[n]    month index i that ordinal n falls in.
+#
+# Parsing, validation and conversion in either direction are plain index
+# lookups, with no per-call object construction.
+
+import csv
+import datetime
+import time
+from array import array
+
+from nepali_datetime import config as _config
+
+MIN_YEAR = _config.MINDATE['year']
+MAX_YEAR = _config.MAXDATE['year']
+
+_REFERENCE_AD = datetime.date(**_config.REFERENCE_DATE_AD)
+_NEPAL_UTC_OFFSET = 20700  # +05:45, same as nepali_datetime
+
+
+def _build():
+    month_start = array('l', [0])
+    with open(_config.CALENDAR_PATH, newline='') as fh:
+        rows = csv.reader(fh)
+        next(rows)
+        for row in rows:
+            for length in row[1:13]:
+                month_start.append(month_start[-1] + int(length))
+
+    day_month = array('H', [0])
+    for index in range(len(month_start) - 1):
+        day_month.extend([index] * (month_start[index + 1] - month_start[index]))
+    return month_start, day_month
+
+
+_MONTH_START, _DAY_MONTH = _build()
+MAX_ORDINAL = _MONTH_START[-1]
+
+
+def days_in_month(year, month):
+    if not MIN_YEAR <= year <= MAX_YEAR:
+        raise ValueError('year must be in %d..%d' % (MIN_YEAR, MAX_YEAR), year)
+    if not 1 <= month <= 12:
+        raise ValueError('month must be in 1..12', month)
+    index = (year - MIN_YEAR) * 12 + month - 1
+    return _MONTH_START[index + 1] - _MONTH_START[index]
+
+
+def to_ordinal(year, month, day):
+    dim = days_in_month(year, month)
+    if not 1 <= day <= dim:
+        raise ValueError('day must be in 1..%d' % dim, day)
+    return _MONTH_START[(year - MIN_YEAR) * 12 + month - 1] + day
+
+
+def from_ordinal(n):
+    if not 1 <= n <= MAX_ORDINAL:
+        raise OverflowError('result out of range')
+    index = _DAY_MONTH[n]
+    year, month = divmod(index, 12)
+    return MIN_YEAR + year, month + 1, n - _MONTH_START[index]
+
+
+# "YYYY-MM-DD" (ASCII or Devanagari digits) -> (year, month, day)
+def parse(text):
+    year, month, day = map(int, text.split('-'))
+    to_ordinal(year, month, day)
+    return year, month, day
+
+
+def format_bs(year, month, day):
+    return '%04d-%02d-%02d' % (year, month, day)
+
+
+def bs_to_ordinal(text):
+    return to_ordinal(*map(int, text.split('-')))
+
+
+def ordinal_to_ad(n):
+    return _REFERENCE_AD + datetime.timedelta(days=n - 1)
+
+
+def ad_to_ordinal(ad_date):
+    n = (ad_date - _REFERENCE_AD).days + 1
+    if not 1 <= n <= MAX_ORDINAL:
+        raise OverflowError('result out of range')
+    return n
+
+
+def bs_to_ad(text):
+    return ordinal_to_ad(bs_to_ordinal(text))
+
+
+def ad_to_bs(ad_date):
+    return format_bs(*from_ordinal(ad_to_ordinal(ad_date)))
+
+
+# Whole days from start to end, both "YYYY-MM-DD" BS strings
+def days_between(start, end):
+    return bs_to_ordinal(end) - bs_to_ordinal(start)
+
+
+# Today's BS date in Nepal time, as "YYYY-MM-DD"
+def today_bs():
+    y, m, d = time.gmtime(time.time() + _NEPAL_UTC_OFFSET)[:3]
+    return ad_to_bs(datetime.date(y, m, d))
@@ -1,14 +1,71 @@
-# Create this file to handle numeral conversions
+# Nepali numeral codec.
+#
+# Every conversion is a single str.translate over a table built once here,
+# instead of a per-character Python loop: digits either way, numeric input
+# with separators, and lakh/crore grouping (12,34,56,789.00).
 
-nepali_to_english = {
-    '०': '0', '१': '1', '२': '2', '३': '3', '४': '4',
-    '५': '5', '६': '6', '७': '7', '८': '8', '९': '9', '.': '.'
-}
+import re
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
 
-english_to_nepali = {v: k for k, v in nepali_to_english.items()}
+NEPALI_DIGITS = '०१२३४५६७८९'
+ASCII_DIGITS = '0123456789'
 
-def nep_to_eng(num_str):
-    return ''.join(nepali_to_english.get(ch, ch) for ch in num_str)
+TO_NEPALI = str.maketrans(ASCII_DIGITS, NEPALI_DIGITS)
+TO_ASCII = str.maketrans(NEPALI_DIGITS, ASCII_DIGITS)
 
-def eng_to_nep(num_str):
-    return ''.join(english_to_nepali.get(ch, ch) for ch in str(num_str))
+# Nepali digits to ASCII, thousands separators and spacing dropped
+_NUMERIC = str.maketrans(
+    NEPALI_DIGITS,
+    ASCII_DIGITS,
+    ',_ \t\u00a0\u202f\u066c',
+)
+
+_LAKH_GROUPS = re.compile(r'(\d)(?=(\d\d)+$)')
+
+
+def to_nepali(value):
+    return str(value).translate(TO_NEPALI)
+
+
+def to_ascii(value):
+    return str(value).translate(TO_ASCII)
+
+
+# A currency prefix or percent sign typed around an amount or rate, e.g.
+# "रू. 1,000" or "12%"; matched after _NUMERIC has dropped the spaces
+_DECORATIONS = re.compile(r'^(?:रू|रु|Rs|NPR)\.?|%$', re.IGNORECASE)
+
+
+# "१,२३,४५६.७८" / "123,456.78" / "रू. 1,000" / "12%" -> Decimal. Blank input
+# gives default; anything else that is not a number raises ValueError.
+def parse_decimal(text, default=None):
+    cleaned = str(text if text is not None else '').translate(_NUMERIC)
+    if not cleaned:
+        return default
+    try:
+        value = Decimal(cleaned)
+    except InvalidOperation:
+        # Decorations are rare, so the regex only runs once the plain parse fails
+        try:
+            value = Decimal(_DECORATIONS.sub('', cleaned))
+        except InvalidOperation:
+            raise ValueError('not a number', text)
+    if not value.is_finite():
+        raise ValueError('not a number', text)
+    return value
+
+
+# Group an amount the South Asian way: the last three digits, then pairs,
+# e.g. 1234567.5 -> "12,34,567.50". nepali=True also converts the digits.
+def group_lakh(value, places=2, nepali=True):
+    if value is None or value == '':
+        return ''
+    amount = value if isinstance(value, Decimal) else Decimal(str(value))
+    if places is not None:
+        amount = amount.quantize(Decimal(1).scaleb(-places), rounding=ROUND_HALF_UP)
+    sign = '-' if amount < 0 else ''
+    whole, dot, fraction = f'{abs(amount):f}'.partition('.')
+    if len(whole) > 3:
+        whole = _LAKH_GROUPS.sub(r'\1,', whole[:-3]) + ',' + whole[-3:]
+    text = sign + whole + dot + fraction
+    return text.translate(TO_NEPALI) if nepali else text
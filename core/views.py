@@ -1,31 +1,109 @@
-from django.shortcuts import render, get_object_or_404, redirect
+import base64
+import datetime
+import hashlib
+import hmac
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpResponse, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.shortcuts import render, aget_object_or_404, get_object_or_404, redirect
+from django.template.loader import render_to_string
+from django.utils.cache import get_conditional_response
+from django.views.decorators.http import require_POST
+from . import calculator, metrics, page_cache
+from .bank_index import get_bank_index
+from .utils import bs_calendar
+from .utils.nepali_numerals import to_ascii
 from .models import Issue
-from .forms import IssueForm
+from .forms import IssueFilterForm, IssueForm
 
-# List all issues
-def issue_list(request):
-    issues = Issue.objects.all()
-    return render(request, 'core/issue_list.html', {'issues': issues})
+ISSUE_LIST_PAGE_SIZE = 50
 
-# Detail view of one issue
-def issue_detail(request, pk):
-    issue = get_object_or_404(Issue, pk=pk)
-    return render(request, 'core/issue_detail.html', {'issue': issue})
+
+# Opaque keyset cursor: the (created_at, id) of the last row on a page
+def encode_cursor(issue):
+    raw = f"{issue.created_at.isoformat()}|{issue.pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, pk = raw.split('|', 1)
+        return datetime.datetime.fromisoformat(created_at), pk
+    except ValueError:
+        return None
+
+
+# List issues newest first, one keyset page at a time. Async, like
+# issue_detail, so list pages keep flowing while PDFs render under ASGI.
+# Pages are cached per query string until any issue or bank changes.
+async def issue_list(request):
+    return HttpResponse(await page_cache.acached(
+        'issue_list', [page_cache.LIST_VERSION_KEY], request.GET.urlencode(), lambda: _render_issue_list(request),
+    ))
+
+
+async def _render_issue_list(request):
+    filters = IssueFilterForm(request.GET or None)
+    issues = Issue.objects.only('id', 'title', 'created_at').order_by('-created_at', '-id')
+    # Validation may look up banks, which is sync ORM work
+    if await sync_to_async(filters.is_valid)():
+        issues = filters.filter(issues)
+
+    # Rows strictly after the cursor in (-created_at, -id) order, written as a
+    # range on created_at so the page is an index seek rather than an offset
+    cursor = decode_cursor(request.GET.get('cursor', ''))
+    if cursor:
+        created_at, pk = cursor
+        issues = issues.filter(created_at__lte=created_at).exclude(created_at=created_at, id__gte=pk)
+
+    page = [issue async for issue in issues[:ISSUE_LIST_PAGE_SIZE + 1]]
+    next_url = None
+    if len(page) > ISSUE_LIST_PAGE_SIZE:
+        page = page[:ISSUE_LIST_PAGE_SIZE]
+        query = request.GET.copy()
+        query['cursor'] = encode_cursor(page[-1])
+        next_url = f"?{query.urlencode()}"
+
+    # The bound filter form can resolve bank names while rendering
+    return await sync_to_async(render_to_string)('core/issue_list.html', {
+        'issues': page,
+        'filters': filters,
+        'next_url': next_url,
+    })
+
+# Bank name suggestions for the petitioner box, served from the bank index
+def bank_suggest(request):
+    term = request.GET.get('q', '')
+    index = get_bank_index()
+    etag = '"%s"' % hashlib.sha1(f"{index.digest}|{term}".encode()).hexdigest()
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = JsonResponse({
+            'results': [{'id': pk, 'text': index.names[pk]} for pk in index.search(term)],
+        })
+    response.headers['ETag'] = etag
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+# Detail view of one issue, from the page cache while the issue is unchanged
+async def issue_detail(request, pk):
+    async def render_fragment():
+        issue = await aget_object_or_404(Issue.objects.select_related('petitioner'), pk=pk)
+        return render_to_string('core/issue_detail.html', {'issue': issue})
+
+    content = await page_cache.acached('issue_detail', page_cache.detail_version_keys(pk), '', render_fragment)
+    return HttpResponse(content)
 
 # Create new issue
 def issue_create(request):
     if request.method == 'POST':
         form = IssueForm(request.POST)
         if form.is_valid():
-            issue = form.save(commit=False)
-
-            # Set the converted AD dates manually
-            issue.issue_date = form.cleaned_data['issue_date']
-            issue.final_date = form.cleaned_data['final_date']
-            issue.total_days = form.cleaned_data['total_days']
-
-            # You can add auto-calculated logic for interest/total amount here too
-            issue.save()
+            # Issue.save() fills the AD dates and derived amounts
+            form.save()
             return redirect('issue_list')
     else:
         form = IssueForm()
@@ -51,3 +129,57 @@ def issue_delete(request, pk):
         issue.delete()
         return redirect('issue_list')
     return render(request, 'core/issue_confirm_delete.html', {'issue': issue})
+
+
+CALCULATE_FORMATS = {
+    'csv': (calculator.read_csv, calculator.csv_lines, 'text/csv; charset=utf-8'),
+    'ndjson': (calculator.read_ndjson, calculator.ndjson_lines, 'application/x-ndjson'),
+}
+
+
+# Bulk "what would the fee be" calculation. The body is CSV or NDJSON, raw
+# or as a multipart "file" upload; ?format= picks the input format when the
+# content type does not, ?output= the result format (default: same) and
+# ?as_of= a BS end date for every row. Rows are parsed, calculated and
+# written back one at a time without touching the database.
+@staff_member_required
+@require_POST
+def calculate_bulk(request):
+    upload = request.FILES.get('file')
+    fmt = request.GET.get('format')
+    if not fmt:
+        content_type = upload.content_type if upload else request.content_type
+        fmt = 'ndjson' if 'json' in (content_type or '') else 'csv'
+    output = request.GET.get('output', fmt)
+    if fmt not in CALCULATE_FORMATS or output not in CALCULATE_FORMATS:
+        return HttpResponseBadRequest("format and output must be csv or ndjson")
+
+    as_of = to_ascii(request.GET.get('as_of', '')).strip() or None
+    if as_of:
+        try:
+            as_of = bs_calendar.format_bs(*bs_calendar.parse(as_of))
+        except (ValueError, TypeError):
+            return HttpResponseBadRequest("as_of must be a BS date, YYYY-MM-DD")
+
+    reader = CALCULATE_FORMATS[fmt][0]
+    writer, content_type = CALCULATE_FORMATS[output][1:]
+    results = calculator.calculate_rows(reader(upload or request), final_date_bs=as_of)
+    return StreamingHttpResponse(
+        writer(results),
+        content_type=content_type,
+        headers={'Content-Disposition': f'inline; filename="calculation.{output}"'},
+    )
+
+
+# Request histograms in the Prometheus text format, for staff or a scraper
+# holding METRICS_TOKEN
+def metrics_view(request):
+    token = settings.METRICS_TOKEN
+    bearer = request.headers.get('Authorization', '').removeprefix('Bearer ')
+    if not (token and hmac.compare_digest(bearer, token)):
+        return staff_member_required(_metrics_response)(request)
+    return _metrics_response(request)
+
+
+def _metrics_response(request):
+    return HttpResponse(metrics.exposition(), content_type='text/plain; version=0.0.4; charset=utf-8')
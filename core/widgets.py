@@ -1,5 +1,6 @@
 from django.forms.widgets import TextInput
-from django.utils.safestring import mark_safe
+from django.urls import reverse
+from django.utils.html import format_html
 
 class NepaliUnicodeTextInput(TextInput):
     class Media:
@@ -19,34 +20,31 @@ class NepaliUnicodeTextInput(TextInput):
         return super().render(name, value, attrs, renderer)
 
 
+# BS date box; the picker itself is one delegated script (core/js/nepali-datepicker.js)
+# shared by every date field on the page
 class NepaliDatePickerWidget(TextInput):
     class Media:
         css = {
-            'all': (
-                'https://cdn.jsdelivr.net/npm/nepali-datepicker@4.0.0/nepali.datepicker.v4.0.min.css',
-            )
+            'all': ('core/css/nepali-datepicker.css',)
         }
-        js = (
-            'https://code.jquery.com/jquery-3.6.0.min.js',
-            'https://cdn.jsdelivr.net/npm/nepali-datepicker@4.0.0/nepali.datepicker.v4.0.min.js',
-        )
+        js = ('core/js/bs-calendar.js', 'core/js/nepali-datepicker.js')
 
     def render(self, name, value, attrs=None, renderer=None):
         attrs = attrs or {}
         attrs['class'] = (attrs.get('class', '') + ' nepali-datepicker').strip()
+        attrs.setdefault('autocomplete', 'off')
+        return super().render(name, value, attrs, renderer)
 
+
+# Bank name box with suggestions from the bank index, instead of a <select>
+# listing every bank; options are fetched as the user types
+class BankSuggestInput(NepaliUnicodeTextInput):
+    class Media:
+        js = ('core/js/bank-suggest.js',)
+
+    def render(self, name, value, attrs=None, renderer=None):
+        attrs = dict(attrs or {})
+        list_id = f"{attrs.get('id') or 'id_' + name}_banks"
+        attrs.update({'list': list_id, 'autocomplete': 'off', 'data-suggest-url': reverse('bank_suggest')})
         html = super().render(name, value, attrs, renderer)
-        js = f'''
-        <script type="text/javascript">
-        (function($) {{
-            $(document).ready(function() {{
-                $('input[name="{name}"]').nepaliDatePicker({{
-                    ndpYear: true,
-                    ndpMonth: true,
-                    ndpYearCount: 100
-                }});
-            }});
-        }})(window.jQuery || django.jQuery);
-        </script>
-        '''
-        return mark_safe(html + js)
+        return html + format_html('<datalist id="{}"></datalist>', list_id)
@@ -9,8 +9,19 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 
 import os
 
+from django.conf import settings
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'firm.settings')
+# No persistent DB connections under ASGI (see firm/db_profiles.py)
+os.environ.setdefault('FIRM_DB_CONN_MAX_AGE', '0')
 
 application = get_asgi_application()
+
+# Have the PDF render pool load WeasyPrint and the fonts before the first
+# print request rather than during it (PDF_WARM_UP; see settings for
+# servers that fork after import, such as gunicorn --preload)
+if settings.PDF_WARM_UP:
+    from core.pdf import start_render_pool
+
+    start_render_pool()
@@ -0,0 +1,87 @@
+# Database profiles, picked with the FIRM_DB environment variable (see
+# settings.DATABASES). benchmark_db_writes compares their write throughput.
+
+import os
+
+
+# SQLite tuned for several web and job worker processes sharing one file:
+#  - WAL lets readers carry on while one connection writes
+#  - synchronous=NORMAL is safe in WAL mode; a power cut can only lose the
+#    last commits, never corrupt the file
+#  - mmap and a 64 MiB page cache keep the hot pages in memory
+#  - BEGIN IMMEDIATE takes the write lock when a transaction starts, so two
+#    writers queue on the busy timeout instead of one failing at once with
+#    "database is locked" when it upgrades from a read lock
+SQLITE_PRAGMAS = [
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA mmap_size=268435456',
+    'PRAGMA cache_size=-65536',
+    'PRAGMA temp_store=MEMORY',
+]
+SQLITE_BUSY_TIMEOUT = 20
+
+
+# Under WSGI each worker thread keeps its connection (and its pragmas and
+# page cache) across requests: CONN_MAX_AGE None. Under ASGI the ORM runs in
+# sync_to_async threads that are not tied to a request, so persistent
+# connections pile up per thread and are never closed at request end;
+# Django's advice is to turn them off there. firm/asgi.py therefore sets
+# FIRM_DB_CONN_MAX_AGE=0 before settings load; set it yourself to override
+# (a number of seconds, or unset for no limit).
+def sqlite(path, env=os.environ):
+    max_age = env.get('FIRM_DB_CONN_MAX_AGE', '')
+    return {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': path,
+        'CONN_MAX_AGE': int(max_age) if max_age else None,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'init_command': ';'.join(SQLITE_PRAGMAS),
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': SQLITE_BUSY_TIMEOUT,
+        },
+    }
+
+
+# Django's defaults, as this project used to run; kept for comparison
+def sqlite_stock(path):
+    return {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': path,
+    }
+
+
+# PostgreSQL through Django's built-in psycopg pool (pip install
+# "psycopg[binary,pool]"). Pooled connections are handed back after every
+# request, so CONN_MAX_AGE stays 0.
+def postgres(path=None, env=os.environ):
+    return {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': env.get('FIRM_DB_NAME', 'firm'),
+        'USER': env.get('FIRM_DB_USER', 'firm'),
+        'PASSWORD': env.get('FIRM_DB_PASSWORD', ''),
+        'HOST': env.get('FIRM_DB_HOST', 'localhost'),
+        'PORT': env.get('FIRM_DB_PORT', '5432'),
+        'OPTIONS': {
+            'pool': {
+                'min_size': int(env.get('FIRM_DB_POOL_MIN', 2)),
+                'max_size': int(env.get('FIRM_DB_POOL_MAX', 10)),
+                'timeout': 10,
+            },
+        },
+    }
+
+
+PROFILES = {
+    'sqlite': sqlite,
+    'sqlite-stock': sqlite_stock,
+    'postgres': postgres,
+}
+
+
+def database(profile, sqlite_path):
+    try:
+        return PROFILES[profile](sqlite_path)
+    except KeyError:
+        raise ValueError(f"Unknown database profile {profile!r}; choose one of {', '.join(PROFILES)}")
@@ -13,6 +13,8 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 from pathlib import Path
 import os
 
+from . import db_profiles
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -35,7 +37,7 @@ INSTALLED_APPS = [
     "admin_interface",
     "colorfield", 
     # "unfold",  
-    'django.contrib.admin',
+    'core.sites.FirmAdminConfig',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
@@ -47,6 +49,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.StaticFilesMiddleware',
+    'core.middleware.ServerTimingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -59,7 +63,8 @@ ROOT_URLCONF = 'firm.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates that reports render time to core.metrics
+        'BACKEND': 'core.metrics.TimedDjangoTemplates',
         'DIRS': [os.path.join(BASE_DIR, 'core/templates')],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -78,14 +83,11 @@ WSGI_APPLICATION = 'firm.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# FIRM_DB picks the profile: "sqlite" (default; WAL, pragmas, persistent
+# connections) or "postgres" (pooled, configured by FIRM_DB_* variables).
+# See firm/db_profiles.py.
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-        # 'OPTIONS': {
-        #     'charset': 'utf8mb4',
-        # },
-    }
+    'default': db_profiles.database(os.environ.get('FIRM_DB', 'sqlite'), BASE_DIR / 'db.sqlite3'),
 }
 
 
@@ -131,7 +133,86 @@ STATIC_URL = 'static/'
 
 STATIC_ROOT = BASE_DIR / "staticfiles"
 
+# collectstatic writes content-hashed, precompressed (.br/.gz) copies, which
+# core.middleware.StaticFilesMiddleware serves with far-future cache headers
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "core.storage.CompressedManifestStaticFilesStorage",
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Changes to the annual interest rate, as ('YYYY-MM-DD' BS, rate) pairs.
+# Each rate applies from its date until the next change; days before the
+# first change use the issue's own rate. Stored amounts pick up an edit here
+# once `manage.py recalculate_issues` has run.
+INTEREST_RATE_CHANGES = []
+
+# Batch "print selected" from the Issue changelist
+ISSUE_BATCH_PRINT_MAX = 500
+ISSUE_BATCH_PRINT_WORKERS = os.cpu_count() or 1
+ISSUE_BATCH_PRINT_TASKS_PER_CHILD = 50
+
+# Rendered issue PDFs, reused until the issue or the PDF template changes
+PDF_CACHE_DIR = BASE_DIR / "pdf_cache"
+PDF_CACHE_MAX_BYTES = 512 * 1024 * 1024
+PDF_CACHE_EVICT_EVERY = 20
+PDF_CACHE_VERSION = 1
+
+# Single-issue PDF renders from async views run in a process pool this large
+PDF_RENDER_WORKERS = 2
+
+# PDF engine, imported on first use (see core.pdf.get_renderer). With
+# PDF_WARM_UP the web server starts the render pool at boot, so the first
+# print does not wait for the engine and fonts to load.
+#
+# Warm-up happens when firm/wsgi.py or firm/asgi.py is imported. Under
+# `gunicorn --preload` that is once, in the master: forked workers drop the
+# inherited pool and start their own on the first print, so the warm-up is
+# lost. Set PDF_WARM_UP = False there and start the pool per worker from a
+# post_fork hook in gunicorn.conf.py instead:
+#
+#     def post_fork(server, worker):
+#         from core.pdf import start_render_pool
+#         start_render_pool()
+PDF_RENDERER = 'core.pdf.WeasyPrintRenderer'
+PDF_WARM_UP = not DEBUG
+
+# Background jobs (core.jobs, `manage.py run_worker`). Result files live in
+# JOB_RESULT_DIR/<job id>/; a failed job is retried after JOB_RETRY_BACKOFF
+# seconds, doubled per attempt, and a running job whose worker has not
+# reported for JOB_LEASE_SECONDS goes back on the queue.
+JOB_RESULT_DIR = BASE_DIR / "job_results"
+JOB_MAX_ATTEMPTS = 3
+JOB_RETRY_BACKOFF = 30
+JOB_LEASE_SECONDS = 300
+
+# 'default' is per process and holds small, short-lived values (paginator
+# counts, the bank index version). 'pages' holds rendered issue pages
+# (core.page_cache) on disk, shared by every web worker; raise its VERSION to
+# drop all of them after changing a page template.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'pages': {
+        'BACKEND': 'core.page_cache.PageFileCache',
+        'LOCATION': BASE_DIR / "page_cache",
+        'TIMEOUT': 24 * 60 * 60,
+        'VERSION': 1,
+        'OPTIONS': {'MAX_ENTRIES': 20000, 'CULL_EVERY': 100},
+    },
+}
+
+# Request timings (core.metrics). METRICS_SERVER_TIMING adds the
+# Server-Timing header to responses; /metrics is open to staff sessions and to
+# scrapers sending "Authorization: Bearer <METRICS_TOKEN>" when one is set.
+METRICS_SERVER_TIMING = True
+METRICS_TOKEN = os.environ.get('FIRM_METRICS_TOKEN', '')
@@ -18,7 +18,9 @@ from django.contrib import admin
 from django.urls import path
 from django.conf.urls import include
 
+# core.urls goes first: the admin is mounted at the root and its catch-all
+# view would otherwise swallow /issues/...
 urlpatterns = [
-    path('', admin.site.urls),
     path('', include('core.urls')),
+    path('', admin.site.urls),
 ]
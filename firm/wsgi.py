@@ -9,8 +9,17 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'firm.settings')
 
 application = get_wsgi_application()
+
+# Have the PDF render pool load WeasyPrint and the fonts before the first
+# print request rather than during it (PDF_WARM_UP; see settings for
+# servers that fork after import, such as gunicorn --preload)
+if settings.PDF_WARM_UP:
+    from core.pdf import start_render_pool
+
+    start_render_pool()